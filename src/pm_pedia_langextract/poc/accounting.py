@@ -0,0 +1,286 @@
+"""Character, token and cost accounting for model calls."""
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """モデルの料金（100万トークンあたりのUSD）."""
+
+    input_per_million: float
+    output_per_million: float
+
+
+# 既定の料金表（公開価格ベース。変わった場合は --price-table で上書きする）
+DEFAULT_PRICES: Dict[str, ModelPrice] = {
+    "gemini-2.5-flash-lite": ModelPrice(0.10, 0.40),
+    "gemini-2.5-flash": ModelPrice(0.30, 2.50),
+    "gemini-2.5-pro": ModelPrice(1.25, 10.00),
+}
+
+
+def load_price_table(path: Path) -> Dict[str, ModelPrice]:
+    """JSONの料金表を読み込み、既定の料金表に重ねる.
+
+    形式は ``{"<model_id>": {"input_per_million": 0.1, "output_per_million": 0.4}}``。
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    prices = dict(DEFAULT_PRICES)
+    for model_id, price in data.items():
+        prices[model_id] = ModelPrice(**price)
+    return prices
+
+
+def estimate_tokens(chars: int, ascii_chars: int = 0) -> int:
+    """文字数からトークン数を見積もる.
+
+    ASCIIは約4文字で1トークン、日本語などの非ASCIIは約1文字で1トークンとみなす。
+
+    Args:
+        chars: 全体の文字数
+        ascii_chars: そのうちASCII文字の数
+    """
+    return (chars - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def _count_ascii(text: str) -> int:
+    return sum(1 for ch in text if ch.isascii())
+
+
+def prompt_overhead_chars(prompt: str, examples: Sequence[lx.data.ExampleData]) -> int:
+    """チャンクごとに送られるプロンプトとFew-shotサンプルの文字数."""
+    chars = len(prompt)
+    for example in examples:
+        chars += len(example.text)
+        for extraction in example.extractions:
+            chars += len(extraction.extraction_class) + len(extraction.extraction_text)
+            if extraction.attributes:
+                chars += len(json.dumps(extraction.attributes, ensure_ascii=False))
+    return chars
+
+
+def output_chars(result: lx.data.AnnotatedDocument) -> int:
+    """抽出結果をモデル出力に換算した文字数（クラス・テキスト・属性の合計）."""
+    chars = 0
+    for extraction in result.extractions or []:
+        chars += len(extraction.extraction_class) + len(extraction.extraction_text)
+        if extraction.attributes:
+            chars += len(json.dumps(extraction.attributes, ensure_ascii=False))
+    return chars
+
+
+@dataclass
+class UsageRecord:
+    """``lx.extract`` 1回分の使用量."""
+
+    stage: str
+    model_id: str
+    document: Optional[str]
+    input_chars: int
+    output_chars: int
+    chunks: int
+    passes: int
+    input_tokens: int
+    output_tokens: int
+    cached: bool
+
+
+class UsageAccountant:
+    """抽出呼び出しの文字数・トークン数・費用を記録し、集計する.
+
+    入力は (本文 + チャンクごとのプロンプト・Few-shot) × パス数、出力は
+    抽出結果の大きさから見積もる。キャッシュから返した呼び出しも件数には
+    含めるが、費用には含めない。長時間動かす場合は :meth:`rollup` で個々の
+    記録を合計に畳み込める。
+    """
+
+    def __init__(self, prices: Optional[Mapping[str, ModelPrice]] = None):
+        self.prices = dict(prices) if prices is not None else dict(DEFAULT_PRICES)
+        self._records: List[UsageRecord] = []
+        # rollup済みの (ステージ, モデル, 文書) ごとの合計
+        self._rolled: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._warned_models: set = set()
+
+    def record(
+        self,
+        stage: str,
+        model_id: str,
+        text: str,
+        prompt: str,
+        examples: Sequence[lx.data.ExampleData],
+        result: lx.data.AnnotatedDocument,
+        chunks: int,
+        passes: int,
+        document: Optional[str] = None,
+        cached: bool = False,
+    ) -> UsageRecord:
+        """抽出呼び出し1回分を記録する."""
+        overhead = prompt_overhead_chars(prompt, examples)
+        input_chars = (len(text) + overhead * chunks) * passes
+        input_ascii = (_count_ascii(text) + _count_ascii(prompt) * chunks) * passes
+        out_chars = output_chars(result)
+        record = UsageRecord(
+            stage=stage,
+            model_id=model_id,
+            document=document,
+            input_chars=input_chars,
+            output_chars=out_chars,
+            chunks=chunks,
+            passes=passes,
+            input_tokens=estimate_tokens(input_chars, input_ascii),
+            output_tokens=estimate_tokens(out_chars),
+            cached=cached,
+        )
+        with self._lock:
+            self._records.append(record)
+        logger.debug(
+            f"使用量 [{stage}] {document or '-'}: 入力 {input_chars}文字 / "
+            f"出力 {out_chars}文字, {chunks}チャンク × {passes}パス"
+            + (" (キャッシュ)" if cached else "")
+        )
+        return record
+
+    def records(self) -> List[UsageRecord]:
+        """記録済みの使用量の一覧."""
+        with self._lock:
+            return list(self._records)
+
+    def reset(self) -> None:
+        """記録と畳み込み済みの合計を破棄する."""
+        with self._lock:
+            self._records.clear()
+            self._rolled.clear()
+
+    def rollup(self) -> None:
+        """個々の記録を (ステージ, モデル, 文書) ごとの合計に畳み込んで破棄する.
+
+        :meth:`summary` の結果は変わらないが、:meth:`records` からは消える。
+        """
+        with self._lock:
+            records, self._records = self._records, []
+            for record in records:
+                key = (record.stage, record.model_id, record.document)
+                _add(
+                    self._rolled.setdefault(key, _empty_totals()),
+                    record,
+                    self.cost(record),
+                )
+
+    def cost(self, record: UsageRecord) -> float:
+        """1回分の見積もり費用（USD、キャッシュ・料金不明のモデルは0）."""
+        if record.cached:
+            return 0.0
+        price = self.prices.get(record.model_id)
+        if price is None:
+            if record.model_id not in self._warned_models:
+                self._warned_models.add(record.model_id)
+                logger.warning(
+                    f"料金表にないモデルのため費用を0とします: {record.model_id}"
+                )
+            return 0.0
+        return (
+            record.input_tokens * price.input_per_million
+            + record.output_tokens * price.output_per_million
+        ) / 1_000_000
+
+    def summary(self, stages: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """合計と、文書・ステージ・モデルごとの内訳を返す.
+
+        Args:
+            stages: 集計対象のステージ（省略時はすべて）
+        """
+        wanted = set(stages) if stages is not None else None
+        with self._lock:
+            groups = [(key, dict(totals)) for key, totals in self._rolled.items()]
+            records = list(self._records)
+        for record in records:
+            totals = _empty_totals()
+            _add(totals, record, self.cost(record))
+            groups.append(((record.stage, record.model_id, record.document), totals))
+
+        by_document: Dict[str, Dict[str, Any]] = {}
+        by_stage: Dict[str, Dict[str, Any]] = {}
+        by_model: Dict[str, Dict[str, Any]] = {}
+        total = _empty_totals()
+        for (stage, model_id, document), totals in groups:
+            if wanted is not None and stage not in wanted:
+                continue
+            _merge(total, totals)
+            _merge(by_stage.setdefault(stage, _empty_totals()), totals)
+            _merge(by_model.setdefault(model_id, _empty_totals()), totals)
+            if document is not None:
+                _merge(by_document.setdefault(document, _empty_totals()), totals)
+
+        return {
+            "total": _rounded(total),
+            "by_stage": {k: _rounded(v) for k, v in sorted(by_stage.items())},
+            "by_model": {k: _rounded(v) for k, v in sorted(by_model.items())},
+            "by_document": {k: _rounded(v) for k, v in sorted(by_document.items())},
+            "prices": {k: asdict(v) for k, v in sorted(self.prices.items())},
+        }
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "cached_calls": 0,
+        "input_chars": 0,
+        "output_chars": 0,
+        "chunks": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cost_usd": 0.0,
+    }
+
+
+def _add(totals: Dict[str, Any], record: UsageRecord, cost: float) -> None:
+    totals["calls"] += 1
+    totals["cached_calls"] += int(record.cached)
+    totals["input_chars"] += record.input_chars
+    totals["output_chars"] += record.output_chars
+    totals["chunks"] += record.chunks * record.passes
+    totals["input_tokens"] += record.input_tokens
+    totals["output_tokens"] += record.output_tokens
+    totals["cost_usd"] += cost
+
+
+def _merge(totals: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for key, value in other.items():
+        totals[key] += value
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    return {**totals, "cost_usd": round(totals["cost_usd"], 6)}
+
+
+_default_accountant: Optional[UsageAccountant] = None
+_default_lock = threading.Lock()
+
+
+def get_accountant() -> UsageAccountant:
+    """プロセス共有の :class:`UsageAccountant` を返す（未設定なら既定値で作る）."""
+    global _default_accountant
+    with _default_lock:
+        if _default_accountant is None:
+            _default_accountant = UsageAccountant()
+        return _default_accountant
+
+
+def configure_accountant(**kwargs: Any) -> UsageAccountant:
+    """プロセス共有の :class:`UsageAccountant` を指定の設定で作り直す."""
+    global _default_accountant
+    with _default_lock:
+        _default_accountant = UsageAccountant(**kwargs)
+        return _default_accountant
@@ -0,0 +1,225 @@
+"""Persistent alias index mapping project surface forms to stable project ids."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.matching import normalize
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ALIAS_PATH = Path("data/aliases/project_aliases.json")
+
+# 索引ファイルがないときに登録する既知のプロジェクト
+SEED_PROJECTS: Dict[str, Dict[str, List[str]]] = {
+    "proj_001": {
+        "name": "スマートタグ",
+        "aliases": ["スマートタグ機能", "タグクラスタリング", "smarttag", "smart tag"],
+        "keywords": ["タグ", "クラスタリング", "ハルシネーション"],
+    },
+    "proj_002": {
+        "name": "マルチデータソース",
+        "aliases": ["マルチデータソース対応", "multi data source"],
+        "keywords": ["データソース", "csv", "取り込み"],
+    },
+}
+
+
+class AliasIndex:
+    """プロジェクトの表記（名前・別名）から安定した ``project_id`` を引く索引.
+
+    表記は :func:`normalize` したものをキーにした辞書で持つので、既知の表記は
+    モデルを呼ばずに O(1) で名寄せできる。フェーズ2の結果から :meth:`register`
+    で新しいプロジェクトや別名を追記し、:meth:`save` で書き出す。ファイルは
+    手で編集してよい（``keywords`` は名寄せには使わず、関連スニペットの照合に使う）。
+    同じ表記が複数のプロジェクトにある場合は、先に登録されたほうを優先する。
+
+    ファイル形式:
+        {"version": 1, "projects": {"<project_id>": {"name": ..., "aliases": [...],
+        "keywords": [...]}}}
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_ALIAS_PATH):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        self._surfaces: Dict[str, str] = {}
+        self._dirty = False
+
+        projects: Dict[str, Dict[str, Any]] = SEED_PROJECTS
+        if self.path is not None and self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    projects = json.load(f).get("projects", {})
+                logger.info(f"別名索引読み込み: {self.path} ({len(projects)}件)")
+            except json.JSONDecodeError as e:
+                logger.warning(
+                    f"別名索引が壊れているため初期値から作り直します {self.path}: {e}"
+                )
+        for project_id, entry in projects.items():
+            self._add_project(
+                project_id,
+                entry.get("name", project_id),
+                entry.get("aliases", []),
+                entry.get("keywords", []),
+            )
+        # 初期値から作ったときは最初の保存で書き出す
+        self._dirty = self.path is not None and not self.path.exists()
+
+    def __len__(self) -> int:
+        return len(self._projects)
+
+    def __contains__(self, project_id: str) -> bool:
+        return project_id in self._projects
+
+    def _add_project(
+        self,
+        project_id: str,
+        name: str,
+        aliases: Iterable[str],
+        keywords: Iterable[str],
+    ) -> None:
+        self._projects[project_id] = {"name": name, "aliases": [], "keywords": []}
+        self._add_surfaces(project_id, [name, *aliases])
+        self._add_keywords(project_id, keywords)
+
+    def _add_surfaces(self, project_id: str, surfaces: Iterable[str]) -> None:
+        entry = self._projects[project_id]
+        for surface in surfaces:
+            key = normalize(surface)
+            if not key:
+                continue
+            owner = self._surfaces.setdefault(key, project_id)
+            if owner != project_id:
+                logger.debug(
+                    f"別名 '{surface}' は {owner} に登録済みのため"
+                    f" {project_id} には追加しません"
+                )
+                continue
+            if key != normalize(entry["name"]) and surface not in entry["aliases"]:
+                entry["aliases"].append(surface)
+                self._dirty = True
+
+    def _add_keywords(self, project_id: str, keywords: Iterable[str]) -> None:
+        entry = self._projects[project_id]
+        for keyword in keywords:
+            if keyword and keyword not in entry["keywords"]:
+                entry["keywords"].append(keyword)
+                self._dirty = True
+
+    def resolve(self, surface: str) -> Optional[str]:
+        """表記の ``project_id``（未知ならNone）."""
+        return self._surfaces.get(normalize(surface))
+
+    def resolve_any(self, surfaces: Iterable[str]) -> Optional[str]:
+        """表記のうち最初に名寄せできたものの ``project_id``."""
+        for surface in surfaces:
+            project_id = self.resolve(surface)
+            if project_id is not None:
+                return project_id
+        return None
+
+    def unknown(self, surfaces: Iterable[str]) -> List[str]:
+        """名寄せできない表記（モデルに判断を任せるもの）."""
+        return [surface for surface in surfaces if self.resolve(surface) is None]
+
+    def name(self, project_id: str) -> str:
+        """プロジェクトの正式名（未知のIDはそのまま返す）."""
+        entry = self._projects.get(project_id)
+        return entry["name"] if entry else project_id
+
+    def keywords(self, project_id: str) -> List[str]:
+        """関連スニペットの照合に使う正式名・別名・キーワード."""
+        entry = self._projects.get(project_id)
+        if entry is None:
+            return []
+        return [entry["name"], *entry["aliases"], *entry["keywords"]]
+
+    def register(
+        self,
+        name: str,
+        aliases: Iterable[str] = (),
+        project_id: Optional[str] = None,
+    ) -> str:
+        """プロジェクトの表記を登録し、その ``project_id`` を返す.
+
+        ``project_id`` を省略すると、名前・別名のいずれかが既知ならそのプロジェクトに
+        新しい別名を加え、すべて未知なら新しいIDで登録する。
+        """
+        surfaces = [name, *aliases]
+        with self._lock:
+            if project_id is None:
+                project_id = self.resolve_any(surfaces) or self._next_id()
+            if project_id not in self._projects:
+                self._add_project(project_id, name, aliases, ())
+                self._dirty = True
+                logger.info(f"別名索引に新しいプロジェクトを登録: {project_id} {name}")
+            else:
+                self._add_surfaces(project_id, surfaces)
+        return project_id
+
+    def _next_id(self) -> str:
+        numbers = [
+            int(project_id.rsplit("_", 1)[-1])
+            for project_id in self._projects
+            if project_id.rsplit("_", 1)[-1].isdigit()
+        ]
+        return f"proj_{max(numbers, default=0) + 1:03d}"
+
+    def annotate(self, result: lx.data.AnnotatedDocument) -> int:
+        """スニペットの ``project_keywords`` を名寄せし、``project_ids`` 属性に入れる.
+
+        Returns:
+            int: ``project_ids`` を付けたスニペット数
+        """
+        annotated = 0
+        for extraction in result.extractions or []:
+            attributes = extraction.attributes or {}
+            keywords = attributes.get("project_keywords") or []
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            project_ids = sorted({
+                project_id
+                for project_id in (self.resolve(str(keyword)) for keyword in keywords)
+                if project_id is not None
+            })
+            if project_ids:
+                extraction.attributes = {**attributes, "project_ids": project_ids}
+                annotated += 1
+            elif "project_ids" in attributes:
+                # 前回の結果を引き継いだスニペットの古い名寄せは消す
+                extraction.attributes = {
+                    k: v for k, v in attributes.items() if k != "project_ids"
+                }
+        return annotated
+
+    def describe(self, project_id: str) -> str:
+        """プロジェクトの正式名と別名を入力テキストに載せる1行（改行なし）."""
+        entry = self._projects.get(project_id)
+        if entry is None:
+            return f"- {project_id}"
+        line = f"- {project_id}: {entry['name']}"
+        if entry["aliases"]:
+            line += f"（別名: {', '.join(entry['aliases'])}）"
+        return line
+
+    def save(self) -> None:
+        """変更があれば索引をアトミックに書き出す（パスがなければ何もしない）."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": 1, "projects": self._projects}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+        logger.info(f"別名索引保存: {self.path} ({len(self._projects)}件)")
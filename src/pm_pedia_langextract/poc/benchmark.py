@@ -0,0 +1,530 @@
+"""Benchmark suite for the Phase 1 and Phase 2 hot paths with stored baselines."""
+
+import argparse
+import gc
+import json
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.clustering import SnippetClusterer
+from pm_pedia_langextract.poc.extractors import (
+    IntegrationExtractor,
+    SnippetExtractor,
+    TriageExtractor,
+)
+from pm_pedia_langextract.poc.ingest import iter_documents
+from pm_pedia_langextract.poc.pipeline import Phase1Config, Phase1Pipeline
+from pm_pedia_langextract.poc.providers import Cassette, LatencyModel, ReplayProvider
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+from pm_pedia_langextract.poc.synthetic import (
+    CorpusConfig,
+    build_projects,
+    generate_corpus,
+)
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+BASELINE_DIR = Path("benchmarks/baselines")
+DEFAULT_RESULT_PATH = Path("benchmarks/results/latest.json")
+# 計測内容や計測値の名前を変えたら上げる（版の違うベースラインとは比較しない）
+REPORT_VERSION = 3
+
+# オフライン実行時にすべてのプロンプトへ返す応答
+# （トリアージを通過し、スニペットも1件返す）
+BENCHMARK_OUTPUT = json.dumps({
+    "extractions": [
+        {"document_type": "週次レビュー"},
+        {"relevance_score": "0.9"},
+        {"summary": "ベンチマーク用の要約"},
+        {"課題": "パフォーマンスが想定より遅い"},
+    ]
+}, ensure_ascii=False)
+
+
+@dataclass
+class BenchmarkResult:
+    """1つの計測値."""
+
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+@dataclass
+class SuiteConfig:
+    """ベンチマークの規模.
+
+    Attributes:
+        phase1_documents: フェーズ1のエンドツーエンドで処理する文書数
+        phase1_latency: オフラインモデルの1リクエストあたりのレイテンシ（秒）
+        snippet_sizes: フェーズ2で計測するスニペット数
+        snippets_per_document: 1文書あたりのスニペット数
+        jsonl_documents: JSONL読み書きで扱う文書数
+        repeat: 各計測の繰り返し回数（最良値を採用）
+        measure_memory: tracemallocでピークメモリも計測するか
+    """
+
+    phase1_documents: int = 200
+    phase1_latency: float = 0.0
+    snippet_sizes: Tuple[int, ...] = (1_000, 10_000, 100_000)
+    snippets_per_document: int = 100
+    jsonl_documents: int = 2_000
+    repeat: int = 3
+    measure_memory: bool = True
+
+
+QUICK_CONFIG = SuiteConfig(
+    phase1_documents=30, snippet_sizes=(1_000, 10_000), jsonl_documents=300, repeat=1
+)
+FULL_CONFIG = SuiteConfig(snippet_sizes=(1_000, 10_000, 100_000, 1_000_000))
+
+
+def _best_seconds(fn: Callable[[], Any], repeat: int) -> float:
+    """``fn`` を ``repeat`` 回実行し、最短の実行時間（秒）を返す."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_mb(fn: Callable[[], Any]) -> float:
+    """``fn`` 実行中のPythonヒープのピーク使用量（MB）を返す."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def bench_phase1(workdir: Path, config: SuiteConfig) -> List[BenchmarkResult]:
+    """オフラインモデルでフェーズ1を通しで実行し、文書/秒を計測する."""
+    corpus_dir = workdir / "phase1_corpus"
+    corpus = CorpusConfig(
+        num_documents=config.phase1_documents,
+        doc_type_weights={"weekly_review": 0.5, "meeting": 0.3, "prd": 0.2},
+    )
+    generate_corpus(corpus_dir, corpus)
+    latency = LatencyModel(
+        median=config.phase1_latency or None,
+        scale=1.0 if config.phase1_latency else 0.0,
+    )
+    provider = ReplayProvider(
+        Cassette(workdir / "empty_cassette.jsonl"),
+        latency,
+        fallback_output=BENCHMARK_OUTPUT,
+    )
+    run_count = 0
+
+    def run() -> None:
+        nonlocal run_count
+        run_count += 1
+        triage = TriageExtractor()
+        snippet = SnippetExtractor()
+        triage.provider = provider
+        snippet.provider = provider
+        output_dir = workdir / f"phase1_output_{run_count}"
+        pipeline = Phase1Pipeline(
+            triage,
+            snippet,
+            Phase1Config(output_dir=output_dir, input_root=corpus_dir),
+        )
+        pipeline.run(iter_documents(corpus_dir))
+        pipeline.close()
+
+    seconds = _best_seconds(run, config.repeat)
+    docs_per_s = config.phase1_documents / seconds
+    results = [
+        BenchmarkResult("phase1.end_to_end.docs_per_s", docs_per_s, "docs/s", True)
+    ]
+    if config.measure_memory:
+        results.append(
+            BenchmarkResult("phase1.end_to_end.peak_mb", _peak_mb(run), "MB", False)
+        )
+    return results
+
+
+def write_snippet_shards(directory: Path, total: int, per_document: int) -> ShardReader:
+    """フェーズ1出力と同じ形式のスニペットをシャードに合成して書き出す."""
+    projects = build_projects(CorpusConfig(num_projects=50))
+    categories = [
+        "課題", "決定事項", "リスク",
+        "進捗報告", "気づき・インサイト", "ネクストアクション",
+    ]
+    writer = ShardWriter(directory, flush_every=1000)
+    for doc_index in range((total + per_document - 1) // per_document):
+        extractions = []
+        for i in range(min(per_document, total - doc_index * per_document)):
+            project = projects[(doc_index * 7 + i) % len(projects)]
+            mention = project.aliases[i % len(project.aliases)]
+            keyword = project.keywords[i % 3]
+            extractions.append(lx.data.Extraction(
+                extraction_class=categories[i % len(categories)],
+                extraction_text=f"{mention}の{keyword}について対応 {doc_index}-{i}",
+                attributes={
+                    "project_keywords": [mention], "people": project.people[:1],
+                },
+            ))
+        writer.append(
+            f"doc_{doc_index:06d}.md",
+            lx.data.AnnotatedDocument(extractions=extractions, text=""),
+        )
+    writer.close()
+    return ShardReader(directory)
+
+
+def bench_phase2(workdir: Path, config: SuiteConfig) -> List[BenchmarkResult]:
+    """スニペット数ごとにストアの同期と、統合用テキストの生成・関連付けを計測する."""
+    extractor = IntegrationExtractor()
+    projects = [
+        (p.name, p.aliases) for p in build_projects(CorpusConfig(num_projects=50))
+    ]
+    results = []
+    for size in config.snippet_sizes:
+        source = write_snippet_shards(
+            workdir / f"snippets_{size}", size, config.snippets_per_document
+        )
+        store_path = workdir / f"store_{size}.sqlite3"
+
+        def sync(
+            store_path: Path = store_path, source: ShardReader = source
+        ) -> None:
+            store_path.unlink(missing_ok=True)
+            fresh = SnippetStore(store_path)
+            fresh.sync(source)
+            fresh.close()
+
+        sync_seconds = _best_seconds(sync, config.repeat)
+        results.append(BenchmarkResult(
+            f"phase2.store_sync[n={size}].snippets_per_s",
+            size / sync_seconds,
+            "snippets/s",
+            True,
+        ))
+        store = SnippetStore(store_path)
+        # ラムダはループ変数を既定引数で束縛する
+        cases: List[Tuple[str, Callable[[], Any]]] = [
+            (
+                "load_snippets",
+                lambda store=store: extractor.load_snippets(store),
+            ),
+            (
+                "partition_snippets",
+                lambda store=store: list(extractor._partition_snippets(store)),
+            ),
+            (
+                "cluster_snippets",
+                lambda store=store: SnippetClusterer().cluster(store.iter_snippets()),
+            ),
+            (
+                "near_duplicate_groups",
+                store.near_duplicate_groups,
+            ),
+            (
+                "canonical_snippets",
+                lambda store=store: list(store.canonical_snippets()),
+            ),
+            (
+                "collect_related_snippets",
+                lambda store=store: extractor._collect_related_snippets(
+                    projects, store
+                ),
+            ),
+        ]
+        for case, fn in cases:
+            seconds = _best_seconds(fn, config.repeat)
+            results.append(BenchmarkResult(
+                f"phase2.{case}[n={size}].snippets_per_s",
+                size / seconds,
+                "snippets/s",
+                True,
+            ))
+            if config.measure_memory:
+                results.append(BenchmarkResult(
+                    f"phase2.{case}[n={size}].peak_mb", _peak_mb(fn), "MB", False
+                ))
+        store.close()
+    return results
+
+
+def bench_jsonl(workdir: Path, config: SuiteConfig) -> List[BenchmarkResult]:
+    """LangExtractのJSONL書き出し・読み込みのスループットを計測する."""
+    text = (
+        "スマートタグのクラスタリング機構について、パフォーマンスの課題を整理した。"
+    ) * 20
+    documents = [
+        lx.data.AnnotatedDocument(
+            document_id=f"doc_{i}",
+            text=text,
+            extractions=[
+                lx.data.Extraction(
+                    extraction_class="課題",
+                    extraction_text="パフォーマンスの課題",
+                    char_interval=lx.data.CharInterval(start_pos=24, end_pos=34),
+                    attributes={"project_keywords": ["スマートタグ"], "people": []},
+                )
+                for _ in range(10)
+            ],
+        )
+        for i in range(config.jsonl_documents)
+    ]
+    path = workdir / "documents.jsonl"
+
+    def write() -> None:
+        lx.io.save_annotated_documents(
+            iter(documents),
+            output_dir=workdir,
+            output_name=path.name,
+            show_progress=False,
+        )
+
+    def read() -> None:
+        for _ in lx.io.load_annotated_documents_jsonl(path, show_progress=False):
+            pass
+
+    write_seconds = _best_seconds(write, config.repeat)
+    megabytes = path.stat().st_size / 1024 / 1024
+    read_seconds = _best_seconds(read, config.repeat)
+    return [
+        BenchmarkResult(
+            "jsonl.write.mb_per_s", megabytes / write_seconds, "MB/s", True
+        ),
+        BenchmarkResult("jsonl.read.mb_per_s", megabytes / read_seconds, "MB/s", True),
+    ]
+
+
+def _environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "git_commit": commit,
+    }
+
+
+def run_suite(config: SuiteConfig, workdir: Optional[Path] = None) -> Dict[str, Any]:
+    """全ベンチマークを実行し、レポートを返す."""
+    with tempfile.TemporaryDirectory(prefix="pm_pedia_bench_") as tmp:
+        root = Path(workdir or tmp)
+        results: List[BenchmarkResult] = []
+        for name, bench in [
+            ("phase1", bench_phase1),
+            ("phase2", bench_phase2),
+            ("jsonl", bench_jsonl),
+        ]:
+            logger.info(f"ベンチマーク実行中: {name}")
+            (root / name).mkdir(parents=True, exist_ok=True)
+            results.extend(bench(root / name, config))
+
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "environment": _environment(),
+        "config": asdict(config),
+        "results": {r.name: asdict(r) for r in results},
+    }
+
+
+@dataclass
+class Comparison:
+    """ベースラインとの比較結果."""
+
+    name: str
+    baseline: float
+    current: float
+    change: float
+    regressed: bool
+
+
+def compare_reports(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2
+) -> List[Comparison]:
+    """両方のレポートにある計測値を比較する.
+
+    改善方向と逆に ``tolerance``（比率）を超えて変化したものを退行とする。
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = -change if result["higher_is_better"] else change
+        comparisons.append(
+            Comparison(name, base["value"], result["value"], change, worse > tolerance)
+        )
+    return comparisons
+
+
+def _version_key(name: str) -> Tuple[Tuple[int, ...], str]:
+    """``v0.10.0`` のような名前を数値の版として並べるためのキー."""
+    return tuple(int(part) for part in re.findall(r"\d+", name)), name
+
+
+def baseline_path(name_or_path: Optional[str] = None) -> Path:
+    """ベースラインのパスを返す（省略時は名前の版が最も新しいベースライン）.
+
+    更新日時はチェックアウトやコピーで変わるため、ファイル名の版番号で選ぶ。
+    """
+    if name_or_path is not None:
+        path = Path(name_or_path)
+        if path.suffix == ".json":
+            return path
+        return BASELINE_DIR / f"{name_or_path}.json"
+
+    candidates = sorted(
+        BASELINE_DIR.glob("*.json"), key=lambda p: _version_key(p.stem)
+    )
+    if not candidates:
+        raise FileNotFoundError(
+            f"ベースラインが見つかりません: {BASELINE_DIR}/*.json"
+        )
+    return candidates[-1]
+
+
+def _write_report(report: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def _print_comparisons(comparisons: Sequence[Comparison], tolerance: float) -> None:
+    for c in comparisons:
+        mark = "退行" if c.regressed else "OK"
+        print(
+            f"{mark:4} {c.name:60} {c.baseline:14.2f} -> {c.current:14.2f}"
+            f" ({c.change:+.1%})"
+        )
+    regressions = sum(c.regressed for c in comparisons)
+    print(
+        f"\n{len(comparisons)}件中 {regressions}件が"
+        f"許容幅 {tolerance:.0%} を超えて退行"
+    )
+
+
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PM-pedia ベンチマーク")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="ベンチマークを実行する")
+    size = run.add_mutually_exclusive_group()
+    size.add_argument("--quick", action="store_true", help="小規模で実行する")
+    size.add_argument(
+        "--full", action="store_true", help="10^6スニペットまで実行する"
+    )
+    run.add_argument(
+        "--no-memory", action="store_true", help="ピークメモリを計測しない"
+    )
+    run.add_argument("--output", type=Path, default=DEFAULT_RESULT_PATH)
+    run.add_argument(
+        "--save-baseline", metavar="NAME", help="結果をベースラインとして保存する"
+    )
+    run.add_argument(
+        "--compare", action="store_true", help="実行後に最新のベースラインと比較する"
+    )
+    run.add_argument(
+        "--tolerance", type=float, default=0.2, help="退行とみなす変化率"
+    )
+
+    compare = commands.add_parser("compare", help="結果をベースラインと比較する")
+    compare.add_argument(
+        "current", type=Path, nargs="?", default=DEFAULT_RESULT_PATH
+    )
+    compare.add_argument(
+        "--baseline", help="ベースライン名またはパス（省略時は最新）"
+    )
+    compare.add_argument(
+        "--tolerance", type=float, default=0.2, help="退行とみなす変化率"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """CLIエントリポイント（退行があれば1を返す）."""
+    args = _parse_args(argv)
+
+    if args.command == "run":
+        if args.quick:
+            config = QUICK_CONFIG
+        elif args.full:
+            config = FULL_CONFIG
+        else:
+            config = SuiteConfig()
+        if args.no_memory:
+            config.measure_memory = False
+        report = run_suite(config)
+        _write_report(report, args.output)
+        logger.info(f"ベンチマーク結果: {args.output}")
+
+        status = 0
+        if args.compare:
+            status = _compare_with_baseline(report, None, args.tolerance)
+        # 比較は保存前の最新ベースラインに対して行う
+        if args.save_baseline:
+            path = baseline_path(args.save_baseline)
+            _write_report(report, path)
+            logger.info(f"ベースラインを保存: {path}")
+        return status
+
+    with args.current.open(encoding="utf-8") as f:
+        current = json.load(f)
+    return _compare_with_baseline(current, args.baseline, args.tolerance)
+
+
+def _compare_with_baseline(
+    current: Dict[str, Any], baseline_name: Optional[str], tolerance: float
+) -> int:
+    try:
+        path = baseline_path(baseline_name)
+        with path.open(encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError as e:
+        logger.warning(f"ベースラインがないため比較をスキップします: {e}")
+        return 0
+
+    if baseline.get("version") != current.get("version"):
+        logger.warning(
+            f"レポートの版が異なるため比較をスキップします: {path} "
+            f"(ベースライン v{baseline.get('version')}, 今回 v{current.get('version')})"
+        )
+        return 0
+    if baseline.get("config") != current.get("config"):
+        logger.warning(f"ベンチマークの規模がベースラインと異なります: {path}")
+
+    print(f"ベースライン: {path} ({baseline['environment']['git_commit']})")
+    comparisons = compare_reports(current, baseline, tolerance)
+    _print_comparisons(comparisons, tolerance)
+    return 1 if any(c.regressed for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    setup_logging(level="WARNING")
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Persistent content-addressed cache for LLM extraction calls."""
+
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import langextract as lx
+from langextract import data_lib
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = Path("data/cache/extractions.sqlite3")
+
+# 上限を超えたら、上限よりこの割合だけ少なくなるまでまとめて削除する
+EVICTION_HEADROOM = 0.1
+
+
+def _low_water(limit: int) -> int:
+    return limit - int(limit * EVICTION_HEADROOM)
+
+
+def make_cache_key(
+    text: str,
+    prompt: str,
+    examples: Sequence[lx.data.ExampleData],
+    model_id: str,
+    params: Dict[str, Any],
+) -> str:
+    """抽出呼び出しの全入力からキャッシュキー（SHA-256）を生成する.
+
+    Args:
+        text: 抽出対象テキスト
+        prompt: プロンプト
+        examples: Few-shotサンプル
+        model_id: モデルID
+        params: extraction_passes, max_char_buffer などの抽出パラメータ
+
+    Returns:
+        str: 16進数のハッシュ値
+    """
+    payload = {
+        "text": text,
+        "prompt": prompt,
+        "examples": [dataclasses.asdict(example) for example in examples],
+        "model_id": model_id,
+        "params": params,
+    }
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """SQLiteに ``lx.extract`` の結果を保存するキャッシュ.
+
+    エントリ数・合計サイズ・経過時間の上限を超えたものは、
+    最終アクセスが古い順に削除する。エントリ数と合計サイズは開いたときに
+    1回だけ数えて以降は書き込みごとに増減させ、上限を超えたときだけ、
+    上限の ``EVICTION_HEADROOM`` 分下回るまでまとめて削除する。
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_CACHE_PATH,
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = 1024 * 1024 * 1024,
+        max_age_seconds: Optional[float] = None,
+    ):
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if max_age_seconds is not None and max_age_seconds <= 0:
+            raise ValueError("max_age_seconds must be positive")
+
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extractions_last_access "
+            "ON extractions(last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extractions_created_at "
+            "ON extractions(created_at)"
+        )
+        self._conn.commit()
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[lx.data.AnnotatedDocument]:
+        """キャッシュから抽出結果を取得する（なければNone）."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, size FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                self._conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                self._conn.commit()
+                self._entries -= 1
+                self._bytes -= row[2]
+                self.evictions += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE extractions SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        logger.debug(f"キャッシュヒット: {key[:12]}")
+        return data_lib.dict_to_annotated_document(json.loads(row[0]))
+
+    def put(self, key: str, document: lx.data.AnnotatedDocument) -> None:
+        """抽出結果をキャッシュに保存し、必要に応じて古いエントリを削除する."""
+        value = json.dumps(
+            data_lib.annotated_document_to_dict(document), ensure_ascii=False
+        )
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            if previous is None:
+                self._entries += 1
+            else:
+                self._bytes -= previous[0]
+            self._bytes += size
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """全エントリを削除する."""
+        with self._lock:
+            self._conn.execute("DELETE FROM extractions")
+            self._conn.commit()
+            self._entries = self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット/ミス数と現在のサイズを返す."""
+        with self._lock:
+            entries, total_bytes = self._entries, self._bytes
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def close(self) -> None:
+        """DB接続を閉じる."""
+        with self._lock:
+            self._conn.close()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return (
+            self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+        )
+
+    def _evict(self, now: float) -> None:
+        """期限切れ・上限超過のエントリを削除する（ロック取得済みで呼ぶ）."""
+        if self.max_age_seconds is not None:
+            cutoff = now - self.max_age_seconds
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions "
+                "WHERE created_at < ?",
+                (cutoff,),
+            ).fetchone()
+            if count:
+                self._conn.execute(
+                    "DELETE FROM extractions WHERE created_at < ?", (cutoff,)
+                )
+                self._entries -= count
+                self._bytes -= size
+                self.evictions += count
+
+        over_entries = self.max_entries is not None and self._entries > self.max_entries
+        over_bytes = self.max_bytes is not None and self._bytes > self.max_bytes
+        if not (over_entries or over_bytes):
+            return
+
+        target_entries = (
+            _low_water(self.max_entries) if self.max_entries is not None else None
+        )
+        target_bytes = (
+            _low_water(self.max_bytes) if self.max_bytes is not None else None
+        )
+        entries, total_bytes = self._entries, self._bytes
+        stale_keys = []
+        # last_access の索引を古い順にたどり、目標を下回ったところで止める
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM extractions ORDER BY last_access ASC"
+        ):
+            if (target_entries is None or entries <= target_entries) and (
+                target_bytes is None or total_bytes <= target_bytes
+            ):
+                break
+            stale_keys.append((key,))
+            entries -= 1
+            total_bytes -= size
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", stale_keys)
+        self._entries, self._bytes = entries, total_bytes
+        self.evictions += len(stale_keys)
@@ -0,0 +1,199 @@
+"""Offline clustering of Phase 1 snippets by project before LLM integration."""
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Sequence
+
+from pm_pedia_langextract.poc.dedup import UnionFind
+from pm_pedia_langextract.poc.matching import normalize
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SparseVector = Dict[str, float]
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> List[str]:
+    """正規化したテキストの文字n-gram（空白は詰める）."""
+    compact = "".join(normalize(text).split())
+    grams = []
+    for n in sizes:
+        grams.extend(compact[i:i + n] for i in range(len(compact) - n + 1))
+    return grams
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    """L2正規化済みの疎ベクトルのコサイン類似度."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+
+
+def _l2_normalized(vector: Dict[str, float]) -> SparseVector:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {f: w / norm for f, w in vector.items()} if norm else {}
+
+
+@dataclass
+class SnippetCluster:
+    """同じプロジェクトについてと推定したスニペットのまとまり（スニペットIDの一覧）."""
+
+    cluster_id: int
+    snippet_ids: List[int] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+
+
+class SnippetClusterer:
+    """文字n-gramのTF-IDFでスニペットをプロジェクトごとにまとめる.
+
+    1. 正規化したプロジェクトキーワードが同じスニペットを同じグループにする。
+       ただし、スニペットの割合が ``max_keyword_df`` を超える（どこにでも付く）
+       キーワードではまとめない。キーワードによる併合は推移的なので、複数の
+       キーワードを持つスニペットを介してグループがつながることはある。
+    2. 本文（``extraction_text``）とキーワード（重み ``keyword_weight``）の文字n-gram
+       TF-IDFから各グループの重心を作る。大きいグループから順に、コサイン類似度が
+       ``threshold`` 以上で最も近いクラスタの代表（リーダー）に併合し、なければ
+       新しいリーダーにする（リーダーどうしは比べないので、この段階では連鎖的に
+       併合されない）。比較する候補は、共有する特徴が多いリーダー
+       ``max_candidates`` 件に絞る（文書頻度の割合が ``max_df`` を超える特徴は
+       候補探索に使わない）。
+
+    スニペットは1回だけ走査し、IDと疎な特徴量だけを持つ。モデルは呼ばないので、
+    統合の前段として全件に使える。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        keyword_weight: float = 1.0,
+        max_candidates: int = 20,
+        max_df: float = 0.2,
+        max_keyword_df: float = 0.5,
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if not 0.0 < max_df <= 1.0:
+            raise ValueError("max_df must be in (0, 1]")
+        if not 0.0 < max_keyword_df <= 1.0:
+            raise ValueError("max_keyword_df must be in (0, 1]")
+        self.threshold = threshold
+        self.keyword_weight = keyword_weight
+        self.max_candidates = max_candidates
+        self.max_df = max_df
+        self.max_keyword_df = max_keyword_df
+
+    def _features(self, snippet: Dict[str, Any]) -> Counter:
+        features: Counter = Counter(char_ngrams(snippet.get("text") or ""))
+        for keyword in snippet.get("project_keywords") or []:
+            for gram in char_ngrams(keyword):
+                features[gram] += self.keyword_weight
+        return features
+
+    def cluster(self, snippets: Iterable[Dict[str, Any]]) -> List[SnippetCluster]:
+        """スニペット（``id`` を持つもの）をクラスタに分ける.
+
+        クラスタは大きい順、同じ大きさなら最初の出現順に並べ、各クラスタの
+        ``snippet_ids`` は入力順にする。
+        """
+        ids: List[int] = []
+        keywords: List[List[str]] = []
+        features: List[Counter] = []
+        document_frequency: Counter = Counter()
+        keyword_frequency: Counter = Counter()
+        for snippet in snippets:
+            ids.append(snippet["id"])
+            snippet_keywords = list(
+                dict.fromkeys(snippet.get("project_keywords") or [])
+            )
+            keywords.append(snippet_keywords)
+            counts = self._features(snippet)
+            features.append(counts)
+            document_frequency.update(counts.keys())
+            keyword_frequency.update({normalize(k) for k in snippet_keywords})
+        total = len(ids)
+        if not total:
+            return []
+        groups = UnionFind(range(total))
+        # 候補探索・併合の効率と精度のための上限なので、小さな集合では絞り込まない
+        max_df = max(int(self.max_df * total), 10)
+        max_keyword_df = max(int(self.max_keyword_df * total), 10)
+
+        # 1. キーワードの完全一致（どこにでも付くキーワードは使わない）
+        first_with_keyword: Dict[str, int] = {}
+        for index, snippet_keywords in enumerate(keywords):
+            for keyword in snippet_keywords:
+                key = normalize(keyword)
+                if not key or keyword_frequency[key] > max_keyword_df:
+                    continue
+                if key in first_with_keyword:
+                    groups.union(first_with_keyword[key], index)
+                else:
+                    first_with_keyword[key] = index
+        common = sum(1 for df in keyword_frequency.values() if df > max_keyword_df)
+        if common:
+            logger.debug(f"出現が多すぎるため併合に使わないキーワード: {common}件")
+
+        # 2. TF-IDF重心の類似度で併合
+        idf = {
+            f: math.log((total + 1) / (df + 1)) + 1.0
+            for f, df in document_frequency.items()
+        }
+        centroids: Dict[int, Dict[str, float]] = {}
+        sizes: Counter = Counter()
+        for index, counts in enumerate(features):
+            root = groups.find(index)
+            sizes[root] += 1
+            centroid = centroids.setdefault(root, {})
+            vector = _l2_normalized(
+                {f: (1.0 + math.log(c)) * idf[f] for f, c in counts.items()}
+            )
+            for feature, weight in vector.items():
+                centroid[feature] = centroid.get(feature, 0.0) + weight
+        # 重心ができたら個々の特徴量はいらない
+        features.clear()
+
+        # 大きいグループから順に、似た代表（リーダー）があればそこへ入れ、
+        # なければ新しいリーダーにする
+        roots = sorted(centroids, key=lambda root: (-sizes[root], root))
+        vectors = {root: _l2_normalized(centroids.pop(root)) for root in roots}
+        postings: Dict[str, List[int]] = {}
+        for root in roots:
+            vector = vectors[root]
+            indexed = [f for f in vector if document_frequency[f] <= max_df]
+            votes: Counter = Counter()
+            for feature in indexed:
+                votes.update(postings.get(feature, ()))
+            best, best_score = None, self.threshold
+            for leader, _ in votes.most_common(self.max_candidates):
+                score = cosine(vector, vectors[leader])
+                if score >= best_score:
+                    best, best_score = leader, score
+            if best is not None:
+                groups.union(best, root)
+            else:
+                for feature in indexed:
+                    postings.setdefault(feature, []).append(root)
+
+        by_root: Dict[int, List[int]] = {}
+        for index in range(total):
+            by_root.setdefault(groups.find(index), []).append(index)
+        ordered = sorted(
+            by_root.values(), key=lambda members: (-len(members), members[0])
+        )
+
+        clusters = []
+        for cluster_id, members in enumerate(ordered):
+            keyword_counts = Counter(
+                keyword for index in members for keyword in keywords[index]
+            )
+            clusters.append(SnippetCluster(
+                cluster_id=cluster_id,
+                snippet_ids=[ids[index] for index in members],
+                keywords=[keyword for keyword, _ in keyword_counts.most_common(5)],
+            ))
+        logger.info(
+            f"スニペットをクラスタリング: {total}件 -> {len(clusters)}クラスタ"
+            f" (最大 {len(clusters[0].snippet_ids)}件)"
+        )
+        return clusters
@@ -0,0 +1,147 @@
+"""Near-duplicate snippet detection with MinHash signatures and LSH banding."""
+
+import hashlib
+import struct
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from pm_pedia_langextract.poc.matching import normalize
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    """正規化した文字列の ``k`` 文字シングル（空白・記号は除く）.
+
+    ``k`` 文字に満たない短い文字列はそれ全体を1つのシングルとする。
+    """
+    compact = "".join(
+        ch for ch in normalize(text)
+        if not ch.isspace() and unicodedata.category(ch)[0] not in "PS"
+    )
+    if len(compact) <= k:
+        return {compact} if compact else set()
+    return {compact[i:i + k] for i in range(len(compact) - k + 1)}
+
+
+class MinHasher:
+    """シングル集合のMinHash署名とLSHのバンドを計算する.
+
+    各シングルを ``shake_128`` で ``num_perm`` 個の16ビット値に展開し、
+    位置ごとの最小値を署名とする。同じシングルのハッシュは使い回す。
+    """
+
+    def __init__(
+        self, num_perm: int = NUM_PERM, bands: int = BANDS, cache_size: int = 100_000
+    ):
+        if num_perm <= 0 or bands <= 0 or num_perm % bands:
+            raise ValueError("num_perm must be a positive multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.cache_size = cache_size
+        self._format = f"<{num_perm}H"
+        self._cache: Dict[str, Signature] = {}
+
+    def _hash(self, shingle: str) -> Signature:
+        hashed = self._cache.get(shingle)
+        if hashed is None:
+            digest = hashlib.shake_128(shingle.encode("utf-8")).digest(
+                self.num_perm * 2
+            )
+            hashed = struct.unpack(self._format, digest)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[shingle] = hashed
+        return hashed
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """テキストの署名（シングルがなければNone）."""
+        grams = shingles(text)
+        if not grams:
+            return None
+        return tuple(map(min, zip(*(self._hash(g) for g in grams), strict=True)))
+
+    def band_keys(self, signature: Signature) -> List[int]:
+        """署名を ``bands`` 個に分けたバンドごとのバケット（符号付き64ビット整数）."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                struct.pack(f"<H{self.rows}H", band, *rows), digest_size=8
+            ).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    def pack(self, signature: Signature) -> bytes:
+        """署名をバイト列にする."""
+        return struct.pack(self._format, *signature)
+
+    def unpack(self, data: bytes) -> Signature:
+        """:meth:`pack` したバイト列を署名に戻す."""
+        return struct.unpack(self._format, data)
+
+
+def estimate_jaccard(a: Signature, b: Signature) -> float:
+    """2つの署名からJaccard係数を見積もる."""
+    return sum(x == y for x, y in zip(a, b, strict=True)) / len(a)
+
+
+class UnionFind:
+    """要素を併合し、各グループの最小の要素を代表にする."""
+
+    def __init__(self, items: Iterable[int] = ()):
+        self.parent: Dict[int, int] = {item: item for item in items}
+
+    def find(self, x: int) -> int:
+        """``x`` のグループの代表."""
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        """``a`` と ``b`` のグループを併合する."""
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def group_near_duplicates(
+    buckets: Iterable[Sequence[int]],
+    signatures: Mapping[int, Signature],
+    threshold: float = 0.7,
+) -> Dict[int, List[int]]:
+    """同じバケットの候補のうち、見積もりJaccardが ``threshold`` 以上のものをまとめる.
+
+    各バケットでは、先頭の要素とそれ以外を比べる（大きなバケットでも線形）。
+
+    Args:
+        buckets: 同じバンド・バケットに入った要素IDの並び
+        signatures: 要素IDごとの署名
+        threshold: 重複とみなす見積もりJaccard係数
+
+    Returns:
+        Dict[int, List[int]]: 2件以上のグループの代表（最小ID）→ 昇順のメンバー
+    """
+    groups = UnionFind()
+    for members in buckets:
+        first = members[0]
+        for other in members[1:]:
+            if groups.find(first) == groups.find(other):
+                continue
+            if estimate_jaccard(signatures[first], signatures[other]) >= threshold:
+                groups.union(first, other)
+
+    result: Dict[int, List[int]] = {}
+    for item in list(groups.parent):
+        result.setdefault(groups.find(item), []).append(item)
+    return {
+        root: sorted(members) for root, members in result.items() if len(members) > 1
+    }
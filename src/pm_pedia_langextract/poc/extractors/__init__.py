@@ -3,9 +3,11 @@
 from .triage import TriageExtractor
 from .snippet import SnippetExtractor
 from .integration import IntegrationExtractor
+from .fused import FusedExtractor
 
 __all__ = [
     "TriageExtractor",
     "SnippetExtractor",
     "IntegrationExtractor",
+    "FusedExtractor",
 ]
\ No newline at end of file
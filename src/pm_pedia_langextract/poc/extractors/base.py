@@ -0,0 +1,152 @@
+"""Shared base class for LangExtract-backed extractors."""
+
+from typing import Any, Dict, List, Optional
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.accounting import get_accountant
+from pm_pedia_langextract.poc.cache import ExtractionCache, make_cache_key
+from pm_pedia_langextract.poc.providers import ModelProvider, get_model_provider
+from pm_pedia_langextract.poc.ratelimit import (
+    ModelCallLimiter,
+    estimate_requests,
+    get_rate_limiter,
+)
+from pm_pedia_langextract.poc.resilience import ResilientCaller, get_resilient_caller
+from pm_pedia_langextract.poc.tracing import current_document, span
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class BaseExtractor:
+    """``lx.extract`` 呼び出しを一箇所にまとめる基底クラス.
+
+    サブクラスは ``prompt`` と ``examples`` を設定し、
+    モデル呼び出しには必ず ``_run_extract`` を使う。``limiter`` を省略すると
+    プロセス共有のリミッター（:func:`get_rate_limiter`）でレートと並列数を制御し、
+    ``resilience`` を省略するとプロセス共有の :class:`ResilientCaller` で
+    一時的な失敗を再試行する。``provider`` を省略するとプロセス共有の
+    :class:`ModelProvider`（既定はライブ、記録・再生に切り替え可能）を使う。
+    モデル呼び出し（再試行・ヘッジ込み）の時間は ``model.<クラス名>`` の
+    スパンとして記録し、文字数・トークン数は ``stage`` ごとに
+    :func:`get_accountant` に記録する。
+    """
+
+    stage = "extract"
+    prompt: str
+    examples: List[lx.data.ExampleData]
+
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-flash-lite",
+        cache: Optional[ExtractionCache] = None,
+        limiter: Optional[ModelCallLimiter] = None,
+        resilience: Optional[ResilientCaller] = None,
+        provider: Optional[ModelProvider] = None,
+    ):
+        self.model_id = model_id
+        self.cache = cache
+        self.limiter = limiter
+        self.resilience = resilience
+        self.provider = provider
+
+    def _run_extract(
+        self,
+        text: str,
+        extraction_passes: int = 1,
+        max_workers: int = 1,
+        max_char_buffer: Optional[int] = None,
+        prompt: Optional[str] = None,
+        examples: Optional[List[lx.data.ExampleData]] = None,
+        stage: Optional[str] = None,
+    ) -> lx.data.AnnotatedDocument:
+        """キャッシュを考慮して ``lx.extract`` を実行する.
+
+        Args:
+            text: 抽出対象テキスト
+            extraction_passes: 抽出パス数
+            max_workers: LangExtract内部の並列数の希望値（リミッターの上限で抑える。
+                結果に影響しないためキーに含めない）
+            max_char_buffer: チャンクサイズ（Noneの場合はLangExtractの既定値）
+            prompt: 既定の ``self.prompt`` の代わりに使うプロンプト
+            examples: 既定の ``self.examples`` の代わりに使うFew-shotサンプル
+            stage: 使用量を集計するステージ名（省略時は ``self.stage``）
+
+        Returns:
+            AnnotatedDocument: 抽出結果
+        """
+        prompt = prompt if prompt is not None else self.prompt
+        examples = examples if examples is not None else self.examples
+        provider = self.provider or get_model_provider()
+        params: Dict[str, Any] = {
+            "extraction_passes": extraction_passes,
+            "max_char_buffer": max_char_buffer,
+        }
+        if provider.cache_tag is not None:
+            params["provider"] = provider.cache_tag
+
+        requests = estimate_requests(len(text), max_char_buffer, extraction_passes)
+
+        def account(result: lx.data.AnnotatedDocument, cached: bool) -> None:
+            get_accountant().record(
+                stage or self.stage,
+                self.model_id,
+                text,
+                prompt,
+                examples,
+                result,
+                chunks=requests // extraction_passes,
+                passes=extraction_passes,
+                document=current_document(),
+                cached=cached,
+            )
+
+        # 記録中のプロバイダーはすべての呼び出しを実モデルに送る
+        cache = self.cache if provider.use_cache else None
+        key = None
+        if cache is not None:
+            key = make_cache_key(text, prompt, examples, self.model_id, params)
+            cached = cache.get(key)
+            if cached is not None:
+                account(cached, cached=True)
+                return cached
+
+        kwargs: Dict[str, Any] = {
+            "text_or_documents": text,
+            "prompt_description": prompt,
+            "examples": examples,
+            "model_id": self.model_id,
+            "extraction_passes": extraction_passes,
+        }
+        if max_char_buffer is not None:
+            kwargs["max_char_buffer"] = max_char_buffer
+
+        limiter = self.limiter or get_rate_limiter()
+
+        def call() -> lx.data.AnnotatedDocument:
+            with limiter.request(
+                len(text) * extraction_passes,
+                requests=requests,
+                max_workers=min(max_workers, requests),
+                kind=(type(self).__name__, self.model_id),
+            ) as granted_workers:
+                call_kwargs = {**kwargs, "max_workers": granted_workers}
+                model = provider.create_model(self.model_id, examples, granted_workers)
+                if model is not None:
+                    # スキーマはプロバイダーがモデル作成時に設定済み
+                    call_kwargs.update(model=model, use_schema_constraints=False)
+                return lx.extract(**call_kwargs)
+
+        # レイテンシは呼び出しの種類（抽出器・パス数・チャンクサイズ）ごとに集計する
+        resilience = self.resilience or get_resilient_caller()
+        with span(f"model.{type(self).__name__}"):
+            result = resilience.call(
+                call, key=(type(self).__name__, extraction_passes, max_char_buffer)
+            )
+
+        account(result, cached=False)
+        if cache is not None and key is not None:
+            cache.put(key, result)
+
+        return result
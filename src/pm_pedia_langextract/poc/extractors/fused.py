@@ -0,0 +1,132 @@
+"""Fused triage-plus-snippet extractor for known high-relevance documents."""
+
+import textwrap
+from pathlib import Path
+from typing import Optional, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.cache import ExtractionCache
+from pm_pedia_langextract.poc.extractors.base import BaseExtractor
+from pm_pedia_langextract.poc.extractors.snippet import (
+    MAX_CHAR_BUFFER,
+    SnippetExtractor,
+)
+from pm_pedia_langextract.poc.extractors.triage import parse_relevance_score
+from pm_pedia_langextract.poc.few_shot_examples import get_fused_examples
+from pm_pedia_langextract.poc.tracing import span
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TRIAGE_CLASSES = ("document_type", "relevance_score", "summary")
+
+
+class FusedExtractor(BaseExtractor):
+    """トリアージとスニペット抽出を1回の ``lx.extract`` で行う.
+
+    関連度が高いと分かっている文書（特定フォルダの週次レビューなど）向けに、
+    トリアージの往復を省く。
+    """
+
+    stage = "fused"
+
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-flash-lite",
+        cache: Optional[ExtractionCache] = None,
+    ):
+        super().__init__(model_id, cache)
+        self.prompt = textwrap.dedent("""
+            PMのドキュメントを分析し、文書全体の判定と重要な情報の抽出を同時に行ってください。
+
+            文書全体の判定（それぞれ1回だけ抽出）:
+            - document_type: 週次レビュー / 技術仕様書 / 議事録 / 日報 / 個人的なメモ / その他
+            - relevance_score: PM業務への関連度（0.0-1.0）
+            - summary: 内容を1-2文で簡潔に要約
+
+            情報スニペット（該当するものをすべて抽出）:
+            - 課題: 問題や懸念事項、解決が必要な事項
+            - 決定事項: 決定された内容、合意事項
+            - リスク: 潜在的なリスク、懸念される問題
+            - 進捗報告: 完了したタスクや成果、達成事項
+            - 気づき・インサイト: 学びや発見、新しい洞察
+            - ネクストアクション: 今後の予定やTODO、計画
+
+            スニペットの抽出ルール:
+            1. 元のテキストから正確に引用し、パラフレーズしない
+            2. 各抽出には以下の属性を付与:
+               - project_keywords: 関連するプロジェクト名やキーワード
+               - people: 言及された人物名（「さん」「氏」等の敬称込み）
+            3. 文脈から明確に読み取れる情報のみ抽出
+        """)
+        self.examples = get_fused_examples()
+
+    def extract(
+        self, document_path: Path
+    ) -> Tuple[lx.data.AnnotatedDocument, float, lx.data.AnnotatedDocument]:
+        """ドキュメントをトリアージしつつスニペットを抽出する.
+
+        チャンクごとに判定要素が返る場合があるため、各要素は先頭の
+        チャンク（タイトルを含む）のものを採用する。
+
+        Args:
+            document_path: 抽出対象のドキュメントパス
+
+        Returns:
+            Tuple[triage_result, relevance_score, snippet_result]:
+            トリアージ結果、関連度スコア、スニペット抽出結果
+        """
+        logger.info(f"融合抽出開始: {document_path.name}")
+
+        try:
+            with span("fused.read"), document_path.open("r", encoding="utf-8") as f:
+                text = f.read()
+
+            result = self._run_extract(
+                text,
+                extraction_passes=2,
+                max_workers=5,
+                max_char_buffer=MAX_CHAR_BUFFER
+            )
+            triage_result, snippet_result = split_fused_result(result)
+            relevance_score = parse_relevance_score(triage_result)
+
+            logger.info(
+                f"融合抽出完了: {document_path.name}, スコア: {relevance_score}, "
+                f"{len(snippet_result.extractions)}件"
+            )
+            SnippetExtractor._log_summary(snippet_result)
+
+            return triage_result, relevance_score, snippet_result
+
+        except Exception:
+            logger.error(f"融合抽出でエラー: {document_path.name}", exc_info=True)
+            raise
+
+
+def split_fused_result(
+    result: lx.data.AnnotatedDocument,
+) -> Tuple[lx.data.AnnotatedDocument, lx.data.AnnotatedDocument]:
+    """融合抽出の結果をトリアージ結果とスニペット抽出結果に分ける.
+
+    判定要素はクラスごとに最初の1件だけ残す。
+    """
+    triage = []
+    seen = set()
+    snippets = []
+    for extraction in result.extractions or []:
+        if extraction.extraction_class in TRIAGE_CLASSES:
+            if extraction.extraction_class not in seen:
+                seen.add(extraction.extraction_class)
+                triage.append(extraction)
+        else:
+            snippets.append(extraction)
+
+    for index, extraction in enumerate(snippets, 1):
+        extraction.extraction_index = index
+
+    return (
+        lx.data.AnnotatedDocument(extractions=triage, text=result.text),
+        lx.data.AnnotatedDocument(extractions=snippets, text=result.text),
+    )
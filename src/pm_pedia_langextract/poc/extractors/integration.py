@@ -1,23 +1,93 @@
 """Integration extractor for project unification."""
 
 import langextract as lx
-from pathlib import Path
 import textwrap
-import json
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Sequence, Set, Tuple
 from datetime import datetime
 
+from pm_pedia_langextract.poc.accounting import get_accountant
+from pm_pedia_langextract.poc.aliases import AliasIndex
+from pm_pedia_langextract.poc.cache import ExtractionCache
+from pm_pedia_langextract.poc.clustering import SnippetClusterer
+from pm_pedia_langextract.poc.dedup import UnionFind
+from pm_pedia_langextract.poc.extractors.base import BaseExtractor
 from pm_pedia_langextract.poc.few_shot_examples import get_integration_examples
+from pm_pedia_langextract.poc.matching import PatternMatcher, normalize
+from pm_pedia_langextract.poc.store import SnippetStore
+from pm_pedia_langextract.poc.tracing import span
 from pm_pedia_langextract.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+SNIPPETS_HEADER = "抽出されたスニペット一覧:\n\n"
+PARTIAL_PROJECTS_HEADER = "部分的に統合されたプロジェクト一覧:\n\n"
+EXISTING_PROJECT_HEADER = "既存のプロジェクト:\n\n"
+NEW_SNIPPETS_HEADER = "前回以降に追加された関連スニペット:\n\n"
+KNOWN_PROJECTS_HEADER = "既知のプロジェクト候補:\n"
+MAX_RELATED_SNIPPETS = 20
 
-class IntegrationExtractor:
-    """スニペット群から統合データを生成する."""
+
+def _as_list(value: Any) -> List[str]:
+    """モデルが1件だけ文字列で返したリスト属性をリストにそろえる."""
+    if isinstance(value, str):
+        return [value]
+    return list(value or [])
+
+
+class IntegrationExtractor(BaseExtractor):
+    """スニペット群から統合データを生成する.
+
+    既定の階層モードでは、全スニペットを ``group_chars`` 文字以内のグループに
+    分けて並列に統合し（map）、得られた部分的なプロジェクト一覧を1グループに
+    収まるまで繰り返し統合する（reduce）。``hierarchical=False`` では従来どおり
+    先頭50件のスニペットだけを1回の呼び出しで統合する。``clusterer`` を渡すと、
+    map の前にスニペットをモデルを使わずにプロジェクトごとのクラスタに分け、
+    クラスタごとにグループを作る（``min_cluster_snippets`` 件未満の小さな
+    クラスタはまとめて1つの流れにする）。``dedup_threshold`` を渡すと、
+    文書をまたいで言い換え・再引用されたスニペット（MinHashの見積もりJaccardが
+    閾値以上）を出典を併記した1件にまとめてから統合・関連付けを行う。
+
+    :meth:`extract_incremental` は前回の統合結果を引き継ぎ、前回以降に同期された
+    スニペットだけを統合して、関連スニペットが増えたプロジェクトだけを要約し直す。
+
+    プロジェクトの名寄せには ``aliases``（:class:`AliasIndex`、省略時は初期値のみの
+    メモリ上の索引）を使う。スニペットのプロジェクトキーワードはその時点の索引で
+    ローカルに ``project_id`` に解決し（フェーズ1で付けた ``project_ids`` は使わない）、
+    モデルには未知の表記だけを Keywords として渡す。索引そのものはプロンプトに
+    載せず、各グループの入力の先頭にそのグループで名寄せされた既知のプロジェクト
+    だけを候補として載せる（プロンプトが索引の更新で変わらないのでキャッシュが効く）。
+    統合結果のプロジェクトは索引に登録し、索引の ``project_id`` を付ける。
+    """
+
+    stage = "integration"
     
-    def __init__(self, model_id: str = "gemini-2.5-flash-lite"):
-        self.model_id = model_id
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-flash-lite",
+        cache: Optional[ExtractionCache] = None,
+        hierarchical: bool = True,
+        group_chars: int = 8000,
+        max_workers: int = 4,
+        clusterer: Optional[SnippetClusterer] = None,
+        min_cluster_snippets: int = 5,
+        dedup_threshold: Optional[float] = None,
+        aliases: Optional[AliasIndex] = None,
+    ):
+        if group_chars <= 0:
+            raise ValueError("group_chars must be positive")
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        if dedup_threshold is not None and not 0.0 < dedup_threshold <= 1.0:
+            raise ValueError("dedup_threshold must be in (0, 1]")
+        super().__init__(model_id, cache)
+        self.hierarchical = hierarchical
+        self.group_chars = group_chars
+        self.max_workers = max_workers
+        self.clusterer = clusterer
+        self.min_cluster_snippets = min_cluster_snippets
+        self.dedup_threshold = dedup_threshold
+        self.aliases = aliases if aliases is not None else AliasIndex(path=None)
         self.prompt = textwrap.dedent("""
             複数のドキュメントから抽出されたスニペット群を分析し、
             プロジェクト単位で情報を統合・構造化してください。
@@ -29,8 +99,9 @@ class IntegrationExtractor:
             4. 包括的なサマリーを生成
             
             抽出ルール:
-            - 「スマートタグ」「スマートタグ機能」「タグクラスタリング」は同一プロジェクト
-            - 「マルチデータソース」「マルチデータソース対応」は同一プロジェクト
+            - 入力の「既知のプロジェクト候補」に当たるものは、その正式名をproject_nameに使う
+            - スニペットの Projects は名寄せ済みの既知のプロジェクト、Keywords は
+              まだ名寄せされていない表記
             - 各プロジェクトに一意のproject_id (proj_001, proj_002...)を付与
             - ステータスは「順調」「停滞」「要確認」「完了」「不明」から選択
             
@@ -45,95 +116,426 @@ class IntegrationExtractor:
             
             重要: 必ずproject単位で情報を統合し、複数のprojectを抽出してください。
         """)
+        self.reduce_prompt = self.prompt + textwrap.dedent("""
+            入力は、スニペットをグループごとに統合した部分的なプロジェクト一覧です。
+            グループをまたいで同一プロジェクトを名寄せして1つにまとめ、別名・テーマ・
+            人物は和集合に、ステータスと要約は全体を踏まえて更新してください。
+        """)
+        self.update_prompt = self.prompt + textwrap.dedent("""
+            入力は、既存のプロジェクト1件と、前回以降に追加されたスニペットおよび
+            それらを統合した部分的なプロジェクトです。既存のプロジェクトに新しい情報を
+            反映し、1件のプロジェクトとして出力してください。プロジェクト名は変えず、
+            別名・テーマ・人物は和集合に、ステータスと要約は新しい情報を踏まえて更新してください。
+        """)
         self.examples = get_integration_examples()
     
-    def load_snippets(self, snippet_files: List[Path]) -> str:
-        """複数のスニペットファイルを読み込んで統合."""
-        logger.info(f"スニペットファイル読み込み開始: {len(snippet_files)}件")
-        
-        all_snippets = []
-        
-        for file_path in snippet_files:
-            logger.debug(f"読み込み中: {file_path}")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        try:
-                            data = json.loads(line)
-                            doc_name = file_path.stem.replace('_snippets', '')
-                            
-                            for extraction in data.get('extractions', []):
-                                snippet_info = {
-                                    'document': doc_name,
-                                    'type': extraction.get('extraction_class'),
-                                    'content': extraction.get('extraction_text'),
-                                    'attributes': extraction.get('attributes', {})
-                                }
-                                all_snippets.append(snippet_info)
-                                
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"JSON解析エラー {file_path}:{line_num}: {e}")
-                            continue
-                            
-            except Exception as e:
-                logger.error(f"ファイル読み込みエラー {file_path}: {e}")
-                continue
+    def _resolved_ids(self, snippet: Dict[str, Any]) -> List[str]:
+        """スニペットのプロジェクトキーワードを現在の別名索引で名寄せしたID（出現順）."""
+        resolved = (
+            self.aliases.resolve(keyword) for keyword in snippet["project_keywords"]
+        )
+        return list(dict.fromkeys(i for i in resolved if i is not None))
+    
+    def _known_projects_section(self, project_ids: Iterable[str]) -> str:
+        """入力の先頭に載せる既知のプロジェクト候補（なければ空文字列）."""
+        lines = [self.aliases.describe(i) + "\n" for i in project_ids]
+        return KNOWN_PROJECTS_HEADER + "".join(lines) + "\n" if lines else ""
+    
+    def _format_snippet(self, snippet: Dict[str, Any]) -> str:
+        """スニペット1件をプロンプト用のテキストにする."""
+        parts = [f"- {snippet['category']}: \"{snippet['text']}\"\n"]
+        
+        # 既知のプロジェクトに名寄せできたものと、できなかったキーワードを分けて表示
+        project_ids = self._resolved_ids(snippet)
+        project_keywords = self.aliases.unknown(snippet['project_keywords'])
+        if project_ids:
+            names = (f"{self.aliases.name(i)} ({i})" for i in project_ids)
+            parts.append(f"  Projects: {', '.join(names)}\n")
+        if project_keywords:
+            parts.append(f"  Keywords: {', '.join(project_keywords)}\n")
+        
+        # 関係者を表示
+        people = snippet['attributes'].get('people', [])
+        if people:
+            parts.append(f"  People: {', '.join(people)}\n")
         
-        logger.info(f"総スニペット数: {len(all_snippets)}件")
+        # 複数の文書で言及されたスニペットは出典を表示
+        sources = snippet.get('sources', [])
+        if len(sources) > 1:
+            parts.append(f"  Sources: {', '.join(sources)}\n")
+        return "".join(parts)
+    
+    @staticmethod
+    def _format_unified_project(project: Dict[str, Any]) -> str:
+        """統合済みのプロジェクト1件を更新用のテキストにする."""
+        parts = [f"- project: \"{project['project_name']}\"\n"]
+        for name, key in (
+            ("aliases", "aliases"), ("status", "status"), ("summary", "summary"),
+            ("key_themes", "key_themes"), ("people", "mentioned_people"),
+        ):
+            value = project.get(key)
+            if isinstance(value, list):
+                value = ", ".join(str(v) for v in value)
+            if value:
+                parts.append(f"  {name}: {value}\n")
+        return "".join(parts)
+    
+    @staticmethod
+    def _format_project(extraction: lx.data.Extraction) -> str:
+        """部分統合の結果のプロジェクト1件をreduce用のテキストにする."""
+        attrs = extraction.attributes or {}
+        parts = [f"- project: \"{extraction.extraction_text}\"\n"]
+        for name in ("aliases", "status", "summary", "key_themes", "people"):
+            value = attrs.get(name)
+            if isinstance(value, list):
+                value = ", ".join(str(v) for v in value)
+            if value:
+                parts.append(f"  {name}: {value}\n")
+        return "".join(parts)
+    
+    def load_snippets(self, store: SnippetStore) -> str:
+        """スニペットストアから先頭50件のスニペットを読み込んで統合（1回呼び出し用）."""
+        total_snippets = store.snippet_count()
+        logger.info(f"スニペット読み込み開始: {store.document_count()}文書")
+        logger.info(f"総スニペット数: {total_snippets}件")
         
         # テキスト形式に変換
-        text_output = "抽出されたスニペット一覧:\n\n"
+        parts = [SNIPPETS_HEADER]
         current_doc = None
         snippet_count = 0
+        project_ids: Dict[str, None] = {}
         
-        for snippet in all_snippets:
+        for snippet in store.snippets(limit=50):
             if snippet['document'] != current_doc:
                 current_doc = snippet['document']
-                text_output += f"\n[Document: {current_doc}]\n"
-            
-            text_output += f"- {snippet['type']}: \"{snippet['content']}\"\n"
+                parts.append(f"\n[Document: {current_doc}]\n")
             
-            # プロジェクトキーワードを表示
-            project_keywords = snippet['attributes'].get('project_keywords', [])
-            if project_keywords:
-                text_output += f"  Keywords: {', '.join(project_keywords)}\n"
-            
-            # 関係者を表示
-            people = snippet['attributes'].get('people', [])
-            if people:
-                text_output += f"  People: {', '.join(people)}\n"
-                
+            parts.append(self._format_snippet(snippet))
+            project_ids.update(dict.fromkeys(self._resolved_ids(snippet)))
             snippet_count += 1
             
             # 長すぎる場合は制限
             if snippet_count >= 50:
-                text_output += f"\n... (残り{len(all_snippets) - snippet_count}件は省略) ...\n"
+                parts.append(
+                    f"\n... (残り{total_snippets - snippet_count}件は省略) ...\n"
+                )
                 break
         
+        text_output = self._known_projects_section(project_ids) + "".join(parts)
         logger.debug(f"統合テキスト長: {len(text_output)}文字")
         return text_output
     
-    def extract(self, snippet_files: List[Path]) -> Dict[str, Any]:
-        """スニペットファイルから統合データを生成."""
-        logger.info("=== Phase 2: 統合・構造化処理開始 ===")
+    def _partition(
+        self, blocks: Iterable[Tuple[Optional[str], str, Sequence[str]]], header: str
+    ) -> Iterator[str]:
+        """ブロックを ``group_chars`` 文字以内のグループに分けてつなぐ.
+
+        ブロックは (文書名, テキスト, 既知のプロジェクトID) の組。
+        文書名が変わるときと各グループの先頭で ``[Document: ...]`` の見出しを入れる。
+        グループ内のブロックで名寄せされた既知のプロジェクトは、グループの先頭に
+        候補として載せる（その分も文字数に数える）。1件で上限を超えるブロックは
+        それだけで1グループにする。
+        """
+        parts: List[str] = []
+        size = 0
+        current_doc: Optional[str] = None
+        candidates: Dict[str, str] = {}
         
-        # スニペットを統合テキストに変換
-        logger.info("ステップ1: スニペット統合テキスト生成")
-        integrated_text = self.load_snippets(snippet_files)
+        def added_candidates(project_ids: Sequence[str]) -> Dict[str, str]:
+            return {
+                i: self.aliases.describe(i) + "\n"
+                for i in project_ids
+                if i not in candidates
+            }
         
-        # LangExtractで統合処理
-        logger.info("ステップ2: LLMによる統合処理実行")
-        try:
-            result = lx.extract(
-                text_or_documents=integrated_text,
-                prompt_description=self.prompt,
-                examples=self.examples,
-                model_id=self.model_id,
+        def candidates_size(added: Dict[str, str]) -> int:
+            if not added:
+                return 0
+            overhead = 0 if candidates else len(KNOWN_PROJECTS_HEADER) + 1
+            return overhead + sum(len(line) for line in added.values())
+        
+        for document, block, project_ids in blocks:
+            heading = f"\n[Document: {document}]\n" if document is not None else ""
+            added = added_candidates(project_ids)
+            if parts and (
+                size + len(heading) + len(block) + candidates_size(added)
+                > self.group_chars
+            ):
+                yield self._known_projects_section(candidates) + "".join(parts)
+                parts, size, current_doc, candidates = [], 0, None, {}
+                added = added_candidates(project_ids)
+            if not parts:
+                parts.append(header)
+                size = len(header)
+            if document is not None and document != current_doc:
+                current_doc = document
+                parts.append(heading)
+                size += len(heading)
+            size += candidates_size(added)
+            candidates.update(added)
+            parts.append(block)
+            size += len(block)
+        if parts:
+            yield self._known_projects_section(candidates) + "".join(parts)
+    
+    def _snippets(
+        self, store: SnippetStore, since: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """統合に使うスニペット（``dedup_threshold`` があればほぼ重複をまとめたもの）.
+
+        ``since`` を渡すと、その世代より後に同期された文書のスニペットだけを返す。
+        """
+        if self.dedup_threshold is None:
+            return store.iter_snippets(since=since)
+        return store.canonical_snippets(self.dedup_threshold, since=since)
+    
+    def _snippet_blocks(
+        self, snippets: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[Optional[str], str, Sequence[str]]]:
+        for snippet in snippets:
+            yield (
+                snippet["document"],
+                self._format_snippet(snippet),
+                self._resolved_ids(snippet),
+            )
+
+    def _project_blocks(
+        self, projects: Iterable[lx.data.Extraction]
+    ) -> Iterator[Tuple[Optional[str], str, Sequence[str]]]:
+        for project in projects:
+            aliases = _as_list((project.attributes or {}).get("aliases"))
+            project_id = self.aliases.resolve_any([project.extraction_text, *aliases])
+            yield (
+                None,
+                self._format_project(project),
+                [project_id] if project_id else [],
+            )
+
+    def _partition_snippets(
+        self, store: SnippetStore, since: Optional[int] = None
+    ) -> Iterator[str]:
+        """スニペットを統合用のグループに分ける（``clusterer`` があればクラスタ別）."""
+        if self.clusterer is None:
+            yield from self._partition(
+                self._snippet_blocks(self._snippets(store, since)), SNIPPETS_HEADER
+            )
+            return
+
+        # クラスタリングはIDと特徴量だけを持ち、本文はグループを作るときに
+        # ストアから読む。
+        # ほぼ重複をまとめたスニペットの出典だけは覚えておく
+        merged_sources: Dict[int, Dict[str, Any]] = {}
+
+        def remember_sources(
+            snippets: Iterable[Dict[str, Any]],
+        ) -> Iterator[Dict[str, Any]]:
+            for snippet in snippets:
+                if snippet.get('duplicates'):
+                    merged_sources[snippet["id"]] = {
+                        "sources": snippet["sources"],
+                        "duplicates": snippet["duplicates"],
+                    }
+                yield snippet
+        
+        def load(ids: List[int]) -> Iterator[Dict[str, Any]]:
+            for snippet in store.snippets_by_id(sorted(ids)):
+                snippet.update(merged_sources.get(snippet['id'], {}))
+                yield snippet
+        
+        with span("phase2.cluster"):
+            clusters = self.clusterer.cluster(
+                remember_sources(self._snippets(store, since))
+            )
+        small: List[int] = []
+        for cluster in clusters:
+            if len(cluster.snippet_ids) < self.min_cluster_snippets:
+                small.extend(cluster.snippet_ids)
+                continue
+            header = SNIPPETS_HEADER
+            if cluster.keywords:
+                header = f"関連キーワード: {', '.join(cluster.keywords)}\n" + header
+            yield from self._partition(
+                self._snippet_blocks(load(cluster.snippet_ids)), header
+            )
+        if small:
+            yield from self._partition(
+                self._snippet_blocks(load(small)), SNIPPETS_HEADER
+            )
+
+    def _integrate_each(
+        self, groups: Sequence[str], stage: str, prompt: Optional[str] = None
+    ) -> List[List[lx.data.Extraction]]:
+        """グループごとに並列で統合し、グループごとのプロジェクトの抽出結果を返す."""
+        
+        def integrate(text: str) -> lx.data.AnnotatedDocument:
+            return self._run_extract(
+                text,
                 extraction_passes=1,
-                max_workers=1
+                max_workers=1,
+                max_char_buffer=max(len(text), self.group_chars),
+                prompt=prompt,
+                stage=stage
+            )
+        
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(groups)),
+            thread_name_prefix="phase2"
+        ) as executor:
+            results = list(executor.map(integrate, groups))
+        return [
+            [
+                extraction
+                for extraction in result.extractions or []
+                if extraction.extraction_class == "project"
+            ]
+            for result in results
+        ]
+    
+    def _integrate_groups(
+        self, groups: Sequence[str], stage: str, prompt: Optional[str] = None
+    ) -> List[lx.data.Extraction]:
+        """グループごとに並列で統合し、プロジェクトの抽出結果をグループ順につなぐ."""
+        return [
+            extraction
+            for extractions in self._integrate_each(groups, stage, prompt)
+            for extraction in extractions
+        ]
+    
+    def _integrate_hierarchical(
+        self, store: SnippetStore, since: Optional[int] = None
+    ) -> Tuple[List[lx.data.Extraction], Dict[str, int]]:
+        """全スニペット（``since`` があればその世代より後のもの）をmap-reduceで統合する.
+        
+        Returns:
+            Tuple: (プロジェクトの抽出結果, ``map_groups`` と ``reduce_rounds`` の統計)
+        """
+        with span("phase2.partition"):
+            groups = list(self._partition_snippets(store, since))
+        if not groups:
+            return [], {"map_groups": 0, "reduce_rounds": 0}
+        
+        logger.info(f"map: {len(groups)}グループを並列に統合")
+        with span("phase2.map"):
+            projects = self._integrate_groups(groups, stage=f"{self.stage}.map")
+        stats = {"map_groups": len(groups), "reduce_rounds": 0}
+        
+        # 部分結果が1グループに収まるまで繰り返し統合する
+        while len(groups) > 1 and projects:
+            next_groups = list(self._partition(
+                self._project_blocks(projects), PARTIAL_PROJECTS_HEADER
+            ))
+            if len(next_groups) >= len(groups):
+                logger.warning(
+                    "reduceでグループ数が減らないため打ち切ります: "
+                    f"{len(next_groups)}グループ"
+                )
+                break
+            groups = next_groups
+            stats["reduce_rounds"] += 1
+            logger.info(
+                f"reduce {stats['reduce_rounds']}: "
+                f"{len(projects)}件を{len(groups)}グループで統合"
+            )
+            with span("phase2.reduce"):
+                projects = self._integrate_groups(
+                    groups, stage=f"{self.stage}.reduce", prompt=self.reduce_prompt
+                )
+        # reduceを打ち切った場合などにグループをまたいで残った同じプロジェクトをまとめる
+        merged = self._merge_duplicate_projects(projects)
+        stats["merged_projects"] = len(projects) - len(merged)
+        return merged, stats
+    
+    @staticmethod
+    def _merge_duplicate_projects(
+        projects: Sequence[lx.data.Extraction],
+    ) -> List[lx.data.Extraction]:
+        """正規化した名前・別名が重なるプロジェクトの抽出結果を1件にまとめる.
+        
+        最初に出てきた結果の名前・状態・要約を残し、別名・テーマ・人物は
+        重複を除いて合わせる。
+        """
+        union = UnionFind(range(len(projects)))
+        owner: Dict[str, int] = {}
+        for index, extraction in enumerate(projects):
+            if extraction.extraction_class != "project":
+                continue
+            aliases = _as_list((extraction.attributes or {}).get("aliases"))
+            for name in [extraction.extraction_text, *aliases]:
+                key = normalize(str(name))
+                if key:
+                    union.union(owner.setdefault(key, index), index)
+        
+        groups: Dict[int, List[lx.data.Extraction]] = {}
+        for index, extraction in enumerate(projects):
+            groups.setdefault(union.find(index), []).append(extraction)
+        
+        merged = []
+        for members in groups.values():
+            first = members[0]
+            if len(members) == 1:
+                merged.append(first)
+                continue
+            attrs = dict(first.attributes or {})
+            for name in ("aliases", "key_themes", "people"):
+                values: List[str] = []
+                for member in members:
+                    values.extend(_as_list((member.attributes or {}).get(name)))
+                if name == "aliases":
+                    values.extend(m.extraction_text for m in members[1:])
+                    values = [
+                        v
+                        for v in values
+                        if normalize(v) != normalize(first.extraction_text)
+                    ]
+                attrs[name] = list(dict.fromkeys(values))
+            for name in ("status", "summary"):
+                value = next(
+                    (
+                        m.attributes[name]
+                        for m in members
+                        if (m.attributes or {}).get(name)
+                    ),
+                    None,
+                )
+                if value:
+                    attrs[name] = value
+            logger.info(
+                "同じプロジェクトの結果をまとめました: "
+                f"{first.extraction_text} ({len(members)}件)"
             )
+            merged.append(lx.data.Extraction(
+                extraction_class=first.extraction_class,
+                extraction_text=first.extraction_text,
+                attributes=attrs,
+            ))
+        return merged
+    
+    def extract(self, store: SnippetStore) -> Dict[str, Any]:
+        """スニペットストア（フェーズ1の出力を同期済み）から統合データを生成."""
+        logger.info("=== Phase 2: 統合・構造化処理開始 ===")
+        
+        try:
+            if self.hierarchical:
+                # 全スニペットをグループに分けてmap-reduceで統合
+                logger.info("ステップ1-2: スニペットの階層的な統合処理実行")
+                extractions, stats = self._integrate_hierarchical(store)
+            else:
+                # スニペットを統合テキストに変換
+                logger.info("ステップ1: スニペット統合テキスト生成")
+                with span("phase2.load_snippets"):
+                    integrated_text = self.load_snippets(store)
+                
+                # LangExtractで統合処理
+                logger.info("ステップ2: LLMによる統合処理実行")
+                result = self._run_extract(
+                    integrated_text,
+                    extraction_passes=1,
+                    max_workers=1
+                )
+                extractions = result.extractions or []
+                stats = {"map_groups": 1, "reduce_rounds": 0}
             
-            logger.info(f"統合処理完了: {len(result.extractions)}件の抽出")
+            logger.info(f"統合処理完了: {len(extractions)}件の抽出")
             
         except Exception as e:
             logger.error("LLM統合処理でエラー", exc_info=True)
@@ -141,42 +543,22 @@ class IntegrationExtractor:
         
         # 結果を構造化
         logger.info("ステップ3: 結果の構造化")
-        projects = []
-        for extraction in result.extractions:
-            if extraction.extraction_class == "project":
-                attrs = extraction.attributes or {}
-                
-                # 関連スニペットを収集（簡易版）
-                related_snippets = self._collect_related_snippets(
-                    extraction.extraction_text, 
-                    attrs.get("aliases", []),
-                    snippet_files
-                )
-                
-                project = {
-                    "project_id": attrs.get("project_id", f"proj_{len(projects)+1:03d}"),
-                    "project_name": extraction.extraction_text,
-                    "aliases": attrs.get("aliases", []),
-                    "status": attrs.get("status", "不明"),
-                    "summary": attrs.get("summary", ""),
-                    "last_updated": datetime.now().isoformat(),
-                    "key_themes": attrs.get("key_themes", []),
-                    "mentioned_people": attrs.get("people", []),
-                    "information_snippets": related_snippets
-                }
-                projects.append(project)
+        projects = self._build_projects(extractions)
+        
+        # 関連スニペットを全プロジェクト分まとめて収集
+        with span("phase2.collect_snippets"):
+            related = self._collect_related_snippets(
+                [(p["project_name"], p["aliases"]) for p in projects],
+                store
+            )
+        for project, related_snippets in zip(projects, related, strict=True):
+            project["information_snippets"] = related_snippets
         
         logger.info(f"統合完了: {len(projects)}個のプロジェクトを生成")
         
         result_data = {
             "unified_projects": projects,
-            "extraction_metadata": {
-                "processed_files": len(snippet_files),
-                "timestamp": datetime.now().isoformat(),
-                "model_used": self.model_id,
-                "total_snippets": len([p["information_snippets"] for p in projects]),
-                "projects_count": len(projects)
-            }
+            "extraction_metadata": self._metadata(store, projects, stats),
         }
         
         # プロジェクト概要をログ出力
@@ -188,60 +570,284 @@ class IntegrationExtractor:
         
         return result_data
     
-    def _collect_related_snippets(self, project_name: str, aliases: List[str], 
-                                 snippet_files: List[Path]) -> List[Dict[str, Any]]:
-        """プロジェクトに関連するスニペットを収集（簡易版）."""
-        related_snippets = []
-        keywords = [project_name.lower()] + [alias.lower() for alias in aliases]
+    def _build_projects(
+        self, extractions: Iterable[lx.data.Extraction]
+    ) -> List[Dict[str, Any]]:
+        """プロジェクトの抽出結果を出力形式にする.
         
-        # 主要キーワード（手動で定義）
-        keyword_mapping = {
-            "スマートタグ": ["スマートタグ", "smarttag", "smart tag", "タグ", "クラスタリング", "ハルシネーション"],
-            "マルチデータソース": ["マルチデータソース", "multi data source", "データソース", "csv", "取り込み"]
+        ``project_id`` はモデルの付けたものではなく、名前・別名を別名索引に
+        登録して得た安定したIDにする。
+        """
+        projects = []
+        for extraction in extractions:
+            if extraction.extraction_class != "project":
+                continue
+            attrs = extraction.attributes or {}
+            aliases = _as_list(attrs.get("aliases"))
+            project_id = self.aliases.register(extraction.extraction_text, aliases)
+            if any(p["project_id"] == project_id for p in projects):
+                logger.warning(
+                    f"同じプロジェクト {project_id} に名寄せされる結果が複数あります:"
+                    f" {extraction.extraction_text}"
+                )
+            projects.append({
+                "project_id": project_id,
+                "project_name": extraction.extraction_text,
+                "aliases": aliases,
+                "status": attrs.get("status", "不明"),
+                "summary": attrs.get("summary", ""),
+                "last_updated": datetime.now().isoformat(),
+                "key_themes": _as_list(attrs.get("key_themes")),
+                "mentioned_people": _as_list(attrs.get("people")),
+                "information_snippets": []
+            })
+        return projects
+    
+    def _metadata(
+        self, store: SnippetStore, projects: List[Dict[str, Any]], stats: Dict[str, int]
+    ) -> Dict[str, Any]:
+        return {
+            "processed_documents": store.document_count(),
+            "timestamp": datetime.now().isoformat(),
+            "model_used": self.model_id,
+            "total_snippets": len([p["information_snippets"] for p in projects]),
+            "projects_count": len(projects),
+            "store_generation": store.generation(),
+            **stats,
+            "usage": get_accountant().summary(
+                stages=[
+                    self.stage, f"{self.stage}.map", f"{self.stage}.reduce",
+                    f"{self.stage}.update",
+                ]
+            )
         }
+    
+    def extract_incremental(
+        self, store: SnippetStore, previous: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """前回の統合結果に、前回以降に同期されたスニペットを取り込む.
         
-        for project_key, project_keywords in keyword_mapping.items():
-            if any(keyword in project_name.lower() for keyword in [project_key.lower()]):
-                keywords.extend([k.lower() for k in project_keywords])
-        
-        # ファイルからマッチするスニペットを収集
-        for file_path in snippet_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            data = json.loads(line)
-                            for extraction in data.get('extractions', []):
-                                content = extraction.get('extraction_text', '').lower()
-                                proj_keywords = extraction.get('attributes', {}).get('project_keywords', [])
-                                proj_keywords_lower = [k.lower() for k in proj_keywords]
-                                
-                                # キーワードマッチング
-                                if (any(keyword in content for keyword in keywords) or
-                                    any(keyword in proj_keywords_lower for keyword in keywords)):
-                                    
-                                    snippet = {
-                                        "content": extraction.get('extraction_text'),
-                                        "source_url": file_path.name,
-                                        "timestamp": datetime.now().isoformat(),
-                                        "type": extraction.get('extraction_class')
-                                    }
-                                    related_snippets.append(snippet)
-                                    
-                        except (json.JSONDecodeError, KeyError):
-                            continue
-                            
-            except Exception as e:
-                logger.warning(f"スニペット収集でエラー {file_path}: {e}")
-                continue
+        1. 前回の ``store_generation`` より後の世代のスニペットだけをmap-reduceで
+           統合し、名前・別名が既存のプロジェクトと一致するものはその更新分、
+           一致しないものは新しいプロジェクトとする。
+        2. 新しいスニペットだけを走査して、各プロジェクトに関連スニペットを追加する。
+        3. 更新分か関連スニペットが増えた既存のプロジェクトだけを、1件ずつ
+           モデルで要約し直す。それ以外のプロジェクトは ``last_updated`` を含め
+           そのまま残す。
+        
+        前回の結果に世代がない場合や、ストアが作り直されて世代が戻っている
+        場合は :meth:`extract` で全件を統合する。
         
-        # 重複除去と制限
-        unique_snippets = []
-        seen_content = set()
-        for snippet in related_snippets[:20]:  # 最大20件
-            if snippet["content"] not in seen_content:
-                unique_snippets.append(snippet)
-                seen_content.add(snippet["content"])
+        Args:
+            store: スニペットストア（フェーズ1の出力を同期済み）
+            previous: 前回の :meth:`extract` / :meth:`extract_incremental` の結果
+        """
+        since = previous.get("extraction_metadata", {}).get("store_generation")
+        generation = store.generation()
+        if since is None or since > generation or not self.hierarchical:
+            logger.warning("前回の統合結果を引き継げないため、全件で統合します")
+            return self.extract(store)
         
-        logger.debug(f"関連スニペット収集: {len(unique_snippets)}件 (キーワード: {', '.join(keywords[:5])})")
-        return unique_snippets
\ No newline at end of file
+        logger.info(f"=== Phase 2: 差分統合開始（世代 {since} -> {generation}） ===")
+        projects = [dict(p) for p in previous.get("unified_projects", [])]
+        stats = {
+            "map_groups": 0,
+            "reduce_rounds": 0,
+            "updated_projects": 0,
+            "new_projects": 0,
+        }
+        if since == generation:
+            logger.info("前回以降に同期されたスニペットはありません")
+            return {
+                "unified_projects": projects,
+                "extraction_metadata": self._metadata(store, projects, stats),
+            }
+        
+        # 1. 新しいスニペットだけをmap-reduceで統合し、既存のプロジェクトに振り分ける
+        partials, map_stats = self._integrate_hierarchical(store, since)
+        stats.update(map_stats)
+        position: Dict[str, int] = {}
+        for index, project in enumerate(projects):
+            position.setdefault(project["project_id"], index)
+            self.aliases.register(
+                project["project_name"],
+                project["aliases"],
+                project_id=project["project_id"],
+            )
+        updates: Dict[int, List[lx.data.Extraction]] = {}
+        new_partials = []
+        for extraction in partials:
+            aliases = _as_list((extraction.attributes or {}).get("aliases"))
+            names = [extraction.extraction_text, *aliases]
+            project_id = self.aliases.resolve_any(names)
+            if project_id in position:
+                updates.setdefault(position[project_id], []).append(extraction)
+            else:
+                new_partials.append(extraction)
+        new_projects = self._build_projects(new_partials)
+        
+        # 2. 新しいスニペットだけを走査して関連スニペットを集める
+        with span("phase2.collect_snippets"):
+            related = self._collect_related_snippets(
+                [(p["project_name"], p["aliases"]) for p in projects + new_projects],
+                store,
+                since=since,
+            )
+        new_related = related[len(projects):]
+        for project, related_snippets in zip(new_projects, new_related, strict=True):
+            project["information_snippets"] = related_snippets
+        
+        # 3. 変化した既存のプロジェクトだけを要約し直す
+        targets = sorted(
+            set(updates) | {i for i in range(len(projects)) if related[i]}
+        )
+        texts = [
+            self._update_text(projects[i], updates.get(i, []), related[i])
+            for i in targets
+        ]
+        if texts:
+            logger.info(f"update: {len(texts)}件のプロジェクトを要約し直します")
+            with span("phase2.update"):
+                results = self._integrate_each(
+                    texts, stage=f"{self.stage}.update", prompt=self.update_prompt
+                )
+            for index, extractions in zip(targets, results, strict=True):
+                project = self._apply_update(
+                    projects[index],
+                    extractions[0] if extractions else None,
+                    related[index],
+                )
+                self.aliases.register(
+                    project["project_name"],
+                    project["aliases"],
+                    project_id=project["project_id"],
+                )
+                projects[index] = project
+        stats["updated_projects"] = len(targets)
+        stats["new_projects"] = len(new_projects)
+        projects.extend(new_projects)
+        
+        logger.info(
+            f"差分統合完了: 更新 {len(targets)}件, 新規 {len(new_projects)}件,"
+            f" 変更なし {len(projects) - len(targets) - len(new_projects)}件"
+        )
+        return {
+            "unified_projects": projects,
+            "extraction_metadata": self._metadata(store, projects, stats),
+        }
+    
+    def _update_text(
+        self,
+        project: Dict[str, Any],
+        partials: Sequence[lx.data.Extraction],
+        snippets: Sequence[Dict[str, Any]],
+    ) -> str:
+        """既存のプロジェクトの要約し直しに渡すテキスト."""
+        parts = [EXISTING_PROJECT_HEADER, self._format_unified_project(project)]
+        if partials:
+            parts.append("\n" + PARTIAL_PROJECTS_HEADER)
+            parts.extend(self._format_project(extraction) for extraction in partials)
+        if snippets:
+            parts.append("\n" + NEW_SNIPPETS_HEADER)
+            parts.extend(f"- {s['type']}: \"{s['content']}\"\n" for s in snippets)
+        return "".join(parts)
+    
+    @staticmethod
+    def _apply_update(
+        project: Dict[str, Any],
+        extraction: Optional[lx.data.Extraction],
+        snippets: Sequence[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """要約し直した結果と新しい関連スニペットを既存のプロジェクトに反映する."""
+        attrs = (extraction.attributes or {}) if extraction is not None else {}
+        
+        def union(existing: List[str], new: Any) -> List[str]:
+            return list(dict.fromkeys([*existing, *_as_list(new)]))
+        
+        seen = {s["content"] for s in snippets}
+        merged = [
+            s for s in project["information_snippets"] if s["content"] not in seen
+        ]
+        merged.extend(snippets)
+        return {
+            **project,
+            "aliases": union(project["aliases"], attrs.get("aliases")),
+            "status": attrs.get("status", project["status"]),
+            "summary": attrs.get("summary", project["summary"]),
+            "last_updated": datetime.now().isoformat(),
+            "key_themes": union(project["key_themes"], attrs.get("key_themes")),
+            "mentioned_people": union(project["mentioned_people"], attrs.get("people")),
+            # 新しいものを優先して最大件数に収める
+            "information_snippets": merged[-MAX_RELATED_SNIPPETS:],
+        }
+    
+    def _project_keywords(self, project_name: str, aliases: List[str]) -> List[str]:
+        """プロジェクト名・別名と、別名索引にある同じプロジェクトの表記・キーワード."""
+        keywords = [project_name, *aliases]
+        project_id = self.aliases.resolve_any(keywords)
+        if project_id is not None:
+            keywords.extend(self.aliases.keywords(project_id))
+        return keywords
+    
+    def _collect_related_snippets(
+        self,
+        projects: Sequence[Tuple[str, List[str]]],
+        store: SnippetStore,
+        since: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """各プロジェクトに関連するスニペットを1回の走査で収集する.
+        
+        全プロジェクトのキーワードを1つのAho-Corasickオートマトンにまとめ、
+        NFKC正規化した本文に含まれるか、プロジェクトキーワードが一致するか、
+        現在の別名索引で同じ ``project_id`` に名寄せされるスニペットを、該当する
+        すべてのプロジェクトに割り当てる（フェーズ1で付けた ``project_ids`` は索引の
+        更新で古くなるので使わない）。同じ本文のスニペットは上限
+        （``MAX_RELATED_SNIPPETS`` 件）に数える前に除き、最初の1件だけを残す。
+        
+        Args:
+            projects: (プロジェクト名, 別名のリスト) のリスト
+            store: スニペットストア
+            since: この世代より後に同期されたスニペットだけを走査する
+        
+        Returns:
+            List[List[Dict[str, Any]]]: ``projects`` と同じ順の関連スニペット
+        """
+        matcher: PatternMatcher[int] = PatternMatcher()
+        by_id: Dict[str, Set[int]] = {}
+        for index, (project_name, aliases) in enumerate(projects):
+            matcher.add_all(self._project_keywords(project_name, aliases), index)
+            project_id = self.aliases.resolve_any([project_name, *aliases])
+            if project_id is not None:
+                by_id.setdefault(project_id, set()).add(index)
+        
+        related: List[List[Dict[str, Any]]] = [[] for _ in projects]
+        seen_content: List[set] = [set() for _ in projects]
+        open_projects = set(range(len(projects)))
+        for match in self._snippets(store, since):
+            if not open_projects:
+                break
+            labels = matcher.find(match['text'])
+            for keyword in match['project_keywords']:
+                labels |= matcher.exact(keyword)
+                labels |= by_id.get(self.aliases.resolve(keyword), set())
+            
+            for index in labels & open_projects:
+                # 重複除去
+                if match['text'] in seen_content[index]:
+                    continue
+                seen_content[index].add(match['text'])
+                related[index].append({
+                    "content": match['text'],
+                    "source_url": match['document'],
+                    "sources": match.get('sources', [match['document']]),
+                    "timestamp": datetime.now().isoformat(),
+                    "type": match['category']
+                })
+                if len(related[index]) >= MAX_RELATED_SNIPPETS:
+                    open_projects.discard(index)
+        
+        for (project_name, _), related_snippets in zip(projects, related, strict=True):
+            logger.debug(
+                f"関連スニペット収集: {project_name} {len(related_snippets)}件"
+            )
+        return related
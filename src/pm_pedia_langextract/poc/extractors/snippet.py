@@ -3,17 +3,31 @@
 import langextract as lx
 from pathlib import Path
 import textwrap
+from typing import Optional
+from pm_pedia_langextract.poc.cache import ExtractionCache
+from pm_pedia_langextract.poc.extractors.base import BaseExtractor
 from pm_pedia_langextract.poc.few_shot_examples import get_snippet_extraction_examples
+from pm_pedia_langextract.poc.incremental import merge_extractions, plan_reextraction
+from pm_pedia_langextract.poc.tracing import span
 from pm_pedia_langextract.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# 適切なチャンクサイズ
+MAX_CHAR_BUFFER = 1500
 
-class SnippetExtractor:
+
+class SnippetExtractor(BaseExtractor):
     """ドキュメントから情報スニペットを抽出する."""
+
+    stage = "snippet"
     
-    def __init__(self, model_id: str = "gemini-2.5-flash-lite"):
-        self.model_id = model_id
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-flash-lite",
+        cache: Optional[ExtractionCache] = None,
+    ):
+        super().__init__(model_id, cache)
         self.prompt = textwrap.dedent("""
             PMのドキュメントから重要な情報を以下のカテゴリで抽出してください：
             
@@ -49,33 +63,104 @@ class SnippetExtractor:
         logger.info(f"スニペット抽出開始: {document_path.name}")
         
         try:
-            with open(document_path, 'r', encoding='utf-8') as f:
+            with span("snippet.read"), document_path.open("r", encoding="utf-8") as f:
                 text = f.read()
             
             logger.debug(f"ドキュメント読み込み完了: {len(text)}文字")
             
-            result = lx.extract(
-                text_or_documents=text,
-                prompt_description=self.prompt,
-                examples=self.examples,
-                model_id=self.model_id,
-                extraction_passes=2,  # 複数パスで精度向上
-                max_workers=5,
-                max_char_buffer=1500  # 適切なチャンクサイズ
-            )
+            result = self._extract_text(text)
             
             logger.info(f"スニペット抽出完了: {document_path.name}, {len(result.extractions)}件")
+            self._log_summary(result)
             
-            # 抽出結果のサマリーを出力
-            extraction_summary = {}
-            for extraction in result.extractions:
-                category = extraction.extraction_class
-                extraction_summary[category] = extraction_summary.get(category, 0) + 1
+            return result
             
-            logger.info(f"抽出結果サマリー: {extraction_summary}")
+        except Exception:
+            logger.error(f"スニペット抽出でエラー: {document_path.name}", exc_info=True)
+            raise
+    
+    def extract_incremental(
+        self,
+        document_path: Path,
+        previous: lx.data.AnnotatedDocument,
+        max_changed_ratio: float = 0.5,
+    ) -> lx.data.AnnotatedDocument:
+        """前回の抽出結果との差分領域だけを再抽出する.
+        
+        変更のないセクションの抽出は位置を補正して再利用し、変更・追加された
+        領域のみLLMに送る。変更割合が ``max_changed_ratio`` を超える場合や
+        前回テキストがない場合は全文を再抽出する。
+        
+        Args:
+            document_path: 抽出対象のドキュメントパス
+            previous: 同じドキュメントの前回の抽出結果
+            max_changed_ratio: 差分抽出を行う変更割合の上限
+            
+        Returns:
+            AnnotatedDocument: 新しいテキスト全体に対する抽出結果
+        """
+        if not previous.text:
+            logger.info(f"前回テキストがないため全文を再抽出: {document_path.name}")
+            return self.extract(document_path)
+        
+        logger.info(f"差分スニペット抽出開始: {document_path.name}")
+        
+        try:
+            with span("snippet.read"), document_path.open("r", encoding="utf-8") as f:
+                text = f.read()
+            
+            plan = plan_reextraction(previous, text, max_chars=MAX_CHAR_BUFFER)
+            if plan.changed_ratio > max_changed_ratio:
+                logger.info(
+                    f"変更割合 {plan.changed_ratio:.0%} > {max_changed_ratio:.0%}"
+                    f" - 全文を再抽出: {document_path.name}"
+                )
+                return self.extract(document_path)
+            
+            logger.info(
+                f"差分領域: {len(plan.changed_regions)}件, "
+                f"{plan.changed_chars}/{plan.total_chars}文字, "
+                f"再利用: {len(plan.reused)}件"
+            )
+            
+            region_results = [
+                (start, self._extract_text(text[start:end]))
+                for start, end in plan.changed_regions
+            ]
+            result = lx.data.AnnotatedDocument(
+                extractions=merge_extractions(plan.reused, region_results),
+                text=text
+            )
+
+            logger.info(
+                f"差分スニペット抽出完了: {document_path.name}, "
+                f"{len(result.extractions)}件"
+            )
+            self._log_summary(result)
             
             return result
             
         except Exception as e:
-            logger.error(f"スニペット抽出でエラー: {document_path.name}", exc_info=True)
-            raise
\ No newline at end of file
+            logger.error(
+                f"差分スニペット抽出でエラー: {document_path.name}", exc_info=True
+            )
+            raise
+    
+    def _extract_text(self, text: str) -> lx.data.AnnotatedDocument:
+        """テキストからスニペットを抽出する."""
+        return self._run_extract(
+            text,
+            extraction_passes=2,  # 複数パスで精度向上
+            max_workers=5,
+            max_char_buffer=MAX_CHAR_BUFFER
+        )
+    
+    @staticmethod
+    def _log_summary(result: lx.data.AnnotatedDocument) -> None:
+        """抽出結果のサマリーを出力."""
+        extraction_summary = {}
+        for extraction in result.extractions:
+            category = extraction.extraction_class
+            extraction_summary[category] = extraction_summary.get(category, 0) + 1
+        
+        logger.info(f"抽出結果サマリー: {extraction_summary}")
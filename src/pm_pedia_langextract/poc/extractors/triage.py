@@ -1,20 +1,51 @@
 """Triage extractor for document analysis."""
 
-import langextract as lx
-from pathlib import Path
+import bisect
 import textwrap
-from typing import Tuple
-from pm_pedia_langextract.poc.few_shot_examples import get_triage_examples
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.cache import ExtractionCache
+from pm_pedia_langextract.poc.extractors.base import BaseExtractor
+from pm_pedia_langextract.poc.few_shot_examples import (
+    BATCH_DOCUMENT_HEADER,
+    get_batch_triage_examples,
+    get_triage_examples,
+)
+from pm_pedia_langextract.poc.incremental import shift_extraction
+from pm_pedia_langextract.poc.sections import build_outline
+from pm_pedia_langextract.poc.tracing import span
 from pm_pedia_langextract.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+BATCH_SEPARATOR = "\n\n"
+BATCH_PROMPT_SUFFIX = textwrap.dedent("""
+    複数モード:
+    テキストには「=== DOCUMENT n ===」で区切られた複数のドキュメントが含まれます。
+    各ドキュメントごとに上記3つの要素を抽出し、すべての抽出の属性に
+    そのドキュメントの番号を doc_id として付与してください。
+""")
+PREVIEW_PROMPT_SUFFIX = textwrap.dedent("""
+    抜粋モード:
+    テキストはドキュメントの見出し構造と各セクション冒頭だけの抜粋です。
+    省略部分（…）があっても、見出しと冒頭から全体を推測して判定してください。
+""")
 
-class TriageExtractor:
+
+class TriageExtractor(BaseExtractor):
     """ドキュメントをトリアージして分析価値を判定する."""
+
+    stage = "triage"
     
-    def __init__(self, model_id: str = "gemini-2.5-flash-lite"):
-        self.model_id = model_id
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-flash-lite",
+        cache: Optional[ExtractionCache] = None,
+    ):
+        super().__init__(model_id, cache)
         self.prompt = textwrap.dedent("""
             ドキュメントを分析し、以下の3つの要素を正確に抽出してください：
             
@@ -36,6 +67,7 @@ class TriageExtractor:
             重要：必ず3つすべての要素を抽出し、元のテキストから正確に判断してください。
         """)
         self.examples = get_triage_examples()
+        self.batch_examples = get_batch_triage_examples()
     
     def extract(self, document_path: Path) -> Tuple[lx.data.AnnotatedDocument, float]:
         """ドキュメントをトリアージして分析価値を判定する.
@@ -49,33 +81,260 @@ class TriageExtractor:
         logger.info(f"トリアージ開始: {document_path.name}")
         
         try:
-            with open(document_path, 'r', encoding='utf-8') as f:
+            with span("triage.read"), document_path.open("r", encoding="utf-8") as f:
                 text = f.read()
             
             logger.debug(f"ドキュメント読み込み完了: {len(text)}文字")
             
-            result = lx.extract(
-                text_or_documents=text,
-                prompt_description=self.prompt,
-                examples=self.examples,
-                model_id=self.model_id,
-                extraction_passes=1,
-                max_workers=1
-            )
-            
-            # 関連度スコアを抽出
-            relevance_score = 0.0
-            for extraction in result.extractions:
-                if extraction.extraction_class == "relevance_score":
-                    try:
-                        relevance_score = float(extraction.extraction_text)
-                        break
-                    except ValueError:
-                        logger.warning(f"関連度スコアの変換に失敗: {extraction.extraction_text}")
-            
-            logger.info(f"トリアージ完了: {document_path.name}, スコア: {relevance_score}")
-            return result, relevance_score
+            return self.extract_text(document_path.name, text)
             
         except Exception as e:
             logger.error(f"トリアージ処理でエラー: {document_path.name}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
+
+    def extract_text(
+        self, name: str, text: str
+    ) -> Tuple[lx.data.AnnotatedDocument, float]:
+        """読み込み済みのテキストをトリアージする.
+        
+        Args:
+            name: ログ表示用のドキュメント名
+            text: ドキュメント本文
+            
+        Returns:
+            Tuple[AnnotatedDocument, relevance_score]: 抽出結果と関連度スコア
+        """
+        result = self._run_extract(
+            text,
+            extraction_passes=1,
+            max_workers=1
+        )
+        
+        relevance_score = parse_relevance_score(result)
+        
+        logger.info(f"トリアージ完了: {name}, スコア: {relevance_score}")
+        return result, relevance_score
+    
+    def extract_preview(
+        self,
+        name: str,
+        text: str,
+        section_chars: int = 300,
+        cutoff: float = 0.7,
+        margin: float = 0.1,
+    ) -> Tuple[lx.data.AnnotatedDocument, float]:
+        """見出しと各セクション冒頭の抜粋でトリアージする.
+        
+        抜粋で得た関連度スコアが ``cutoff`` ± ``margin`` の範囲に入った場合と、
+        抜粋からスコアが得られなかった場合は全文でトリアージし直す。抜粋が全文より
+        短くならない文書は最初から全文でトリアージする。
+        
+        Args:
+            name: ログ表示用のドキュメント名
+            text: ドキュメント本文
+            section_chars: トップレベルセクションごとに送る本文の文字数
+            cutoff: スニペット抽出に進む関連度スコアの閾値
+            margin: 全文トリアージに切り替える閾値からの幅
+            
+        Returns:
+            Tuple[AnnotatedDocument, relevance_score]: 抽出結果と関連度スコア
+        """
+        outline = build_outline(text, section_chars)
+        if len(outline) >= len(text):
+            return self.extract_text(name, text)
+        
+        logger.debug(f"抜粋トリアージ: {name} ({len(outline)}/{len(text)}文字)")
+        result = self._run_extract(
+            outline,
+            extraction_passes=1,
+            max_workers=1,
+            prompt=self.prompt + PREVIEW_PROMPT_SUFFIX,
+            stage="triage.preview"
+        )
+        preview_score = find_relevance_score(result)
+        if preview_score is None:
+            logger.info(
+                f"抜粋トリアージでスコアが得られないため全文でトリアージ: {name}"
+            )
+            return self.extract_text(name, text)
+        relevance_score = preview_score
+        
+        if abs(relevance_score - cutoff) < margin:
+            logger.info(
+                f"抜粋トリアージのスコアが閾値付近のため全文でトリアージ: "
+                f"{name}, スコア: {relevance_score}"
+            )
+            return self.extract_text(name, text)
+        
+        logger.info(f"トリアージ完了（抜粋）: {name}, スコア: {relevance_score}")
+        return result, relevance_score
+    
+    def extract_batch(
+        self,
+        documents: Sequence[Tuple[str, str]],
+        max_batch_chars: int = 8000,
+    ) -> List[Tuple[lx.data.AnnotatedDocument, float]]:
+        """複数の短いドキュメントを1回のリクエストにまとめてトリアージする.
+        
+        ドキュメントを ``max_batch_chars`` 以内に詰め込んで1リクエストで送り、
+        抽出の ``doc_id`` 属性（なければ文字位置）で元のドキュメントに振り分ける。
+        単体で上限を超えるドキュメントや、振り分け後に関連度スコアが
+        得られなかったドキュメントは単体トリアージにフォールバックする。
+        
+        Args:
+            documents: (ドキュメント名, 本文) のリスト
+            max_batch_chars: 1リクエストに詰め込む本文の最大文字数
+            
+        Returns:
+            List[Tuple[AnnotatedDocument, relevance_score]]: 入力順の結果
+        """
+        if max_batch_chars <= 0:
+            raise ValueError("max_batch_chars must be positive")
+
+        results: List[Optional[Tuple[lx.data.AnnotatedDocument, float]]] = [None] * len(
+            documents
+        )
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_chars = 0
+        
+        for index, (name, text) in enumerate(documents):
+            if len(text) > max_batch_chars:
+                # 大きすぎるドキュメントは単体でトリアージ
+                results[index] = self.extract_text(name, text)
+                continue
+            if current and current_chars + len(text) > max_batch_chars:
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(index)
+            current_chars += len(text)
+        if current:
+            batches.append(current)
+        
+        for batch in batches:
+            if len(batch) == 1:
+                name, text = documents[batch[0]]
+                results[batch[0]] = self.extract_text(name, text)
+                continue
+            
+            routed = self._extract_packed([documents[i] for i in batch])
+            for index, result in zip(batch, routed, strict=True):
+                name, text = documents[index]
+                if result is None:
+                    logger.info(
+                        f"バッチ結果を振り分けできないため単体トリアージ: {name}"
+                    )
+                    results[index] = self.extract_text(name, text)
+                else:
+                    results[index] = result
+        
+        return [result for result in results if result is not None]
+    
+    def _extract_packed(
+        self, documents: Sequence[Tuple[str, str]]
+    ) -> List[Optional[Tuple[lx.data.AnnotatedDocument, float]]]:
+        """ドキュメント群を1つのテキストに詰めてトリアージし、結果を振り分ける."""
+        parts = []
+        segment_starts = []
+        body_starts = []
+        offset = 0
+        for doc_id, (_, text) in enumerate(documents, 1):
+            header = BATCH_DOCUMENT_HEADER.format(doc_id=doc_id) + "\n"
+            segment_starts.append(offset)
+            body_starts.append(offset + len(header))
+            parts.append(header + text)
+            offset += len(header) + len(text) + len(BATCH_SEPARATOR)
+        packed = BATCH_SEPARATOR.join(parts)
+        
+        logger.info(f"バッチトリアージ開始: {len(documents)}件, {len(packed)}文字")
+        result = self._run_extract(
+            packed,
+            extraction_passes=1,
+            max_workers=1,
+            max_char_buffer=len(packed),  # 1リクエストに収める
+            prompt=self.prompt + BATCH_PROMPT_SUFFIX,
+            examples=self.batch_examples,
+            stage="triage.batch"
+        )
+        
+        routed: List[List[lx.data.Extraction]] = [[] for _ in documents]
+        for extraction in result.extractions or []:
+            index = _route_extraction(extraction, segment_starts, len(documents))
+            if index is None:
+                logger.debug(f"振り分け不能な抽出を破棄: {extraction.extraction_text}")
+                continue
+            routed[index].append(
+                _clip_to_body(
+                    shift_extraction(extraction, -body_starts[index]),
+                    len(documents[index][1]),
+                )
+            )
+        
+        outputs: List[Optional[Tuple[lx.data.AnnotatedDocument, float]]] = []
+        for (name, text), extractions in zip(documents, routed, strict=True):
+            if not any(e.extraction_class == "relevance_score" for e in extractions):
+                outputs.append(None)
+                continue
+            document = lx.data.AnnotatedDocument(extractions=extractions, text=text)
+            relevance_score = parse_relevance_score(document)
+            logger.info(f"トリアージ完了: {name}, スコア: {relevance_score}")
+            outputs.append((document, relevance_score))
+        return outputs
+
+
+def find_relevance_score(result: lx.data.AnnotatedDocument) -> Optional[float]:
+    """トリアージ結果から関連度スコアを取り出す（取得できなければNone）."""
+    for extraction in result.extractions or []:
+        if extraction.extraction_class == "relevance_score":
+            try:
+                return float(extraction.extraction_text)
+            except ValueError:
+                logger.warning(
+                    f"関連度スコアの変換に失敗: {extraction.extraction_text}"
+                )
+    return None
+
+
+def parse_relevance_score(result: lx.data.AnnotatedDocument) -> float:
+    """トリアージ結果から関連度スコアを取り出す（取得できなければ0.0）."""
+    score = find_relevance_score(result)
+    return score if score is not None else 0.0
+
+
+def _route_extraction(
+    extraction: lx.data.Extraction, segment_starts: List[int], doc_count: int
+) -> Optional[int]:
+    """抽出が属するドキュメントの添字を返す（文字位置 → doc_id属性の順に判定）.
+    
+    位置はテキストへの位置合わせで決まるので、モデルが書いた doc_id より優先する。
+    """
+    interval = extraction.char_interval
+    if interval is not None and interval.start_pos is not None:
+        index = bisect.bisect_right(segment_starts, interval.start_pos) - 1
+        return index if 0 <= index < doc_count else None
+    
+    doc_id = (extraction.attributes or {}).get("doc_id")
+    if isinstance(doc_id, str) and doc_id.strip().isdigit():
+        index = int(doc_id.strip()) - 1
+        if 0 <= index < doc_count:
+            return index
+    return None
+
+
+def _clip_to_body(
+    extraction: lx.data.Extraction, body_chars: int
+) -> lx.data.Extraction:
+    """文書本文の外（見出しや区切り）にはみ出した位置を本文の範囲に収める.
+    
+    本文と重ならない位置は信用できないので、位置情報を外す。
+    """
+    interval = extraction.char_interval
+    if interval is None or interval.start_pos is None:
+        return extraction
+    end_pos = interval.end_pos if interval.end_pos is not None else interval.start_pos
+    start, end = max(interval.start_pos, 0), min(end_pos, body_chars)
+    if start >= end:
+        extraction.char_interval = None
+    elif (start, end) != (interval.start_pos, end_pos):
+        extraction.char_interval = lx.data.CharInterval(start_pos=start, end_pos=end)
+    return extraction
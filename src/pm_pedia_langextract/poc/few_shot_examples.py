@@ -249,4 +249,79 @@ def get_integration_examples() -> List[lx.data.ExampleData]:
                 )
             ]
         )
-    ]
\ No newline at end of file
+    ]
+
+
+# バッチトリアージで各ドキュメントの先頭に置く区切り行
+BATCH_DOCUMENT_HEADER = "=== DOCUMENT {doc_id} ==="
+
+
+def get_batch_triage_examples() -> List[lx.data.ExampleData]:
+    """複数ドキュメントをまとめてトリアージするためのFew-shotサンプルを返す.
+
+    単体トリアージのサンプルを1つのテキストに連結し、各抽出に
+    元ドキュメントの番号を ``doc_id`` 属性として付与する。
+    """
+    parts = []
+    extractions = []
+    for doc_id, example in enumerate(get_triage_examples(), 1):
+        parts.append(f"{BATCH_DOCUMENT_HEADER.format(doc_id=doc_id)}\n{example.text}")
+        for extraction in example.extractions:
+            extractions.append(
+                lx.data.Extraction(
+                    extraction_class=extraction.extraction_class,
+                    extraction_text=extraction.extraction_text,
+                    attributes={**(extraction.attributes or {}), "doc_id": str(doc_id)}
+                )
+            )
+    return [lx.data.ExampleData(text="\n\n".join(parts), extractions=extractions)]
+
+
+# 融合モードで各スニペット抽出サンプルに付けるトリアージ結果
+FUSED_TRIAGE_LABELS = [
+    (
+        "週次レビュー",
+        "0.95",
+        "スマートタグ機能のPRD完成とクラスタリング調査を完了。DBパフォーマンスとメンバー稼働に課題あり。",
+    ),
+    (
+        "議事録",
+        "0.9",
+        "クラスタリングにDBSCANを採用し、リリースまでのブロッカー解消に合意。性能テストが必要。",
+    ),
+]
+
+
+def get_fused_examples() -> List[lx.data.ExampleData]:
+    """トリアージとスニペット抽出を1回で行うためのFew-shotサンプルを返す.
+
+    スニペット抽出のサンプルそれぞれの先頭に、文書全体に対する
+    document_type / relevance_score / summary の抽出を加える。
+    """
+    examples = []
+    for example, (document_type, score, summary) in zip(
+        get_snippet_extraction_examples(), FUSED_TRIAGE_LABELS, strict=True
+    ):
+        triage = [
+            lx.data.Extraction(
+                extraction_class="document_type",
+                extraction_text=document_type,
+                attributes={"confidence": "high"}
+            ),
+            lx.data.Extraction(
+                extraction_class="relevance_score",
+                extraction_text=score,
+                attributes={"reason": "プロジェクトの進捗・課題・決定事項を含む"}
+            ),
+            lx.data.Extraction(
+                extraction_class="summary",
+                extraction_text=summary,
+                attributes={}
+            ),
+        ]
+        examples.append(
+            lx.data.ExampleData(
+                text=example.text, extractions=triage + example.extractions
+            )
+        )
+    return examples
@@ -0,0 +1,233 @@
+"""Diff-aware re-extraction helpers for living documents."""
+
+import bisect
+import difflib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import langextract as lx
+from langextract import data_lib
+
+from pm_pedia_langextract.poc.sections import split_sections
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReextractionPlan:
+    """差分抽出の計画.
+
+    Attributes:
+        reused: 変更のない領域から引き継ぐ抽出（新テキスト上の位置に補正済み）
+        changed_regions: 再抽出が必要な新テキスト上の [start, end) 範囲
+        total_chars: 新テキストの文字数
+    """
+
+    reused: List[lx.data.Extraction] = field(default_factory=list)
+    changed_regions: List[Tuple[int, int]] = field(default_factory=list)
+    total_chars: int = 0
+
+    @property
+    def changed_chars(self) -> int:
+        """再抽出対象の文字数."""
+        return sum(end - start for start, end in self.changed_regions)
+
+    @property
+    def changed_ratio(self) -> float:
+        """新テキストのうち再抽出対象となる割合."""
+        return self.changed_chars / self.total_chars if self.total_chars else 0.0
+
+
+def load_annotated_document(jsonl_path: Path) -> Optional[lx.data.AnnotatedDocument]:
+    """1文書分のJSONL出力を読み込む（読めなければNone）."""
+    try:
+        with jsonl_path.open("r", encoding="utf-8") as f:
+            line = f.readline()
+        return data_lib.dict_to_annotated_document(json.loads(line)) if line else None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"前回の抽出結果を読み込めません {jsonl_path}: {e}")
+        return None
+
+
+def shift_extraction(extraction: lx.data.Extraction, delta: int) -> lx.data.Extraction:
+    """``char_interval`` を ``delta`` 文字ずらした抽出のコピーを返す."""
+    char_interval = extraction.char_interval
+    if char_interval is not None and char_interval.start_pos is not None:
+        char_interval = lx.data.CharInterval(
+            start_pos=char_interval.start_pos + delta,
+            end_pos=(
+                char_interval.end_pos + delta
+                if char_interval.end_pos is not None
+                else None
+            ),
+        )
+
+    return lx.data.Extraction(
+        extraction_class=extraction.extraction_class,
+        extraction_text=extraction.extraction_text,
+        char_interval=char_interval,
+        alignment_status=extraction.alignment_status,
+        extraction_index=extraction.extraction_index,
+        group_index=extraction.group_index,
+        description=extraction.description,
+        attributes=extraction.attributes,
+    )
+
+
+def plan_reextraction(
+    previous: lx.data.AnnotatedDocument, new_text: str, max_chars: int = 1500
+) -> ReextractionPlan:
+    """前回の抽出結果と新テキストを比較し、再抽出が必要な範囲を求める.
+
+    テキストをセクション/チャンク単位に分割して差分を取り、一致した
+    セクション内の抽出は位置を補正して再利用する。セクションをまたぐ抽出は、
+    かかっているセクションがすべて一致し新版でも連続していれば再利用し、
+    そうでなければかかっている一致セクションも再抽出範囲に含める（境界を
+    またぐ抽出が再抽出で拾い直されるように）。位置不明の抽出は、そのテキストが
+    新版に残っていて、どの出現も再抽出範囲にかからない場合だけ引き継ぐ
+    （再抽出分と重複させないため）。
+
+    Args:
+        previous: 前回の抽出結果（``text`` を含むこと）
+        new_text: 新しいテキスト
+        max_chars: セクション分割の最大文字数（スニペット抽出のチャンクサイズ）
+
+    Returns:
+        ReextractionPlan: 再利用する抽出と再抽出範囲
+    """
+    old_text = previous.text or ""
+    old_sections = split_sections(old_text, max_chars)
+    new_sections = split_sections(new_text, max_chars)
+
+    aligned: List[lx.data.Extraction] = []
+    unaligned: List[lx.data.Extraction] = []
+    plan = ReextractionPlan(total_chars=len(new_text))
+    for extraction in previous.extractions or []:
+        interval = extraction.char_interval
+        if interval is None or interval.start_pos is None or interval.end_pos is None:
+            unaligned.append(extraction)
+            continue
+        aligned.append(extraction)
+    aligned.sort(key=lambda e: e.char_interval.start_pos)
+
+    matcher = difflib.SequenceMatcher(
+        a=[s.text(old_text) for s in old_sections],
+        b=[s.text(new_text) for s in new_sections],
+        autojunk=False,
+    )
+    # 一致した旧セクション → 新セクションの添字と、再抽出する新セクション
+    new_index: Dict[int, int] = {}
+    changed = [False] * len(new_sections)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            new_index.update(zip(range(i1, i2), range(j1, j2), strict=True))
+        else:
+            changed[j1:j2] = [True] * (j2 - j1)
+
+    candidates: List[Tuple[lx.data.Extraction, int, List[int]]] = []
+    old_starts = [section.start for section in old_sections]
+    for extraction in aligned:
+        touched = _touched_sections(old_starts, extraction.char_interval)
+        mapped = [new_index.get(i) for i in touched]
+        if mapped and None not in mapped and mapped == list(
+            range(mapped[0], mapped[0] + len(mapped))
+        ):
+            candidates.append((extraction, touched[0], mapped))
+        else:
+            for j in mapped:
+                if j is not None:
+                    changed[j] = True
+
+    # 再抽出するセクションにかかる抽出は捨て、かかっている残りのセクションも
+    # 再抽出する（それが別の抽出にかかることがあるので収まるまで繰り返す）
+    while True:
+        dirty = [c for c in candidates if any(changed[j] for j in c[2])]
+        if not dirty:
+            break
+        for _, _, mapped in dirty:
+            for j in mapped:
+                changed[j] = True
+        candidates = [c for c in candidates if not any(changed[j] for j in c[2])]
+
+    for extraction, first, mapped in candidates:
+        delta = new_sections[mapped[0]].start - old_sections[first].start
+        plan.reused.append(shift_extraction(extraction, delta))
+    for j, is_changed in enumerate(changed):
+        if not is_changed:
+            continue
+        section = new_sections[j]
+        if j > 0 and changed[j - 1]:
+            plan.changed_regions[-1] = (plan.changed_regions[-1][0], section.end)
+        else:
+            plan.changed_regions.append((section.start, section.end))
+
+    plan.reused.extend(
+        shift_extraction(extraction, 0)
+        for extraction in unaligned
+        if _outside_regions(extraction.extraction_text, new_text, plan.changed_regions)
+    )
+    return plan
+
+
+def _touched_sections(starts: List[int], interval: lx.data.CharInterval) -> List[int]:
+    """``[start_pos, end_pos)`` がかかる旧セクションの添字（昇順）."""
+    if not starts:
+        return []
+    first = max(0, bisect.bisect_right(starts, interval.start_pos) - 1)
+    last_pos = max(interval.start_pos, interval.end_pos - 1)
+    last = max(first, bisect.bisect_right(starts, last_pos) - 1)
+    return list(range(first, last + 1))
+
+
+def _outside_regions(text: str, source: str, regions: List[Tuple[int, int]]) -> bool:
+    """``text`` が ``source`` に現れ、そのどの出現も ``regions`` と重ならないか."""
+    if not text:
+        return False
+    found = False
+    start = source.find(text)
+    while start != -1:
+        end = start + len(text)
+        if any(
+            start < region_end and region_start < end
+            for region_start, region_end in regions
+        ):
+            return False
+        found = True
+        start = source.find(text, start + 1)
+    return found
+
+
+def merge_extractions(
+    reused: List[lx.data.Extraction],
+    region_results: List[Tuple[int, lx.data.AnnotatedDocument]],
+) -> List[lx.data.Extraction]:
+    """再利用分と再抽出分を結合し、位置順に並べて番号を振り直す.
+
+    Args:
+        reused: 位置補正済みの再利用抽出
+        region_results: (領域の開始位置, 領域テキストの抽出結果) のリスト
+
+    Returns:
+        List[Extraction]: 新テキスト上の位置で並んだ抽出
+    """
+    # 呼び出し元の抽出を書き換えないよう、番号を振り直す前にコピーする
+    merged = [shift_extraction(extraction, 0) for extraction in reused]
+    for region_start, result in region_results:
+        merged.extend(
+            shift_extraction(extraction, region_start)
+            for extraction in result.extractions or []
+        )
+
+    def position(extraction: lx.data.Extraction) -> int:
+        interval = extraction.char_interval
+        if interval is None or interval.start_pos is None:
+            return -1
+        return interval.start_pos
+
+    merged.sort(key=position)
+    for index, extraction in enumerate(merged, 1):
+        extraction.extraction_index = index
+    return merged
@@ -0,0 +1,120 @@
+"""Streaming document ingestion from a directory tree."""
+
+import fnmatch
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PATTERNS = ("*.md",)
+
+
+def iter_documents(
+    root: Path,
+    patterns: Sequence[str] = DEFAULT_PATTERNS,
+    include_hidden: bool = False,
+) -> Iterator[Path]:
+    """ディレクトリツリーを遅延的に走査し、対象ドキュメントのパスを順に返す.
+
+    ディレクトリごとに名前順で深さ優先に辿るため、結果は決定的になる。
+    リスト全体をメモリに載せないので、数万ファイル規模でもすぐに最初の
+    パスを返せる。
+
+    Args:
+        root: 走査するルートディレクトリ
+        patterns: 対象とするファイル名のglobパターン
+        include_hidden: ドットで始まるファイル・ディレクトリも含めるか
+
+    Yields:
+        Path: 対象ドキュメントのパス
+    """
+    root = Path(root)
+    if not root.is_dir():
+        raise FileNotFoundError(f"入力ディレクトリが見つかりません: {root}")
+
+    yield from _walk(root, patterns, include_hidden)
+
+
+def _walk(
+    directory: Path, patterns: Sequence[str], include_hidden: bool
+) -> Iterator[Path]:
+    """1ディレクトリを名前順に走査し、サブディレクトリへ再帰する."""
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as e:
+        logger.warning(f"ディレクトリを読み込めません {directory}: {e}")
+        return
+
+    for entry in entries:
+        if not include_hidden and entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(Path(entry.path), patterns, include_hidden)
+        elif entry.is_file() and any(
+            fnmatch.fnmatch(entry.name, pattern) for pattern in patterns
+        ):
+            yield Path(entry.path)
+
+
+class DirectoryWatcher:
+    """ディレクトリをポーリングし、新規・更新されたドキュメントを検出する."""
+
+    def __init__(
+        self,
+        root: Path,
+        patterns: Sequence[str] = DEFAULT_PATTERNS,
+        interval: float = 2.0,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.root = Path(root)
+        self.patterns = patterns
+        self.interval = interval
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+
+    def poll(self) -> List[Path]:
+        """前回のポーリング以降に作成・更新されたドキュメントを返す."""
+        changed = []
+        current: Dict[Path, Tuple[int, int]] = {}
+        for path in iter_documents(self.root, self.patterns):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            current[path] = signature
+            if self._seen.get(path) != signature:
+                changed.append(path)
+
+        self._seen = current
+        return changed
+
+    def watch(
+        self, stop_event: Optional[threading.Event] = None
+    ) -> Iterator[List[Path]]:
+        """変更のあったドキュメントをポーリングごとにまとめて返し続ける.
+
+        初回は既存の全ドキュメントを返す。``stop_event`` がセットされるまで続く。
+
+        Args:
+            stop_event: 監視を終了するためのイベント
+
+        Yields:
+            List[Path]: 新規・更新されたドキュメントのパス
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"監視開始: {self.root} (間隔: {self.interval}秒)")
+
+        while not stop_event.is_set():
+            changed = self.poll()
+            if changed:
+                logger.info(f"変更検出: {len(changed)}件")
+                yield changed
+            stop_event.wait(self.interval)
+
+        logger.info(f"監視終了: {self.root}")
@@ -1,16 +1,54 @@
 """Main execution script for PM-pedia PoC."""
 
-import os
+import argparse
 import json
+import os
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from dotenv import load_dotenv
-import langextract as lx
 
-from pm_pedia_langextract.poc.extractors import TriageExtractor, SnippetExtractor
-from pm_pedia_langextract.utils.logging_config import setup_logging, get_logger
+from pm_pedia_langextract.poc.accounting import (
+    configure_accountant,
+    get_accountant,
+    load_price_table,
+)
+from pm_pedia_langextract.poc.aliases import AliasIndex
+from pm_pedia_langextract.poc.cache import DEFAULT_CACHE_PATH, ExtractionCache
+from pm_pedia_langextract.poc.extractors import (
+    FusedExtractor,
+    SnippetExtractor,
+    TriageExtractor,
+)
+from pm_pedia_langextract.poc.ingest import DirectoryWatcher, iter_documents
+from pm_pedia_langextract.poc.manifest import DocumentManifest
+from pm_pedia_langextract.poc.pipeline import (
+    Phase1Config,
+    Phase1Pipeline,
+    build_summary,
+)
+from pm_pedia_langextract.poc.pretriage import (
+    DEFAULT_MODEL_PATH as PRETRIAGE_MODEL_PATH,
+)
+from pm_pedia_langextract.poc.pretriage import LexicalPreTriage
+from pm_pedia_langextract.poc.providers import (
+    Cassette,
+    LatencyModel,
+    RecordingProvider,
+    ReplayProvider,
+    configure_model_provider,
+    get_model_provider,
+)
+from pm_pedia_langextract.poc.ratelimit import configure_rate_limiter, get_rate_limiter
+from pm_pedia_langextract.poc.report import start_background_index
+from pm_pedia_langextract.poc.resilience import (
+    RetryPolicy,
+    configure_resilience,
+    get_resilient_caller,
+)
+from pm_pedia_langextract.poc.tracing import get_tracer, span
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
 
 # 環境設定
 load_dotenv()
@@ -18,141 +56,212 @@ setup_logging(level="INFO")
 logger = get_logger(__name__)
 
 
-def run_phase1() -> List[Dict[str, Any]]:
-    """フェーズ1: 個別ドキュメント処理."""
-    logger.info("=== PM-pedia PoC Phase 1 開始 ===")
-    
-    # 環境変数確認
+SAMPLE_DOCS = [
+    Path("data/sample_docs/weekly_review_2025-W33.md"),
+    Path("data/sample_docs/smart_tag_clustering_prd_v1.md"),
+    Path("data/sample_docs/journal_2025-08-23.md")
+]
+
+
+def _check_api_key() -> None:
+    """環境変数を確認する（カセット再生時はAPIキー不要）."""
+    if get_model_provider().name == "replay":
+        return
     api_key = os.getenv("LANGEXTRACT_API_KEY")
     if not api_key:
         raise ValueError(
             "LANGEXTRACT_API_KEY環境変数が設定されていません。\n"
             ".env ファイルを作成し、Gemini APIキーを設定してください。"
         )
+
+
+def _build_pipeline(
+    config: Phase1Config,
+    cache_path: Optional[Path],
+    incremental: bool,
+    pretriage: bool = False,
+    aliases_path: Optional[Path] = None,
+) -> Tuple[Phase1Pipeline, Optional[ExtractionCache]]:
+    """抽出器とパイプラインを初期化する.
+
+    前回の文書種別による融合モードの判定、セクション差分の再抽出、過去の
+    トリアージ結果による事前判定の初期学習はマニフェストを使うため、
+    ``incremental`` でなければ働かない（融合モードの文書種別はエラーにする）。
+    """
+    if not incremental:
+        if config.fused_document_types:
+            raise ValueError(
+                "前回の文書種別はマニフェストから引くため、"
+                "融合モードの文書種別の指定には --incremental が必要です"
+            )
+        if pretriage and not PRETRIAGE_MODEL_PATH.exists():
+            logger.warning(
+                "--incremental なしのため、事前判定は過去のトリアージ結果で"
+                "初期学習せずFew-shotサンプルだけで始めます"
+            )
+    logger.info("抽出器を初期化中...")
+    cache = ExtractionCache(cache_path) if cache_path else None
+    triage_extractor = TriageExtractor(cache=cache)
+    snippet_extractor = SnippetExtractor(cache=cache)
     
-    # サンプルドキュメントのパス
-    sample_docs = [
-        Path("data/sample_docs/weekly_review_2025-W33.md"),
-        Path("data/sample_docs/smart_tag_clustering_prd_v1.md"),
-        Path("data/sample_docs/journal_2025-08-23.md")
-    ]
+    manifest = (
+        DocumentManifest(config.output_dir / "phase1_manifest.json")
+        if incremental
+        else None
+    )
+    pretriage_model = (
+        LexicalPreTriage.load(PRETRIAGE_MODEL_PATH, manifest=manifest)
+        if pretriage
+        else None
+    )
+    fused_extractor = (
+        FusedExtractor(cache=cache)
+        if config.fused_patterns or config.fused_document_types
+        else None
+    )
+    pipeline = Phase1Pipeline(
+        triage_extractor,
+        snippet_extractor,
+        config,
+        manifest,
+        pretriage_model,
+        fused_extractor,
+        AliasIndex(aliases_path) if aliases_path else None,
+    )
+    return pipeline, cache
+
+
+def _write_summary(
+    results: List[Dict[str, Any]], pipeline: Phase1Pipeline
+) -> Tuple[Path, Dict[str, Any]]:
+    """phase1_summary.json を書き出す（事前判定モデルも保存する）."""
+    summary_path = pipeline.config.output_dir / "phase1_summary.json"
+    summary_data = build_summary(results)
+    summary_data["usage"] = get_accountant().summary()
+    if pipeline.pretriage is not None:
+        summary_data["pretriage"] = pipeline.pretriage.stats()
+        pipeline.pretriage.save(PRETRIAGE_MODEL_PATH)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # 存在確認
-    for doc_path in sample_docs:
-        if not doc_path.exists():
-            raise FileNotFoundError(f"サンプルドキュメントが見つかりません: {doc_path}")
+    with summary_path.open("w", encoding="utf-8") as f:
+        json.dump(summary_data, f, ensure_ascii=False, indent=2)
     
-    # 抽出器の初期化
-    logger.info("抽出器を初期化中...")
-    triage_extractor = TriageExtractor()
-    snippet_extractor = SnippetExtractor()
+    return summary_path, summary_data
+
+
+def _write_trace(output_dir: Path, name: str) -> Path:
+    """ステージごとの所要時間（p50/p95/max）をJSONで書き出し、ログにも出す."""
+    tracer = get_tracer()
+    trace_path = tracer.write_report(output_dir / name)
+    for stage, stats in tracer.report()["stages"].items():
+        wall = stats["wall_ms"]
+        logger.info(
+            f"  {stage}: {stats['count']}回, p50 {wall['p50']:.0f}ms, "
+            f"p95 {wall['p95']:.0f}ms, max {wall['max']:.0f}ms"
+        )
+    logger.info(f"トレース: {trace_path}")
+    return trace_path
+
+
+def run_phase1(
+    doc_paths: Optional[Iterable[Path]] = None,
+    max_in_flight: int = 4,
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+    incremental: bool = False,
+    input_dir: Optional[Path] = None,
+    triage_batch_chars: Optional[int] = None,
+    pretriage: bool = False,
+    triage_preview_chars: Optional[int] = None,
+    fused_patterns: Sequence[str] = (),
+    fused_document_types: Sequence[str] = (),
+    report: bool = False,
+    aliases_path: Optional[Path] = None,
+) -> List[Dict[str, Any]]:
+    """フェーズ1: 個別ドキュメント処理.
+
+    Args:
+        doc_paths: 処理対象のドキュメントパス（省略時はサンプルドキュメント）
+        max_in_flight: 同時に処理する文書数の上限
+        cache_path: 抽出キャッシュのSQLiteパス（Noneでキャッシュ無効）
+        incremental: 前回から変更のない文書をマニフェストで判定してスキップするか
+            （既定では従来どおり全文書を処理する）
+        input_dir: 指定した場合、このディレクトリ以下のMarkdownを遅延的に処理する
+        triage_batch_chars: 短い文書をまとめてトリアージする際の1リクエストの文字数上限
+            （Noneでバッチトリアージ無効）
+        pretriage: 明らかな文書をローカルの事前判定で確定し、LLM呼び出しを省くか
+        triage_preview_chars: 見出しと各セクション冒頭の抜粋でトリアージする際の
+            セクションごとの文字数（Noneで全文トリアージ）
+        fused_patterns: トリアージとスニペット抽出を1回で行う文書のglob
+            （入力ディレクトリからの相対パス、またはファイル名に対して判定）
+        fused_document_types: 前回この文書種別と判定された文書を融合モードで処理する
+        report: 抽出完了後にHTMLレポート（インデックス）をバックグラウンドで生成するか
+        aliases_path: スニペットのプロジェクトキーワードを名寄せする別名索引のパス
+            （Noneで名寄せしない。付与した ``project_ids`` は抽出時点の索引に基づく
+            参考値で、フェーズ2は現在の索引で名寄せし直す）
+    """
+    logger.info("=== PM-pedia PoC Phase 1 開始 ===")
     
-    results = []
+    _check_api_key()
     
-    for doc_path in sample_docs:
-        logger.info(f"\n--- 処理中: {doc_path.name} ---")
-        
-        # ステップ1: トリアージ
-        logger.info("ステップ1: トリアージ実行中...")
-        triage_result, relevance_score = triage_extractor.extract(doc_path)
-        
-        # トリアージ結果を解析して表示
-        document_type = "不明"
-        summary = "取得できませんでした"
+    if input_dir is not None:
+        # ディレクトリを走査しながらパイプラインに流す
+        logger.info(f"入力ディレクトリ: {input_dir}")
+        source: Iterable[Path] = iter_documents(input_dir)
+    else:
+        # サンプルドキュメントのパス
+        sample_docs = list(doc_paths) if doc_paths is not None else SAMPLE_DOCS
         
-        for extraction in triage_result.extractions:
-            if extraction.extraction_class == "document_type":
-                document_type = extraction.extraction_text
-            elif extraction.extraction_class == "summary":
-                summary = extraction.extraction_text
-        
-        logger.info(f"  文書種別: {document_type}")
-        logger.info(f"  関連度スコア: {relevance_score}")
-        logger.info(f"  要約: {summary}")
-        
-        # 関連度が0.7以上の場合のみスニペット抽出
-        if relevance_score >= 0.7:
-            logger.info(f"  関連度スコア: {relevance_score} >= 0.7 - スニペット抽出を実行")
-            
-            # ステップ2: スニペット抽出
-            snippet_result = snippet_extractor.extract(doc_path)
-            
-            # 結果を保存
-            output_dir = Path("data/output/phase1")
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            output_name = f"{doc_path.stem}_snippets"
-            
-            lx.io.save_annotated_documents(
-                [snippet_result], 
-                output_name=output_name,
-                output_dir=str(output_dir)
-            )
-            
-            # LangExtractは拡張子なしで保存するため、リネーム
-            temp_path = output_dir / output_name
-            output_path = output_dir / f"{output_name}.jsonl"
-            if temp_path.exists() and not output_path.exists():
-                temp_path.rename(output_path)
-            
-            # 可視化HTML生成
-            html_content = lx.visualize(str(output_path))
-            html_path = output_path.with_suffix('.html')
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            logger.info(f"  結果を保存: {output_path}")
-            logger.info(f"  可視化HTML: {html_path}")
-            
-            # 結果サマリー
-            extraction_types = {}
-            for extraction in snippet_result.extractions:
-                ext_type = extraction.extraction_class
-                extraction_types[ext_type] = extraction_types.get(ext_type, 0) + 1
-            
-            logger.info(f"  抽出サマリー: {extraction_types}")
-            
-            results.append({
-                "document": doc_path.name,
-                "document_type": document_type,
-                "relevance_score": relevance_score,
-                "summary": summary,
-                "snippets_count": len(snippet_result.extractions),
-                "snippets_by_type": extraction_types,
-                "output_file": str(output_path),
-                "html_file": str(html_path),
-                "processed": True
-            })
-        else:
-            logger.info(f"  関連度スコア: {relevance_score} < 0.7 - スニペット抽出をスキップ")
-            results.append({
-                "document": doc_path.name,
-                "document_type": document_type,
-                "relevance_score": relevance_score,
-                "summary": summary,
-                "snippets_count": 0,
-                "snippets_by_type": {},
-                "output_file": None,
-                "html_file": None,
-                "processed": False
-            })
+        # 存在確認
+        for doc_path in sample_docs:
+            if not doc_path.exists():
+                raise FileNotFoundError(
+                    f"サンプルドキュメントが見つかりません: {doc_path}"
+                )
+        source = sample_docs
     
-    # サマリー出力
-    summary_path = Path("data/output/phase1/phase1_summary.json")
-    summary_data = {
-        "execution_time": datetime.now().isoformat(),
-        "total_documents": len(sample_docs),
-        "processed_documents": len([r for r in results if r["processed"]]),
-        "results": results
-    }
+    config = Phase1Config(
+        max_in_flight=max_in_flight,
+        input_root=input_dir,
+        triage_batch_chars=triage_batch_chars,
+        triage_preview_chars=triage_preview_chars,
+        fused_patterns=tuple(fused_patterns),
+        fused_document_types=tuple(fused_document_types),
+    )
+    pipeline, cache = _build_pipeline(
+        config, cache_path, incremental, pretriage, aliases_path
+    )
+    get_tracer().reset()
+    get_accountant().reset()
+    with span("phase1.run"):
+        results = pipeline.run(source)
+    pipeline.close()
+    report_thread = start_background_index(config.output_dir) if report else None
     
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump(summary_data, f, ensure_ascii=False, indent=2)
+    # サマリー出力
+    summary_path, summary_data = _write_summary(results, pipeline)
     
     logger.info(f"\n=== Phase 1 完了 ===")
     logger.info(f"処理文書数: {len(results)}")
     logger.info(f"スニペット抽出対象: {len([r for r in results if r['processed']])}件")
+    logger.info(f"前回結果を引き継ぎ: {summary_data['reused_documents']}件")
+    if "pretriage" in summary_data:
+        logger.info(f"事前判定: {summary_data['pretriage']}")
+    usage = summary_data["usage"]["total"]
+    logger.info(
+        f"使用量: 入力 {usage['input_tokens']}トークン"
+        f" / 出力 {usage['output_tokens']}トークン"
+        f" (見積もり ${usage['cost_usd']:.4f})"
+    )
     logger.info(f"サマリーファイル: {summary_path}")
+    if cache is not None:
+        logger.info(f"抽出キャッシュ: {cache.stats()}")
+        cache.close()
+    logger.info(f"モデル呼び出し: {get_rate_limiter().stats()}")
+    logger.info(f"再試行・ヘッジ: {get_resilient_caller().stats()}")
+    provider = get_model_provider()
+    if isinstance(provider, ReplayProvider):
+        logger.info(f"カセット再生: {provider.stats()}")
+    _write_trace(config.output_dir, "phase1_trace.json")
     
     # 結果の詳細表示
     logger.info("\n--- 詳細結果 ---")
@@ -166,12 +275,246 @@ def run_phase1() -> List[Dict[str, Any]]:
         else:
             logger.info("  処理スキップ")
     
+    if report_thread is not None:
+        report_thread.join()
+    
     return results
 
 
+def run_phase1_watch(
+    input_dir: Path,
+    interval: float = 2.0,
+    max_in_flight: int = 4,
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+    stop_event: Optional[threading.Event] = None,
+    triage_batch_chars: Optional[int] = None,
+    pretriage: bool = False,
+    triage_preview_chars: Optional[int] = None,
+    fused_patterns: Sequence[str] = (),
+    fused_document_types: Sequence[str] = (),
+    report: bool = False,
+    aliases_path: Optional[Path] = None,
+) -> None:
+    """フェーズ1をディレクトリ監視モードで実行する.
+
+    新規作成・更新されたMarkdownをポーリングで検出してパイプラインに流し、
+    検出のたびに phase1_summary.json を更新する。``stop_event`` がセットされるか
+    Ctrl-Cで終了する。phase1_trace.json は直近の検出分の計測だけを含む。
+
+    Args:
+        input_dir: 監視するディレクトリ
+        interval: ポーリング間隔（秒）
+        max_in_flight: 同時に処理する文書数の上限
+        cache_path: 抽出キャッシュのSQLiteパス（Noneでキャッシュ無効）
+        stop_event: 監視を終了するためのイベント
+        triage_batch_chars: バッチトリアージの1リクエストの文字数上限（Noneで無効）
+        pretriage: ローカルの事前判定を使うか
+        triage_preview_chars: 抜粋トリアージのセクションごとの文字数（Noneで無効）
+        fused_patterns: 融合モードで処理する文書のglob
+        fused_document_types: 融合モードで処理する前回の文書種別
+        report: 検出のたびにHTMLレポートをバックグラウンドで更新するか
+        aliases_path: 別名索引のパス（Noneで名寄せしない）
+    """
+    logger.info("=== PM-pedia PoC Phase 1 (監視モード) 開始 ===")
+    
+    _check_api_key()
+    
+    config = Phase1Config(
+        max_in_flight=max_in_flight,
+        input_root=input_dir,
+        triage_batch_chars=triage_batch_chars,
+        triage_preview_chars=triage_preview_chars,
+        fused_patterns=tuple(fused_patterns),
+        fused_document_types=tuple(fused_document_types),
+    )
+    pipeline, cache = _build_pipeline(config, cache_path, True, pretriage, aliases_path)
+    watcher = DirectoryWatcher(input_dir, interval=interval)
+    latest: Dict[str, Dict[str, Any]] = {}
+    report_thread: Optional[threading.Thread] = None
+    
+    try:
+        for changed in watcher.watch(stop_event):
+            with span("phase1.run"):
+                for result in pipeline.run(changed):
+                    latest[result["document"]] = result
+            summary_path, summary_data = _write_summary(list(latest.values()), pipeline)
+            # 長時間の監視で記録が増え続けないよう、使用量は合計に畳み込み、
+            # トレースは直近の検出分だけを書き出して破棄する
+            get_accountant().rollup()
+            get_tracer().write_report(config.output_dir / "phase1_trace.json")
+            get_tracer().reset()
+            # 前回のレポート生成が終わっていなければ次の検出時に回す
+            if report and (report_thread is None or not report_thread.is_alive()):
+                report_thread = start_background_index(config.output_dir)
+            logger.info(
+                f"サマリー更新: {summary_path} "
+                f"(文書数: {summary_data['total_documents']}, "
+                f"抽出対象: {summary_data['processed_documents']})"
+            )
+    except KeyboardInterrupt:
+        logger.info("監視モードを終了します")
+    finally:
+        # クローズ時の詰め直しで古いシャードが消える前にレポート生成を待つ
+        if report_thread is not None:
+            report_thread.join()
+        pipeline.close()
+        if cache is not None:
+            cache.close()
+        logger.info(f"モデル呼び出し: {get_rate_limiter().stats()}")
+        logger.info(f"再試行・ヘッジ: {get_resilient_caller().stats()}")
+        # 検出ごとに書き出して破棄しているので、最後の検出の後に計測した分が
+        # なければ直前の検出分のトレースを空で上書きしない
+        if get_tracer().records():
+            _write_trace(config.output_dir, "phase1_trace.json")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PM-pedia PoC Phase 1")
+    parser.add_argument(
+        "--input-dir", type=Path, help="処理対象のディレクトリ（省略時はサンプル）"
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="ディレクトリを監視し続ける"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=2.0, help="監視のポーリング間隔（秒）"
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=4, help="同時に処理する文書数"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="前回から内容・プロンプトが変わっていない文書をスキップする"
+    )
+    parser.add_argument(
+        "--triage-batch-chars", type=int, default=None,
+        help="短い文書をまとめてトリアージする際の1リクエストの文字数上限"
+    )
+    parser.add_argument(
+        "--pretriage", action="store_true",
+        help="明らかな文書をローカルの事前判定で確定してLLM呼び出しを省く"
+    )
+    parser.add_argument(
+        "--triage-preview-chars", type=int, default=None,
+        help="見出しと各セクション冒頭（この文字数）の抜粋でトリアージする"
+    )
+    parser.add_argument(
+        "--fused-pattern", action="append", default=[],
+        help="トリアージとスニペット抽出を1回で行う文書のglob（複数指定可）"
+    )
+    parser.add_argument(
+        "--fused-document-type", action="append", default=[],
+        help="前回この文書種別だった文書を融合モードで処理する"
+             "（--incremental が必要。複数指定可）"
+    )
+    parser.add_argument(
+        "--report", action="store_true",
+        help="抽出後にHTMLレポート（ページ分割したインデックス）をバックグラウンドで生成する"
+    )
+    parser.add_argument(
+        "--aliases", type=Path, default=None,
+        help="スニペットのプロジェクトキーワードを別名索引（JSON）で名寄せする"
+             "（指定時のみ。フェーズ2は現在の索引で名寄せし直す）"
+    )
+    parser.add_argument(
+        "--requests-per-second", type=float, default=None,
+        help="全抽出器で共有するモデル呼び出しのリクエスト数/秒の上限"
+    )
+    parser.add_argument(
+        "--chars-per-second", type=float, default=None,
+        help="全抽出器で共有するモデルへの送信文字数/秒の上限"
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, default=16,
+        help="適応的に調整するモデル呼び出しの同時実行数の上限"
+    )
+    parser.add_argument(
+        "--price-table", type=Path, default=None,
+        help="モデルごとの料金表（JSON、100万トークンあたりのUSD）"
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=3,
+        help="一時的な失敗時のモデル呼び出しの最大試行回数"
+    )
+    parser.add_argument(
+        "--hedge", action="store_true",
+        help="p95レイテンシを超えた呼び出しにヘッジ要求を出す"
+    )
+    provider_group = parser.add_mutually_exclusive_group()
+    provider_group.add_argument(
+        "--record", type=Path, default=None,
+        help="モデルへのプロンプトと応答をこのカセット（JSONL）に記録する"
+    )
+    provider_group.add_argument(
+        "--replay", type=Path, default=None,
+        help="このカセットから応答を再生する（APIキー・ネットワーク不要）"
+    )
+    parser.add_argument(
+        "--replay-latency-median", type=float, default=None,
+        help="再生時のレイテンシを対数正規分布（この中央値・秒）で与える（省略時は記録値）"
+    )
+    parser.add_argument(
+        "--replay-latency-scale", type=float, default=1.0,
+        help="再生時のレイテンシに掛ける倍率（0で待たない）"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = _parse_args()
+    configure_rate_limiter(
+        requests_per_second=args.requests_per_second,
+        chars_per_second=args.chars_per_second,
+        initial_concurrency=min(4, args.max_concurrency),
+        max_concurrency=args.max_concurrency,
+    )
+    configure_resilience(
+        policy=RetryPolicy(max_attempts=args.max_attempts),
+        hedge=args.hedge,
+    )
+    if args.price_table is not None:
+        configure_accountant(prices=load_price_table(args.price_table))
+    if args.record is not None:
+        configure_model_provider(RecordingProvider(Cassette(args.record)))
+    elif args.replay is not None:
+        configure_model_provider(
+            ReplayProvider(
+                Cassette(args.replay),
+                LatencyModel(
+                    median=args.replay_latency_median, scale=args.replay_latency_scale
+                ),
+            )
+        )
+    if args.fused_document_type and not (args.incremental or args.watch):
+        raise SystemExit("--fused-document-type には --incremental の指定が必要です")
+    if args.watch:
+        if args.input_dir is None:
+            raise SystemExit("--watch には --input-dir の指定が必要です")
+        run_phase1_watch(
+            args.input_dir, args.interval, args.max_in_flight,
+            triage_batch_chars=args.triage_batch_chars,
+            pretriage=args.pretriage,
+            triage_preview_chars=args.triage_preview_chars,
+            fused_patterns=args.fused_pattern,
+            fused_document_types=args.fused_document_type,
+            report=args.report,
+            aliases_path=args.aliases,
+        )
+        raise SystemExit(0)
+    
     try:
-        results = run_phase1()
+        results = run_phase1(
+            max_in_flight=args.max_in_flight,
+            incremental=args.incremental,
+            input_dir=args.input_dir,
+            triage_batch_chars=args.triage_batch_chars,
+            pretriage=args.pretriage,
+            triage_preview_chars=args.triage_preview_chars,
+            fused_patterns=args.fused_pattern,
+            fused_document_types=args.fused_document_type,
+            report=args.report,
+            aliases_path=args.aliases,
+        )
         logger.info("PoC Phase 1 が正常に完了しました")
         
         # 次のステップの案内
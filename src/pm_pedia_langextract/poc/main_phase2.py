@@ -1,14 +1,22 @@
 """Phase 2 execution script for project integration."""
 
+import argparse
 import json
-from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 
+from pm_pedia_langextract.poc.accounting import configure_accountant, load_price_table
+from pm_pedia_langextract.poc.aliases import DEFAULT_ALIAS_PATH, AliasIndex
+from pm_pedia_langextract.poc.cache import DEFAULT_CACHE_PATH, ExtractionCache
+from pm_pedia_langextract.poc.clustering import SnippetClusterer
 from pm_pedia_langextract.poc.extractors import IntegrationExtractor
-from pm_pedia_langextract.utils.logging_config import setup_logging, get_logger
+from pm_pedia_langextract.poc.shards import SHARD_MANIFEST_NAME, open_snippet_source
+from pm_pedia_langextract.poc.store import DEFAULT_STORE_PATH, SnippetStore
+from pm_pedia_langextract.poc.tracing import get_tracer, span
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
 
 # 環境設定
 load_dotenv()
@@ -16,42 +24,92 @@ setup_logging(level="INFO")
 logger = get_logger(__name__)
 
 
-def run_phase2() -> Dict[str, Any]:
-    """フェーズ2: 統合・構造化処理."""
+def run_phase2(
+    cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+    store_path: Path = DEFAULT_STORE_PATH,
+    hierarchical: bool = True,
+    group_chars: int = 8000,
+    cluster: bool = True,
+    dedup: bool = True,
+    incremental: bool = False,
+    aliases_path: Path = DEFAULT_ALIAS_PATH,
+) -> Dict[str, Any]:
+    """フェーズ2: 統合・構造化処理.
+
+    Args:
+        cache_path: 抽出キャッシュのSQLiteパス（Noneでキャッシュ無効）
+        store_path: スニペットストアのSQLiteパス（フェーズ1の出力から差分同期する）
+        hierarchical: 全スニペットをmap-reduceで統合するか（Falseで先頭50件を1回で統合）
+        group_chars: 階層モードで1回の統合に渡す最大文字数
+        cluster: 階層モードでスニペットを事前にプロジェクトごとにクラスタリングするか
+        dedup: 文書をまたいでほぼ重複するスニペットを1件にまとめるか
+        incremental: 前回の統合結果を引き継ぎ、前回以降に追加されたスニペットだけを
+            統合するか（前回の結果がなければ全件で統合する）
+        aliases_path: プロジェクトの別名索引のパス（統合結果のプロジェクトを追記して
+            保存する）
+    """
     logger.info("=== PM-pedia PoC Phase 2 開始 ===")
     
-    # フェーズ1の出力ファイルを取得
+    # フェーズ1の出力（シャードマニフェスト、なければ旧形式のファイル群）を開く
     phase1_output_dir = Path("data/output/phase1")
-    snippet_files = list(phase1_output_dir.glob("*_snippets.jsonl"))
+    source = open_snippet_source(phase1_output_dir)
     
-    if not snippet_files:
+    if len(source) == 0:
         raise FileNotFoundError(
             "Phase 1の出力が見つかりません。先にPhase 1を実行してください。\n"
-            f"期待するパス: {phase1_output_dir}/*_snippets.jsonl"
+            f"期待するパス: {phase1_output_dir / SHARD_MANIFEST_NAME}"
         )
     
-    logger.info(f"統合対象ファイル: {len(snippet_files)}件")
-    for f in snippet_files:
-        logger.info(f"  - {f.name}")
+    logger.info(f"統合対象文書: {len(source)}件")
     
     # 統合処理実行
     logger.info("統合抽出器を初期化中...")
-    integrator = IntegrationExtractor()
+    cache = ExtractionCache(cache_path) if cache_path else None
+    aliases = AliasIndex(aliases_path)
+    integrator = IntegrationExtractor(
+        cache=cache,
+        hierarchical=hierarchical,
+        group_chars=group_chars,
+        clusterer=SnippetClusterer() if cluster else None,
+        dedup_threshold=0.7 if dedup else None,
+        aliases=aliases,
+    )
+    
+    output_dir = Path("data/output/phase2")
+    output_path = output_dir / "unified_projects.json"
+    previous = None
+    if incremental and output_path.exists():
+        with output_path.open("r", encoding="utf-8") as f:
+            previous = json.load(f)
     
     logger.info("統合処理を実行中...")
-    result = integrator.extract(snippet_files)
+    get_tracer().reset()
+    store = SnippetStore(store_path)
+    try:
+        with span("phase2.run"):
+            with span("phase2.sync_store"):
+                store.sync(source)
+            if previous is not None:
+                result = integrator.extract_incremental(store, previous)
+            else:
+                result = integrator.extract(store)
+    finally:
+        store.close()
+    aliases.save()
+    if cache is not None:
+        logger.info(f"抽出キャッシュ: {cache.stats()}")
+        cache.close()
     
     # 結果を保存
-    output_dir = Path("data/output/phase2")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    output_path = output_dir / "unified_projects.json"
-    
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(result, f, ensure_ascii=False, indent=2)
+    trace_path = get_tracer().write_report(output_dir / "phase2_trace.json")
     
     logger.info(f"\n=== Phase 2 完了 ===")
     logger.info(f"統合結果: {output_path}")
+    logger.info(f"トレース: {trace_path}")
     logger.info(f"統合されたプロジェクト数: {len(result['unified_projects'])}")
     
     # 結果の詳細表示
@@ -80,8 +138,23 @@ def run_phase2() -> Dict[str, Any]:
     # 抽出メタデータ表示
     metadata = result['extraction_metadata']
     logger.info(f"\n--- 処理統計 ---")
-    logger.info(f"処理ファイル数: {metadata['processed_files']}")
+    logger.info(f"処理文書数: {metadata['processed_documents']}")
     logger.info(f"使用モデル: {metadata['model_used']}")
+    logger.info(
+        f"統合グループ: map {metadata['map_groups']}件,"
+        f" reduce {metadata['reduce_rounds']}回"
+    )
+    if 'updated_projects' in metadata:
+        logger.info(
+            f"差分統合: 更新 {metadata['updated_projects']}件,"
+            f" 新規 {metadata['new_projects']}件"
+        )
+    usage = metadata['usage']['total']
+    logger.info(
+        f"使用量: 入力 {usage['input_tokens']}トークン"
+        f" / 出力 {usage['output_tokens']}トークン"
+        f" (見積もり ${usage['cost_usd']:.4f})"
+    )
     logger.info(f"処理時刻: {metadata['timestamp']}")
     
     return result
@@ -118,9 +191,57 @@ def analyze_results(result: Dict[str, Any]) -> None:
         logger.info(f"  {max_snippets_project['project_name']} ({len(max_snippets_project['information_snippets'])}件)")
 
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PM-pedia PoC Phase 2")
+    parser.add_argument(
+        "--price-table", type=Path, default=None,
+        help="モデルごとの料金表（JSON、100万トークンあたりのUSD）"
+    )
+    parser.add_argument(
+        "--store", type=Path, default=DEFAULT_STORE_PATH,
+        help="スニペットストア（SQLite + FTS5）のパス"
+    )
+    parser.add_argument(
+        "--single-call", action="store_true",
+        help="先頭50件のスニペットだけを1回の呼び出しで統合する（従来の動作）"
+    )
+    parser.add_argument(
+        "--group-chars", type=int, default=8000,
+        help="階層的な統合で1回の呼び出しに渡す最大文字数"
+    )
+    parser.add_argument(
+        "--no-cluster", action="store_true",
+        help="統合前のスニペットのクラスタリングを行わない"
+    )
+    parser.add_argument(
+        "--no-dedup", action="store_true",
+        help="ほぼ重複するスニペットをまとめずにそのまま統合する"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="前回の統合結果に、前回以降に追加されたスニペットだけを取り込む"
+    )
+    parser.add_argument(
+        "--aliases", type=Path, default=DEFAULT_ALIAS_PATH,
+        help="プロジェクトの別名索引（JSON、統合結果で更新される）"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = _parse_args()
+    if args.price_table is not None:
+        configure_accountant(prices=load_price_table(args.price_table))
     try:
-        result = run_phase2()
+        result = run_phase2(
+            store_path=args.store,
+            hierarchical=not args.single_call,
+            group_chars=args.group_chars,
+            cluster=not args.no_cluster,
+            dedup=not args.no_dedup,
+            incremental=args.incremental,
+            aliases_path=args.aliases,
+        )
         analyze_results(result)
         
         logger.info("\n🎉 PM-pedia PoC Phase 2 が正常に完了しました！")
@@ -0,0 +1,133 @@
+"""Document manifest for incremental Phase 1 runs."""
+
+import dataclasses
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def content_hash(doc_path: Path) -> str:
+    """ドキュメントの内容ハッシュ（SHA-256）を返す."""
+    return hashlib.sha256(doc_path.read_bytes()).hexdigest()
+
+
+def compute_prompt_version(extractors: Iterable[Any], **settings: Any) -> str:
+    """抽出器のプロンプト・Few-shot・モデルと設定値からバージョン文字列を作る.
+
+    いずれかが変わると全文書が再処理対象になる。
+    """
+    payload = {
+        "extractors": [
+            {
+                "class": type(extractor).__name__,
+                "model_id": extractor.model_id,
+                "prompt": extractor.prompt,
+                "examples": [dataclasses.asdict(e) for e in extractor.examples],
+            }
+            for extractor in extractors
+        ],
+        "settings": settings,
+    }
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
+class DocumentManifest:
+    """文書ごとの内容ハッシュと前回のフェーズ1結果を保持する.
+
+    ファイル形式:
+        {"version": 1, "documents": {"<path>": {"content_hash": ...,
+        "prompt_version": ..., "updated_at": ..., "result": {...}}}}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    self._entries = json.load(f).get("documents", {})
+                logger.info(
+                    f"マニフェスト読み込み: {self.path} ({len(self._entries)}件)"
+                )
+            except json.JSONDecodeError as e:
+                logger.warning(
+                    f"マニフェストが壊れているため再作成します {self.path}: {e}"
+                )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(文書パス, エントリ) の一覧を返す."""
+        with self._lock:
+            return list(self._entries.items())
+
+    def get(self, doc_path: Path) -> Optional[Dict[str, Any]]:
+        """文書のエントリを返す（なければNone）."""
+        with self._lock:
+            return self._entries.get(str(doc_path))
+
+    def lookup_unchanged(
+        self, doc_path: Path, doc_hash: str, prompt_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """内容とプロンプトが前回と同じなら前回の結果を返す.
+
+        出力ファイルが消えている場合は変更ありとみなす。
+        """
+        entry = self.get(doc_path)
+        if entry is None:
+            return None
+        if (
+            entry["content_hash"] != doc_hash
+            or entry["prompt_version"] != prompt_version
+        ):
+            return None
+
+        output_file = entry["result"].get("output_file")
+        if output_file and not Path(output_file).exists():
+            return None
+
+        return entry["result"]
+
+    def update(
+        self,
+        doc_path: Path,
+        doc_hash: str,
+        prompt_version: str,
+        result: Dict[str, Any],
+    ) -> None:
+        """文書の最新結果を記録する."""
+        with self._lock:
+            self._entries[str(doc_path)] = {
+                "content_hash": doc_hash,
+                "prompt_version": prompt_version,
+                "updated_at": datetime.now().isoformat(),
+                "result": result,
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """変更があればマニフェストをアトミックに書き出す."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": 1, "documents": self._entries}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+        logger.info(f"マニフェスト保存: {self.path} ({len(self._entries)}件)")
@@ -0,0 +1,99 @@
+"""Single-pass multi-pattern matching (Aho-Corasick) over normalized text."""
+
+import unicodedata
+from collections import deque
+from typing import Dict, FrozenSet, Generic, Hashable, Iterable, List, Set, TypeVar
+
+Label = TypeVar("Label", bound=Hashable)
+
+
+def normalize(text: str) -> str:
+    """照合用にNFKC正規化して大文字・小文字を畳み込む（全角英数や半角カナも揃う）."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+class PatternMatcher(Generic[Label]):
+    """多数のパターンをまとめたAho-Corasickオートマトン.
+
+    パターンごとにラベル（プロジェクトの番号など）を登録し、:meth:`find` で
+    テキストを1回走査して、含まれるパターンのラベルをまとめて返す。
+    パターンもテキストも :func:`normalize` してから照合する。
+    パターンを追加すると、次の照合時にオートマトンを作り直す。
+    """
+
+    def __init__(self) -> None:
+        self._patterns: Dict[str, Set[Label]] = {}
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._outputs: List[FrozenSet[Label]] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: str, label: Label) -> None:
+        """``pattern`` を ``label`` のパターンとして登録する（空文字列は無視）."""
+        key = normalize(pattern)
+        if not key:
+            return
+        self._patterns.setdefault(key, set()).add(label)
+        self._built = False
+
+    def add_all(self, patterns: Iterable[str], label: Label) -> None:
+        """複数のパターンを同じラベルで登録する."""
+        for pattern in patterns:
+            self.add(pattern, label)
+
+    def exact(self, text: str) -> FrozenSet[Label]:
+        """正規化後に ``text`` と完全一致するパターンのラベル."""
+        return frozenset(self._patterns.get(normalize(text), ()))
+
+    def find(self, text: str) -> Set[Label]:
+        """``text`` に部分文字列として含まれるパターンのラベルをすべて返す."""
+        if not self._built:
+            self._build()
+        goto = self._goto
+        outputs = self._outputs
+        fail = self._fail
+        labels: Set[Label] = set()
+        state = 0
+        for ch in normalize(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                labels.update(outputs[state])
+        return labels
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[Label]] = [set()]
+        for pattern, labels in self._patterns.items():
+            state = 0
+            for ch in pattern:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].update(labels)
+
+        # 幅優先で失敗遷移を張り、遷移先の出力を引き継ぐ
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                outputs[next_state] |= outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [frozenset(labels) for labels in outputs]
+        self._built = True
@@ -0,0 +1,546 @@
+"""Pipelined Phase 1 runner."""
+
+import fnmatch
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.aliases import AliasIndex
+from pm_pedia_langextract.poc.extractors import (
+    FusedExtractor,
+    SnippetExtractor,
+    TriageExtractor,
+)
+from pm_pedia_langextract.poc.incremental import load_annotated_document
+from pm_pedia_langextract.poc.manifest import (
+    DocumentManifest,
+    compute_prompt_version,
+    content_hash,
+)
+from pm_pedia_langextract.poc.pretriage import LexicalPreTriage
+from pm_pedia_langextract.poc.shards import DEFAULT_MAX_SHARD_BYTES, ShardWriter
+from pm_pedia_langextract.poc.tracing import span
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Phase1Config:
+    """フェーズ1パイプラインの設定."""
+
+    output_dir: Path = field(default_factory=lambda: Path("data/output/phase1"))
+    relevance_threshold: float = 0.7
+    max_in_flight: int = 4
+    triage_concurrency: int = 2
+    snippet_concurrency: int = 2
+    # 変わった文書は前回の抽出結果から変更のないセクションを引き継ぐ（要マニフェスト）
+    diff_snippets: bool = True
+    input_root: Optional[Path] = None
+    # バッチトリアージ（Noneで無効）。まとめる文書数は max_in_flight が上限になる
+    triage_batch_chars: Optional[int] = None
+    batch_short_document_chars: int = 2000
+    triage_batch_wait: float = 0.5
+    # 抜粋トリアージ（Noneで無効）。スコアが閾値±marginなら全文で再判定する
+    triage_preview_chars: Optional[int] = None
+    triage_escalation_margin: float = 0.1
+    # 融合モード（トリアージとスニペット抽出を1回で行う）の対象。
+    # 文書名（入力ルートからの相対パス）のglob、または前回の文書種別
+    # （要マニフェスト）で指定する
+    fused_patterns: Tuple[str, ...] = ()
+    fused_document_types: Tuple[str, ...] = ()
+    # スニペット出力のシャード1つあたりの最大バイト数
+    shard_max_bytes: int = DEFAULT_MAX_SHARD_BYTES
+
+    def __post_init__(self) -> None:
+        """設定値を検証する."""
+        if self.max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        if self.triage_concurrency <= 0:
+            raise ValueError("triage_concurrency must be positive")
+        if self.snippet_concurrency <= 0:
+            raise ValueError("snippet_concurrency must be positive")
+        if self.triage_batch_chars is not None and self.triage_batch_chars <= 0:
+            raise ValueError("triage_batch_chars must be positive")
+        if self.triage_preview_chars is not None and self.triage_preview_chars <= 0:
+            raise ValueError("triage_preview_chars must be positive")
+
+
+def document_label(doc_path: Path, input_root: Optional[Path] = None) -> str:
+    """サマリーに記録する文書名（入力ルートがあればそこからの相対パス）."""
+    if input_root is not None and doc_path.is_relative_to(input_root):
+        return doc_path.relative_to(input_root).as_posix()
+    return doc_path.name
+
+
+def parse_triage(triage_result: lx.data.AnnotatedDocument) -> Tuple[str, str]:
+    """トリアージ結果から文書種別と要約を取り出す."""
+    document_type = "不明"
+    summary = "取得できませんでした"
+
+    for extraction in triage_result.extractions or []:
+        if extraction.extraction_class == "document_type":
+            document_type = extraction.extraction_text
+        elif extraction.extraction_class == "summary":
+            summary = extraction.extraction_text
+
+    return document_type, summary
+
+
+def build_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """phase1_summary.json の内容を組み立てる."""
+    return {
+        "execution_time": datetime.now().isoformat(),
+        "total_documents": len(results),
+        "processed_documents": len([r for r in results if r["processed"]]),
+        "reused_documents": len([r for r in results if r.get("reused")]),
+        "results": results
+    }
+
+
+class TriageBatcher:
+    """短い文書のトリアージ要求を溜め、まとめて1リクエストで実行する.
+
+    溜まった文字数が ``max_batch_chars`` に達するか、最初の要求から
+    ``max_wait`` 秒経っても結果が出ない場合にバッチを送信する。
+    """
+
+    def __init__(
+        self,
+        extractor: TriageExtractor,
+        max_batch_chars: int,
+        max_wait: float,
+        slots: threading.BoundedSemaphore,
+    ):
+        self.extractor = extractor
+        self.max_batch_chars = max_batch_chars
+        self.max_wait = max_wait
+        self._slots = slots
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, Future]] = []
+        self._pending_chars = 0
+
+    def triage(self, name: str, text: str) -> Tuple[lx.data.AnnotatedDocument, float]:
+        """文書をバッチに加え、結果が出るまで待つ."""
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((name, text, future))
+            self._pending_chars += len(text)
+            if self._pending_chars >= self.max_batch_chars:
+                batch = self._take()
+        if batch:
+            self._run(batch)
+
+        try:
+            return future.result(timeout=self.max_wait)
+        except FutureTimeoutError:
+            self.flush()
+            return future.result()
+
+    def flush(self) -> None:
+        """溜まっている要求をすぐに送信する."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _take(self) -> List[Tuple[str, str, Future]]:
+        batch, self._pending, self._pending_chars = self._pending, [], 0
+        return batch
+
+    def _run(self, batch: List[Tuple[str, str, Future]]) -> None:
+        try:
+            with self._slots:
+                results = self.extractor.extract_batch(
+                    [(name, text) for name, text, _ in batch],
+                    max_batch_chars=self.max_batch_chars
+                )
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results, strict=True):
+            future.set_result(result)
+
+
+class Phase1Pipeline:
+    """トリアージとスニペット抽出を文書間で重ねて実行する.
+
+    各文書はトリアージ → スニペット抽出 → 保存の順に処理されるが、
+    最大 ``max_in_flight`` 件の文書を同時に扱うため、文書N+1のトリアージは
+    文書Nのスニペット抽出と並行して進む。ステージごとの同時実行数は
+    ``triage_concurrency`` / ``snippet_concurrency`` で制限する。
+
+    ``manifest`` を渡すと、内容ハッシュとプロンプトバージョンが前回と同じ文書は
+    LLMを呼ばずに前回の結果を引き継ぐ。``triage_batch_chars`` を設定すると、
+    短い文書のトリアージを :class:`TriageBatcher` でまとめて実行する。
+    ``pretriage`` を渡すと、明らかな文書はLLMを呼ばずにローカルで判定し、
+    LLMで判定した文書はその結果を逐次学習する。``triage_preview_chars`` を
+    設定すると、長い文書は見出しと各セクション冒頭の抜粋でトリアージする。
+    ``fused_extractor`` を渡すと、``fused_patterns`` / ``fused_document_types`` に
+    該当する文書はトリアージとスニペット抽出を1回のLLM呼び出しで行う。
+
+    スニペット抽出結果は文書ごとのファイルではなく、出力ディレクトリの
+    :class:`ShardWriter` のシャードに追記する（最初の保存時に開く）。
+    ``aliases`` を渡すと、保存の前に各スニペットのプロジェクトキーワードを
+    別名索引で名寄せし、既知のプロジェクトの ``project_ids`` 属性を付ける。
+    この属性は抽出時点の索引に基づく参考値で、フェーズ2は現在の索引で名寄せし直す。
+    """
+
+    def __init__(
+        self,
+        triage_extractor: TriageExtractor,
+        snippet_extractor: SnippetExtractor,
+        config: Optional[Phase1Config] = None,
+        manifest: Optional[DocumentManifest] = None,
+        pretriage: Optional[LexicalPreTriage] = None,
+        fused_extractor: Optional[FusedExtractor] = None,
+        aliases: Optional[AliasIndex] = None,
+    ):
+        self.triage_extractor = triage_extractor
+        self.pretriage = pretriage
+        self.fused_extractor = fused_extractor
+        self.aliases = aliases
+        self.snippet_extractor = snippet_extractor
+        self.config = config or Phase1Config()
+        self.manifest = manifest
+        version_settings: Dict[str, Any] = {
+            "relevance_threshold": self.config.relevance_threshold,
+        }
+        if self.config.triage_preview_chars is not None:
+            version_settings["triage_preview_chars"] = self.config.triage_preview_chars
+            version_settings["triage_escalation_margin"] = (
+                self.config.triage_escalation_margin
+            )
+        extractors: List[Any] = [triage_extractor, snippet_extractor]
+        if fused_extractor is not None:
+            extractors.append(fused_extractor)
+            version_settings["fused_patterns"] = list(self.config.fused_patterns)
+            version_settings["fused_document_types"] = list(
+                self.config.fused_document_types
+            )
+        self.prompt_version = (
+            compute_prompt_version(extractors, **version_settings)
+            if manifest is not None
+            else None
+        )
+        self._writer: Optional[ShardWriter] = None
+        self._writer_lock = threading.Lock()
+        self._triage_slots = threading.BoundedSemaphore(self.config.triage_concurrency)
+        self._snippet_slots = threading.BoundedSemaphore(
+            self.config.snippet_concurrency
+        )
+        self._batcher = (
+            TriageBatcher(
+                triage_extractor,
+                self.config.triage_batch_chars,
+                self.config.triage_batch_wait,
+                self._triage_slots,
+            )
+            if self.config.triage_batch_chars is not None
+            else None
+        )
+
+    def run(self, doc_paths: Iterable[Path]) -> List[Dict[str, Any]]:
+        """文書群を処理し、入力順に並んだ結果を返す.
+
+        Args:
+            doc_paths: 処理対象のドキュメントパス（遅延評価されるイテラブル可）
+
+        Returns:
+            List[Dict]: 文書ごとの処理結果
+        """
+        in_flight = threading.BoundedSemaphore(self.config.max_in_flight)
+        failed = threading.Event()
+        futures: List[Future] = []
+
+        def release(_: Future) -> None:
+            in_flight.release()
+
+        with ThreadPoolExecutor(
+            max_workers=self.config.max_in_flight,
+            thread_name_prefix="phase1"
+        ) as executor:
+            for doc_path in doc_paths:
+                in_flight.acquire()
+                if failed.is_set():
+                    in_flight.release()
+                    break
+
+                future = executor.submit(self._process_guarded, doc_path, failed)
+                future.add_done_callback(release)
+                futures.append(future)
+
+            try:
+                return [future.result() for future in futures]
+            finally:
+                # マニフェストが指すスニペットを先に確定させる
+                if self._writer is not None:
+                    self._writer.commit()
+                if self.manifest is not None:
+                    self.manifest.save()
+
+    @property
+    def writer(self) -> ShardWriter:
+        """スニペット出力のシャードライター（初回アクセス時に開く）."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ShardWriter(
+                    self.config.output_dir, max_shard_bytes=self.config.shard_max_bytes
+                )
+            return self._writer
+
+    def close(self) -> None:
+        """シャードを確定させて閉じる."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _process_guarded(
+        self, doc_path: Path, failed: threading.Event
+    ) -> Dict[str, Any]:
+        """失敗時に後続文書の投入を止めるためのラッパー."""
+        try:
+            return self.process_document(doc_path)
+        except Exception:
+            failed.set()
+            raise
+
+    def process_document(self, doc_path: Path) -> Dict[str, Any]:
+        """1文書を処理し、マニフェストがあれば結果を記録する.
+
+        処理全体を ``phase1.document`` スパンとして文書名付きで計測する。
+        """
+        with span(
+            "phase1.document", document=document_label(doc_path, self.config.input_root)
+        ):
+            return self._process_tracked(doc_path)
+
+    def _process_tracked(self, doc_path: Path) -> Dict[str, Any]:
+        if self.manifest is None or self.prompt_version is None:
+            return self._process(doc_path)
+
+        with span("phase1.manifest_lookup"):
+            doc_hash = content_hash(doc_path)
+            previous = self.manifest.lookup_unchanged(
+                doc_path, doc_hash, self.prompt_version
+            )
+        if previous is not None:
+            logger.info(f"--- 変更なし: {doc_path.name} - 前回の結果を引き継ぎ ---")
+            return {**previous, "reused": True}
+
+        # 同じプロンプトで抽出済みの前回出力があれば差分抽出に使う
+        previous_output = None
+        entry = self.manifest.get(doc_path)
+        if (
+            self.config.diff_snippets
+            and entry is not None
+            and entry["prompt_version"] == self.prompt_version
+            and entry["result"].get("output_file")
+        ):
+            previous_output = self._load_previous(
+                doc_path, Path(entry["result"]["output_file"])
+            )
+
+        result = self._process(doc_path, previous_output)
+        self.manifest.update(doc_path, doc_hash, self.prompt_version, result)
+        return result
+
+    def _load_previous(
+        self, doc_path: Path, output_file: Path
+    ) -> Optional[lx.data.AnnotatedDocument]:
+        """前回のスニペット抽出結果をシャード（なければ旧形式のファイル）から読む."""
+        previous = self.writer.read(document_label(doc_path, self.config.input_root))
+        if (
+            previous is None
+            and output_file.name.endswith("_snippets.jsonl")
+            and output_file.exists()
+        ):
+            previous = load_annotated_document(output_file)
+        return previous
+
+    def _process(
+        self,
+        doc_path: Path,
+        previous_output: Optional[lx.data.AnnotatedDocument] = None,
+    ) -> Dict[str, Any]:
+        """1文書をトリアージし、必要ならスニペット抽出と保存まで行う.
+
+        Args:
+            doc_path: 処理対象のドキュメントパス
+            previous_output: 前回のスニペット抽出結果（差分抽出に使用）
+        """
+        logger.info(f"--- 処理中: {doc_path.name} ---")
+
+        # ステップ1: トリアージ（融合モードではスニペット抽出も同時に行う）
+        snippet_result: Optional[lx.data.AnnotatedDocument] = None
+        if self.fused_extractor is not None and self._use_fused(doc_path):
+            with span("phase1.fused"), self._snippet_slots:
+                triage_result, relevance_score, snippet_result = (
+                    self.fused_extractor.extract(doc_path)
+                )
+            triage_source = "fused"
+        else:
+            with span("phase1.triage"):
+                triage_result, relevance_score, triage_source = self._triage(doc_path)
+
+        document_type, summary = parse_triage(triage_result)
+
+        logger.info(f"  [{doc_path.name}] 文書種別: {document_type}")
+        logger.info(f"  [{doc_path.name}] 関連度スコア: {relevance_score}")
+        logger.info(f"  [{doc_path.name}] 要約: {summary}")
+
+        threshold = self.config.relevance_threshold
+        if relevance_score < threshold:
+            logger.info(
+                f"  [{doc_path.name}] 関連度スコア: {relevance_score} < {threshold}"
+                " - スニペット抽出をスキップ"
+            )
+            return {
+                "document": document_label(doc_path, self.config.input_root),
+                "document_type": document_type,
+                "relevance_score": relevance_score,
+                "summary": summary,
+                "triage_source": triage_source,
+                "snippets_count": 0,
+                "snippets_by_type": {},
+                "output_file": None,
+                "processed": False
+            }
+
+        logger.info(
+            f"  [{doc_path.name}] 関連度スコア: {relevance_score} >= {threshold}"
+            " - スニペット抽出を実行"
+        )
+
+        # ステップ2: スニペット抽出
+        if snippet_result is None:
+            with span("phase1.snippet"), self._snippet_slots:
+                if previous_output is not None:
+                    snippet_result = self.snippet_extractor.extract_incremental(
+                        doc_path, previous_output
+                    )
+                else:
+                    snippet_result = self.snippet_extractor.extract(doc_path)
+
+        if self.aliases is not None:
+            with span("phase1.resolve_aliases"):
+                resolved = self.aliases.annotate(snippet_result)
+            logger.debug(
+                f"  [{doc_path.name}] 既知のプロジェクトに名寄せ: {resolved}件"
+            )
+
+        output_path = self._save(doc_path, snippet_result)
+
+        # 結果サマリー
+        extraction_types: Dict[str, int] = {}
+        for extraction in snippet_result.extractions or []:
+            ext_type = extraction.extraction_class
+            extraction_types[ext_type] = extraction_types.get(ext_type, 0) + 1
+
+        logger.info(f"  [{doc_path.name}] 抽出サマリー: {extraction_types}")
+
+        return {
+            "document": document_label(doc_path, self.config.input_root),
+            "document_type": document_type,
+            "relevance_score": relevance_score,
+            "summary": summary,
+            "triage_source": triage_source,
+            "snippets_count": len(snippet_result.extractions or []),
+            "snippets_by_type": extraction_types,
+            "output_file": str(output_path),
+            "processed": True
+        }
+
+    def _use_fused(self, doc_path: Path) -> bool:
+        """文書を融合モードで処理するか（パスのglob → 前回の文書種別の順に判定）."""
+        label = document_label(doc_path, self.config.input_root)
+        if any(
+            fnmatch.fnmatch(label, pattern) for pattern in self.config.fused_patterns
+        ):
+            return True
+
+        if self.config.fused_document_types and self.manifest is not None:
+            entry = self.manifest.get(doc_path)
+            if entry is not None:
+                return (
+                    entry["result"].get("document_type")
+                    in self.config.fused_document_types
+                )
+        return False
+
+    def _triage(self, doc_path: Path) -> Tuple[lx.data.AnnotatedDocument, float, str]:
+        """文書をトリアージする.
+
+        事前判定で確定すればLLMを呼ばず、短い文書はバッチに回す。
+        抜粋トリアージが有効なら、それ以外の文書は抜粋から判定する。
+
+        Returns:
+            Tuple[AnnotatedDocument, relevance_score, source]: source は
+            ``"pretriage"`` または ``"llm"``
+        """
+        text = None
+        if (
+            self.pretriage is not None
+            or self._batcher is not None
+            or self.config.triage_preview_chars is not None
+        ):
+            with span("phase1.read"):
+                text = doc_path.read_text(encoding="utf-8")
+
+        if self.pretriage is not None and text is not None:
+            local = self.pretriage.triage(doc_path.name, text)
+            if local is not None:
+                return local[0], local[1], "pretriage"
+
+        if (
+            self._batcher is not None
+            and text is not None
+            and len(text) <= self.config.batch_short_document_chars
+        ):
+            triage_result, relevance_score = self._batcher.triage(doc_path.name, text)
+        elif self.config.triage_preview_chars is not None and text is not None:
+            with self._triage_slots:
+                triage_result, relevance_score = self.triage_extractor.extract_preview(
+                    doc_path.name,
+                    text,
+                    section_chars=self.config.triage_preview_chars,
+                    cutoff=self.config.relevance_threshold,
+                    margin=self.config.triage_escalation_margin,
+                )
+        else:
+            with self._triage_slots:
+                triage_result, relevance_score = self.triage_extractor.extract(doc_path)
+
+        if self.pretriage is not None and text is not None:
+            document_type, _ = parse_triage(triage_result)
+            self.pretriage.observe(text, relevance_score, document_type)
+
+        return triage_result, relevance_score, "llm"
+
+    def _save(self, doc_path: Path, snippet_result: lx.data.AnnotatedDocument) -> Path:
+        """抽出結果をシャードに追記し、シャードマニフェストのパスを返す.
+
+        シャードは複数の文書で共有され、詰め直すと名前も変わるので、結果の
+        ``output_file`` には文書の位置を引けるシャードマニフェストを入れる。
+        可視化HTMLはここでは作らず、必要なときに :mod:`report` で生成する。
+        """
+        label = document_label(doc_path, self.config.input_root)
+        with span("phase1.save.write"):
+            location = self.writer.append(label, snippet_result)
+
+        logger.info(
+            f"  [{doc_path.name}] 結果を保存: "
+            f"{self.config.output_dir / location.shard} (offset {location.offset})"
+        )
+
+        return self.writer.manifest_path
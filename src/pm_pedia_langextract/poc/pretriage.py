@@ -0,0 +1,334 @@
+"""Local lexical pre-triage to skip LLM calls for obvious documents."""
+
+import json
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.few_shot_examples import get_triage_examples
+from pm_pedia_langextract.poc.manifest import DocumentManifest
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MODEL_PATH = Path("data/output/phase1/pretriage_model.json")
+WHITESPACE = re.compile(r"\s+")
+
+# (本文, 関連度スコア, 文書種別)
+TrainingSample = Tuple[str, float, Optional[str]]
+
+
+@dataclass
+class PreTriageDecision:
+    """ローカル判定の結果."""
+
+    probability: float
+    decision: Literal["low", "high", "uncertain"]
+    document_type: Optional[str] = None
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> Set[str]:
+    """NFKC正規化・小文字化したテキストの文字n-gram集合を返す."""
+    normalized = WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).lower())
+    low, high = ngram_range
+    return {
+        normalized[i:i + n]
+        for n in range(low, high + 1)
+        for i in range(len(normalized) - n + 1)
+    }
+
+
+class LexicalPreTriage:
+    """文字n-gramのナイーブベイズで、明らかな文書をLLMなしで判定する.
+
+    関連度スコアが ``relevance_cutoff`` 以上の文書を「関連あり」として学習し、
+    推定確率が ``low_threshold`` 以下なら低関連、``high_threshold`` 以上なら
+    高関連とローカルに判定する。その中間の文書だけLLMトリアージに回す。
+    文書長による過信を避けるため、対数尤度比はn-gram数で平均してから
+    ``evidence_weight`` 倍する。
+
+    LLMトリアージの結果を ``observe`` で逐次学習でき、状態はJSONで保存できる。
+    保存時には、両クラス合計の出現文書数が多い ``max_features`` 個のn-gramだけを
+    残す（語彙が際限なく増えてファイルサイズと読み込み時間が伸びないように）。
+    """
+
+    def __init__(
+        self,
+        low_threshold: float = 0.05,
+        high_threshold: float = 0.95,
+        relevance_cutoff: float = 0.7,
+        min_samples_per_class: int = 5,
+        evidence_weight: float = 20.0,
+        ngram_range: Tuple[int, int] = (2, 3),
+        max_features: Optional[int] = 50_000,
+    ):
+        if not 0.0 <= low_threshold < high_threshold <= 1.0:
+            raise ValueError("thresholds must satisfy 0 <= low < high <= 1")
+        if max_features is not None and max_features <= 0:
+            raise ValueError("max_features must be positive")
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.relevance_cutoff = relevance_cutoff
+        self.min_samples_per_class = min_samples_per_class
+        self.evidence_weight = evidence_weight
+        self.ngram_range = ngram_range
+        self.max_features = max_features
+
+        # クラス（"relevant" / "irrelevant"）ごとのn-gram出現文書数
+        self._feature_counts: Dict[str, Counter] = {
+            "relevant": Counter(),
+            "irrelevant": Counter(),
+        }
+        self._doc_counts: Dict[str, int] = {"relevant": 0, "irrelevant": 0}
+        self._type_counts: Dict[str, Counter] = {
+            "relevant": Counter(),
+            "irrelevant": Counter(),
+        }
+        self._lock = threading.Lock()
+
+        self.decided_low = 0
+        self.decided_high = 0
+        self.escalated = 0
+
+    @classmethod
+    def from_examples(cls, **kwargs) -> "LexicalPreTriage":
+        """トリアージ用Few-shotサンプルで初期学習したモデルを作る."""
+        model = cls(**kwargs)
+        model.fit(training_samples_from_examples(get_triage_examples()))
+        return model
+
+    def fit(self, samples: Iterable[TrainingSample]) -> "LexicalPreTriage":
+        """学習サンプルを追加学習する."""
+        for text, score, document_type in samples:
+            self.observe(text, score, document_type)
+        return self
+
+    def observe(
+        self, text: str, relevance_score: float, document_type: Optional[str] = None
+    ) -> None:
+        """1文書分のトリアージ結果を学習に加える."""
+        label = "relevant" if relevance_score >= self.relevance_cutoff else "irrelevant"
+        features = char_ngrams(text, self.ngram_range)
+        with self._lock:
+            self._feature_counts[label].update(features)
+            self._doc_counts[label] += 1
+            if document_type:
+                self._type_counts[label][document_type] += 1
+
+    def is_ready(self) -> bool:
+        """両クラスとも十分な学習サンプルがあるか."""
+        return all(
+            count >= self.min_samples_per_class for count in self._doc_counts.values()
+        )
+
+    def predict(self, text: str) -> PreTriageDecision:
+        """文書が関連ありである確率と判定を返す."""
+        features = char_ngrams(text, self.ngram_range)
+        with self._lock:
+            if not self.is_ready() or not features:
+                return PreTriageDecision(probability=0.5, decision="uncertain")
+
+            relevant = self._doc_counts["relevant"]
+            irrelevant = self._doc_counts["irrelevant"]
+            prior = math.log(relevant / irrelevant)
+
+            llr_sum = 0.0
+            for feature in features:
+                # 文書頻度のラプラス平滑化（ベルヌーイ型）
+                p_rel = (self._feature_counts["relevant"][feature] + 1) / (relevant + 2)
+                p_irr = (self._feature_counts["irrelevant"][feature] + 1) / (
+                    irrelevant + 2
+                )
+                llr_sum += math.log(p_rel / p_irr)
+
+            log_odds = prior + self.evidence_weight * llr_sum / len(features)
+            probability = 1.0 / (1.0 + math.exp(-max(min(log_odds, 50.0), -50.0)))
+
+            label = "relevant" if probability >= 0.5 else "irrelevant"
+            types = self._type_counts[label]
+            document_type = types.most_common(1)[0][0] if types else None
+
+        if probability <= self.low_threshold:
+            decision: Literal["low", "high", "uncertain"] = "low"
+        elif probability >= self.high_threshold:
+            decision = "high"
+        else:
+            decision = "uncertain"
+        return PreTriageDecision(probability, decision, document_type)
+
+    def triage(
+        self, name: str, text: str
+    ) -> Optional[Tuple[lx.data.AnnotatedDocument, float]]:
+        """確信度が高ければローカルのトリアージ結果を返し、そうでなければNone.
+
+        返すAnnotatedDocumentはLLMトリアージと同じ3要素を持ち、各抽出の
+        ``source`` 属性が ``"pretriage"`` になる。
+        """
+        decision = self.predict(text)
+        if decision.decision == "uncertain":
+            with self._lock:
+                self.escalated += 1
+            logger.debug(
+                f"事前判定: 不確実 ({decision.probability:.2f}) - LLMへ: {name}"
+            )
+            return None
+
+        with self._lock:
+            if decision.decision == "low":
+                self.decided_low += 1
+            else:
+                self.decided_high += 1
+
+        relevance_score = round(decision.probability, 2)
+        attributes = {"source": "pretriage"}
+        document = lx.data.AnnotatedDocument(
+            extractions=[
+                lx.data.Extraction(
+                    extraction_class="document_type",
+                    extraction_text=decision.document_type or "その他",
+                    attributes=attributes
+                ),
+                lx.data.Extraction(
+                    extraction_class="relevance_score",
+                    extraction_text=str(relevance_score),
+                    attributes=attributes
+                ),
+                lx.data.Extraction(
+                    extraction_class="summary",
+                    extraction_text=_first_line(text),
+                    attributes=attributes
+                ),
+            ],
+            text=text
+        )
+        logger.info(
+            f"事前判定で確定: {name}, スコア: {relevance_score} ({decision.decision})"
+        )
+        return document, relevance_score
+
+    def stats(self) -> Dict[str, int]:
+        """ローカル判定の件数（LLM呼び出し削減数）を返す."""
+        with self._lock:
+            return {
+                "decided_low": self.decided_low,
+                "decided_high": self.decided_high,
+                "escalated": self.escalated,
+                "llm_calls_avoided": self.decided_low + self.decided_high,
+                "training_documents": sum(self._doc_counts.values()),
+            }
+
+    def _prune(self) -> None:
+        """出現文書数の多い ``max_features`` 個のn-gramだけを残す（要ロック）."""
+        if self.max_features is None:
+            return
+        totals = self._feature_counts["relevant"] + self._feature_counts["irrelevant"]
+        if len(totals) <= self.max_features:
+            return
+        keep = {feature for feature, _ in totals.most_common(self.max_features)}
+        for label, counts in self._feature_counts.items():
+            self._feature_counts[label] = Counter(
+                {feature: count for feature, count in counts.items() if feature in keep}
+            )
+        logger.info(f"事前判定モデルの語彙を削減: {len(totals)} -> {len(keep)}")
+
+    def save(self, path: Path = DEFAULT_MODEL_PATH) -> None:
+        """学習状態を（語彙を ``max_features`` 個に絞って）JSONに保存する."""
+        with self._lock:
+            self._prune()
+            data = {
+                "ngram_range": list(self.ngram_range),
+                "relevance_cutoff": self.relevance_cutoff,
+                "doc_counts": self._doc_counts,
+                "feature_counts": {k: dict(v) for k, v in self._feature_counts.items()},
+                "type_counts": {k: dict(v) for k, v in self._type_counts.items()},
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path = DEFAULT_MODEL_PATH,
+        manifest: Optional[DocumentManifest] = None,
+        **kwargs
+    ) -> "LexicalPreTriage":
+        """保存した学習状態を読み込む.
+
+        保存済みモデルがなければFew-shotサンプルと、``manifest`` があれば
+        過去のトリアージ結果で初期学習する。
+        """
+        if not path.exists():
+            logger.info(f"事前判定モデルがないため初期学習します: {path}")
+            model = cls.from_examples(**kwargs)
+            if manifest is not None:
+                model.fit(training_samples_from_manifest(manifest))
+            return model
+
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(
+            relevance_cutoff=data["relevance_cutoff"],
+            ngram_range=tuple(data["ngram_range"]),
+            **kwargs
+        )
+        model._doc_counts = data["doc_counts"]
+        model._feature_counts = {
+            k: Counter(v) for k, v in data["feature_counts"].items()
+        }
+        model._type_counts = {k: Counter(v) for k, v in data["type_counts"].items()}
+        logger.info(
+            f"事前判定モデル読み込み: {path} ({sum(model._doc_counts.values())}文書)"
+        )
+        return model
+
+
+def training_samples_from_examples(
+    examples: List[lx.data.ExampleData],
+) -> List[TrainingSample]:
+    """トリアージ用Few-shotサンプルを学習サンプルに変換する."""
+    samples = []
+    for example in examples:
+        score = None
+        document_type = None
+        for extraction in example.extractions:
+            if extraction.extraction_class == "relevance_score":
+                score = float(extraction.extraction_text)
+            elif extraction.extraction_class == "document_type":
+                document_type = extraction.extraction_text
+        if score is not None:
+            samples.append((example.text, score, document_type))
+    return samples
+
+
+def training_samples_from_manifest(
+    manifest: DocumentManifest,
+) -> Iterable[TrainingSample]:
+    """マニフェストに記録された過去のLLMトリアージ結果を学習サンプルとして返す."""
+    for doc_path, entry in manifest.items():
+        result = entry["result"]
+        if result.get("triage_source", "llm") not in ("llm", "fused"):
+            continue
+        try:
+            text = Path(doc_path).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        yield text, result["relevance_score"], result.get("document_type")
+
+
+def _first_line(text: str, max_chars: int = 100) -> str:
+    """要約の代わりに使う最初の非空行（見出し記号は除く）."""
+    for raw_line in text.splitlines():
+        line = raw_line.strip().lstrip("#").strip()
+        if line:
+            return line[:max_chars]
+    return ""
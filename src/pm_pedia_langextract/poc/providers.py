@@ -0,0 +1,355 @@
+"""Pluggable model providers with cassette record/replay for offline runs."""
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import langextract as lx
+from langextract import factory
+from langextract.core import base_model
+from langextract.core import types as lx_types
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 未記録のプロンプトに返す決定的な応答（抽出なし）
+FALLBACK_OUTPUT = json.dumps({"extractions": []})
+
+
+def prompt_key(model_id: str, prompt: str) -> str:
+    """カセット内でプロンプトを識別するキー."""
+    return hashlib.sha256(f"{model_id}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """プロンプトと応答の組をJSONLで保存する.
+
+    1行1呼び出しで ``key`` / ``model_id`` / ``output`` / ``latency`` /
+    ``fence_output`` を持つ。同じプロンプトの記録が複数あれば再生時に順番に返す。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+            logger.info(f"カセット読み込み: {self.path} ({len(self)}件)")
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """記録を1件追加し、ファイルに追記する."""
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def next_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """キーに対応する記録を順番に返す（なければNone）."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            # 追記された記録も巡回に含めるため、その都度の件数で剰余をとる
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[cursor % len(entries)]
+
+    def latencies(self, model_id: Optional[str] = None) -> List[float]:
+        """記録されたレイテンシの一覧."""
+        with self._lock:
+            return [
+                entry["latency"]
+                for entries in self._entries.values()
+                for entry in entries
+                if model_id is None or entry["model_id"] == model_id
+            ]
+
+    def fence_output(self, model_id: str) -> Optional[bool]:
+        """モデルの記録時のフェンス出力設定（記録がなければNone）."""
+        with self._lock:
+            for entries in self._entries.values():
+                for entry in entries:
+                    if entry["model_id"] == model_id:
+                        return entry.get("fence_output")
+        return None
+
+
+@dataclass
+class LatencyModel:
+    """再生時のレイテンシの与え方.
+
+    ``median`` を指定すると対数正規分布（``sigma``）から、指定しなければ
+    記録されたレイテンシ（未記録のプロンプトは記録済みの中央値）を使う。
+    ``scale`` を掛けた秒数だけ待つ（0で待たない）。
+    """
+
+    median: Optional[float] = None
+    sigma: float = 0.5
+    scale: float = 1.0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        """乱数生成器を初期化する."""
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def sample(self, recorded: Optional[float], fallback: float) -> float:
+        """1リクエスト分の待ち時間（秒）を返す."""
+        if self.median is not None:
+            with self._lock:
+                latency = self.median * self._rng.lognormvariate(0.0, self.sigma)
+        else:
+            latency = recorded if recorded is not None else fallback
+        return latency * self.scale
+
+
+class ModelProvider:
+    """抽出器が ``lx.extract`` に渡すモデルを決める.
+
+    既定（ライブ）では None を返し、LangExtractが ``model_id`` からモデルを作る。
+    """
+
+    name = "live"
+
+    @property
+    def cache_tag(self) -> Optional[str]:
+        """抽出キャッシュのキーに加えるタグ（ライブ結果と混ざらないように）."""
+        return None
+
+    @property
+    def use_cache(self) -> bool:
+        """抽出キャッシュを使うか（Falseなら毎回モデルを呼び出す）."""
+        return True
+
+    def create_model(
+        self,
+        model_id: str,
+        examples: Sequence[lx.data.ExampleData],
+        max_workers: int,
+    ) -> Optional[base_model.BaseLanguageModel]:
+        """``lx.extract`` の ``model`` 引数に渡すモデルを返す（Noneで既定）."""
+        return None
+
+
+class RecordingModel(base_model.BaseLanguageModel):
+    """実モデルへの呼び出しをカセットに記録するラッパー."""
+
+    def __init__(
+        self,
+        inner: base_model.BaseLanguageModel,
+        cassette: Cassette,
+        model_id: str,
+        max_workers: int = 1,
+    ):
+        super().__init__()
+        self._inner = inner
+        self._cassette = cassette
+        self._model_id = model_id
+        self._max_workers = max(1, max_workers)
+        self._schema = inner.schema
+        self.set_fence_output(inner.requires_fence_output)
+
+    def infer(
+        self, batch_prompts: Sequence[str], **kwargs: Any
+    ) -> Iterator[Sequence[lx_types.ScoredOutput]]:
+        """バッチをそのまま実モデルに送り、プロンプトごとに応答とレイテンシを記録する.
+
+        実モデルは最大 ``max_workers`` 並列で処理するので、バッチ開始から応答までの
+        時間を、その応答までに順に処理された組の数で割って1リクエスト分とする。
+        """
+        start = time.monotonic()
+        responses = self._inner.infer(batch_prompts, **kwargs)
+        for index, (prompt, response) in enumerate(
+            zip(batch_prompts, responses, strict=True)
+        ):
+            outputs = list(response)
+            rounds = math.ceil((index + 1) / self._max_workers)
+            latency = (time.monotonic() - start) / rounds
+            self._cassette.append({
+                "key": prompt_key(self._model_id, prompt),
+                "model_id": self._model_id,
+                "output": outputs[0].output if outputs else None,
+                "latency": round(latency, 4),
+                "fence_output": self.requires_fence_output,
+            })
+            yield outputs
+
+
+class RecordingProvider(ModelProvider):
+    """実モデルを呼び出しつつ、プロンプトと応答をカセットに記録する.
+
+    キャッシュに当たった呼び出しはカセットに残らないため、記録中はキャッシュを使わない。
+    """
+
+    name = "record"
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    @property
+    def use_cache(self) -> bool:
+        """すべての呼び出しを記録するため、キャッシュを通さない."""
+        return False
+
+    def create_model(
+        self,
+        model_id: str,
+        examples: Sequence[lx.data.ExampleData],
+        max_workers: int,
+    ) -> Optional[base_model.BaseLanguageModel]:
+        """``lx.extract`` が作るのと同じ設定の実モデルを記録用に包む."""
+        inner = factory.create_model(
+            factory.ModelConfig(
+                model_id=model_id, provider_kwargs={"max_workers": max_workers}
+            ),
+            examples=list(examples),
+            use_schema_constraints=True,
+        )
+        return RecordingModel(inner, self.cassette, model_id, max_workers)
+
+
+class ReplayModel(base_model.BaseLanguageModel):
+    """カセットの応答を返し、レイテンシを再現するオフラインモデル."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        model_id: str,
+        latency: LatencyModel,
+        max_workers: int,
+        fallback_output: str,
+        stats: "ReplayProvider",
+    ):
+        super().__init__()
+        self._cassette = cassette
+        self._model_id = model_id
+        self._latency = latency
+        self._max_workers = max(1, max_workers)
+        self._fallback_output = fallback_output
+        self._stats = stats
+        recorded = sorted(cassette.latencies(model_id))
+        self._median_latency = recorded[len(recorded) // 2] if recorded else 0.0
+        fence = cassette.fence_output(model_id)
+        self.set_fence_output(bool(fence))
+
+    def infer(
+        self, batch_prompts: Sequence[str], **kwargs: Any
+    ) -> Iterator[Sequence[lx_types.ScoredOutput]]:
+        """バッチ内のプロンプトを最大 ``max_workers`` 並列で再生する."""
+        if len(batch_prompts) == 1 or self._max_workers == 1:
+            for prompt in batch_prompts:
+                yield self._replay(prompt)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(batch_prompts))
+        ) as pool:
+            yield from pool.map(self._replay, batch_prompts)
+
+    def _replay(self, prompt: str) -> List[lx_types.ScoredOutput]:
+        entry = self._cassette.next_entry(prompt_key(self._model_id, prompt))
+        self._stats._count(hit=entry is not None)
+
+        if entry is not None:
+            output = entry["output"]
+            delay = self._latency.sample(entry["latency"], self._median_latency)
+        else:
+            output = self._fallback_output
+            if self.requires_fence_output:
+                output = f"```json\n{output}\n```"
+            delay = self._latency.sample(None, self._median_latency)
+
+        if delay > 0:
+            time.sleep(delay)
+        return [lx_types.ScoredOutput(score=1.0, output=output)]
+
+
+class ReplayProvider(ModelProvider):
+    """カセットから応答を再生するプロバイダー（APIキー・ネットワーク不要）.
+
+    未記録のプロンプトには ``fallback_output`` を決定的に返す。
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: Optional[LatencyModel] = None,
+        fallback_output: str = FALLBACK_OUTPUT,
+    ):
+        self.cassette = cassette
+        self.latency = latency or LatencyModel()
+        self.fallback_output = fallback_output
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_tag(self) -> Optional[str]:
+        """再生結果は実モデルの結果とは別にキャッシュする."""
+        return f"replay:{self.cassette.path}"
+
+    def create_model(
+        self,
+        model_id: str,
+        examples: Sequence[lx.data.ExampleData],
+        max_workers: int,
+    ) -> Optional[base_model.BaseLanguageModel]:
+        """カセットを再生するモデルを返す."""
+        return ReplayModel(
+            self.cassette,
+            model_id,
+            self.latency,
+            max_workers,
+            self.fallback_output,
+            self,
+        )
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        """再生したプロンプトの一致・不一致の件数."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_default_provider: ModelProvider = ModelProvider()
+_default_lock = threading.Lock()
+
+
+def get_model_provider() -> ModelProvider:
+    """プロセス共有のモデルプロバイダーを返す."""
+    with _default_lock:
+        return _default_provider
+
+
+def configure_model_provider(provider: ModelProvider) -> ModelProvider:
+    """プロセス共有のモデルプロバイダーを差し替える."""
+    global _default_provider
+    with _default_lock:
+        _default_provider = provider
+        return _default_provider
@@ -0,0 +1,277 @@
+"""Process-wide rate limiting and adaptive concurrency for model calls."""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# LangExtractの既定チャンクサイズ（max_char_buffer未指定時）
+DEFAULT_CHUNK_CHARS = 1000
+
+
+class TokenBucket:
+    """一定レートで補充されるトークンバケット.
+
+    ``acquire`` は先にトークンを予約してから不足分だけ待つため、
+    待っているスレッド間でも到着順に公平に払い出される。容量を超える要求も
+    全量を差し引き、残高をマイナス（借り）にして返済できるまで待つ。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        if self.capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """``amount`` 個のトークンを取得し、待った秒数を返す."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """エラーとレイテンシに応じて同時実行数を増減させる（AIMD）.
+
+    成功するたびに上限を ``1/limit`` ずつ（上限1つ分の呼び出しごとに+1）増やし、
+    エラー、またはレイテンシがこれまでの基準値の ``latency_tolerance`` 倍を
+    超えたときは ``backoff`` 倍に減らす。基準値は呼び出しの種類（``kind``）ごとに
+    持ち、短いトリアージの呼び出しが長い抽出の呼び出しの基準にならないようにする。
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 16,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.5,
+    ):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                "concurrency must satisfy 1 <= minimum <= initial <= maximum"
+            )
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self._limit = float(initial)
+        self._active = 0
+        self._baselines: Dict[Hashable, float] = {}
+        self._condition = threading.Condition()
+
+        self.errors = 0
+        self.slowdowns = 0
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限."""
+        return int(self._limit)
+
+    @property
+    def active(self) -> int:
+        """実行中の同時実行数."""
+        return self._active
+
+    def acquire(self, wanted: int = 1) -> int:
+        """最大 ``wanted`` 個の枠を確保し、確保した数を返す（最低1）."""
+        with self._condition:
+            while True:
+                granted = max(1, min(wanted, self.limit))
+                if self._active + granted <= self.limit:
+                    self._active += granted
+                    return granted
+                self._condition.wait()
+
+    def release(
+        self,
+        granted: int,
+        latency: Optional[float] = None,
+        error: bool = False,
+        kind: Hashable = None,
+    ) -> None:
+        """枠を返却し、結果に応じて上限を調整する.
+
+        Args:
+            granted: ``acquire`` で確保した数
+            latency: 1リクエストあたりのレイテンシ（秒）
+            error: 呼び出しが失敗したか
+            kind: レイテンシの基準値を分ける呼び出しの種類（抽出器・モデルなど）
+        """
+        with self._condition:
+            self._active -= granted
+            if error:
+                self.errors += 1
+                self._decrease()
+            elif latency is not None:
+                # 基準値はゆっくり上に追従させ、提供側の恒常的な遅延には適応する
+                baseline = self._baselines.get(kind)
+                baseline = (
+                    latency if baseline is None else min(latency, baseline * 1.01)
+                )
+                self._baselines[kind] = baseline
+                if latency > baseline * self.latency_tolerance:
+                    self.slowdowns += 1
+                    self._decrease()
+                else:
+                    self._limit = min(
+                        float(self.maximum), self._limit + 1.0 / self._limit
+                    )
+            self._condition.notify_all()
+
+    def _decrease(self) -> None:
+        previous = self.limit
+        self._limit = max(float(self.minimum), self._limit * self.backoff)
+        if self.limit < previous:
+            logger.info(f"同時実行数を縮小: {previous} -> {self.limit}")
+
+
+class ModelCallLimiter:
+    """全抽出器で共有するモデル呼び出しのリミッター.
+
+    リクエスト数/秒と文字数/秒のトークンバケットでレートを抑え、
+    :class:`AdaptiveConcurrency` で同時リクエスト数を調整する。
+    レートを None にした項目は制限しない。
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        chars_per_second: Optional[float] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._clock = clock
+        self.requests = (
+            TokenBucket(requests_per_second, clock=clock, sleep=sleep)
+            if requests_per_second is not None
+            else None
+        )
+        self.chars = (
+            TokenBucket(chars_per_second, clock=clock, sleep=sleep)
+            if chars_per_second is not None
+            else None
+        )
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency, min_concurrency, max_concurrency
+        )
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited_seconds = 0.0
+
+    @contextmanager
+    def request(
+        self,
+        chars: int,
+        requests: int = 1,
+        max_workers: int = 1,
+        kind: Hashable = None,
+    ) -> Iterator[int]:
+        """1回の ``lx.extract`` 呼び出し分の枠とレートを確保する.
+
+        Args:
+            chars: 送信する文字数（パス数込み）
+            requests: 見込みのリクエスト数（チャンク数×パス数）
+            max_workers: 呼び出し側が希望する並列数
+            kind: レイテンシの基準値を分ける呼び出しの種類
+
+        Yields:
+            int: 実際に使ってよい並列数（``lx.extract`` の max_workers）
+        """
+        granted = self.concurrency.acquire(max_workers)
+        waited = 0.0
+        try:
+            if self.requests is not None:
+                waited += self.requests.acquire(requests)
+            if self.chars is not None:
+                waited += self.chars.acquire(chars)
+        except BaseException:
+            self.concurrency.release(granted)
+            raise
+
+        start = self._clock()
+        try:
+            yield granted
+        except BaseException:
+            self.concurrency.release(granted, error=True)
+            raise
+        else:
+            latency = (self._clock() - start) / max(1, math.ceil(requests / granted))
+            self.concurrency.release(granted, latency=latency, kind=kind)
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.waited_seconds += waited
+
+    def stats(self) -> Dict[str, Any]:
+        """呼び出し数・待ち時間・現在の同時実行数上限を返す."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "concurrency_limit": self.concurrency.limit,
+                "errors": self.concurrency.errors,
+                "slowdowns": self.concurrency.slowdowns,
+            }
+
+
+_default_limiter: Optional[ModelCallLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> ModelCallLimiter:
+    """プロセス共有のリミッターを返す（未設定なら既定値で作る）."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = ModelCallLimiter()
+        return _default_limiter
+
+
+def configure_rate_limiter(**kwargs: Any) -> ModelCallLimiter:
+    """プロセス共有のリミッターを指定の設定で作り直す.
+
+    個別のリミッターを渡されていない抽出器は、以降の呼び出しからこれを使う。
+    """
+    global _default_limiter
+    with _default_lock:
+        _default_limiter = ModelCallLimiter(**kwargs)
+        return _default_limiter
+
+
+def estimate_requests(
+    chars: int, max_char_buffer: Optional[int], extraction_passes: int
+) -> int:
+    """``lx.extract`` 1回で発生するリクエスト数の見込み（チャンク数×パス数）."""
+    chunk_chars = max_char_buffer or DEFAULT_CHUNK_CHARS
+    return max(1, math.ceil(chars / chunk_chars)) * extraction_passes
@@ -0,0 +1,271 @@
+"""Deferred HTML reports for Phase 1 snippet outputs."""
+
+import argparse
+import hashlib
+import html
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import langextract as lx
+from langextract import data_lib
+
+from pm_pedia_langextract.poc.shards import open_snippet_source
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path("data/output/phase1")
+REPORT_DIRNAME = "report"
+STATE_FILENAME = "report_state.json"
+
+# 同じ出力ディレクトリのレポートを複数スレッドで同時に作らない
+_build_lock = threading.Lock()
+
+
+class ReportState:
+    """生成済みレポートの元になった出力の識別子を保存する."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._data: Dict[str, Any] = {"documents": {}, "index": None}
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    self._data.update(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"レポート状態を読み込めないため作り直します: {e}")
+
+    def is_current(self, name: str, key: str) -> bool:
+        """``name`` が ``key`` の元データから生成済みか（``index`` はインデックス）."""
+        if name == "index":
+            return self._data["index"] == key
+        return self._data["documents"].get(name) == key
+
+    def mark(self, name: str, key: str) -> None:
+        """``name`` を ``key`` の元データから生成したことを記録する."""
+        if name == "index":
+            self._data["index"] = key
+        else:
+            self._data["documents"][name] = key
+
+    def save(self) -> None:
+        """状態をアトミックに書き出す."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_text(self.path, json.dumps(self._data, ensure_ascii=False, indent=2))
+
+
+def _write_text(path: Path, content: str) -> None:
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        f.write(content)
+    temp_path.replace(path)
+
+
+def html_name(document: str) -> str:
+    """文書の可視化HTMLのファイル名（サブディレクトリは ``__`` でつなぐ）."""
+    return "__".join(Path(document).with_suffix("").parts) + ".html"
+
+
+def render_document(
+    output_dir: Path,
+    document: str,
+    report_dir: Optional[Path] = None,
+    force: bool = False,
+) -> Path:
+    """1文書の可視化HTMLを ``lx.visualize`` で生成する（抽出結果が未変更なら再利用）.
+
+    Args:
+        output_dir: フェーズ1の出力ディレクトリ
+        document: 文書名（入力ルートからの相対パス）
+        report_dir: 出力先（省略時は ``output_dir/report``）
+        force: 未変更でも作り直すか
+
+    Returns:
+        Path: 可視化HTMLのパス
+    """
+    result = open_snippet_source(output_dir).read(document)
+    if result is None:
+        raise FileNotFoundError(f"フェーズ1の出力に文書がありません: {document}")
+
+    report_dir = report_dir or output_dir / REPORT_DIRNAME
+    html_path = report_dir / html_name(document)
+    key = hashlib.sha256(
+        json.dumps(data_lib.annotated_document_to_dict(result), sort_keys=True).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+    with _build_lock:
+        state = ReportState(report_dir / STATE_FILENAME)
+        if not force and html_path.exists() and state.is_current(document, key):
+            logger.info(f"可視化HTMLは最新です: {html_path}")
+            return html_path
+
+        report_dir.mkdir(parents=True, exist_ok=True)
+        _write_text(html_path, str(lx.visualize(result)))
+        state.mark(document, key)
+        state.save()
+    logger.info(f"可視化HTML: {html_path}")
+    return html_path
+
+
+def _page_name(page: int) -> str:
+    return "index.html" if page == 1 else f"index_{page}.html"
+
+
+def _render_entry(document: str, data: Dict[str, Any]) -> str:
+    extractions = data.get("extractions") or []
+    items = "\n".join(
+        f'<li><span class="cls">{html.escape(e.get("extraction_class") or "")}</span> '
+        f"{html.escape(e.get('extraction_text') or '')}</li>"
+        for e in extractions
+    )
+    name = html.escape(document)
+    return (
+        f"<section><h2>{name} <small>({len(extractions)}件)</small></h2>\n"
+        "<p><code>python -m pm_pedia_langextract.poc.report"
+        f" --document {name}</code> で"
+        f' 可視化HTML (<a href="{html.escape(html_name(document))}">'
+        f"{html.escape(html_name(document))}</a>) を生成</p>\n"
+        f"<ul>\n{items}\n</ul></section>"
+    )
+
+
+def _render_page(sections: Sequence[str], page: int, pages: int, total: int) -> str:
+    links = " ".join(
+        f"<strong>{p}</strong>" if p == page else f"<a href=\"{_page_name(p)}\">{p}</a>"
+        for p in range(1, pages + 1)
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="ja"><head><meta charset="utf-8">'
+        f"<title>Phase 1 スニペット ({page}/{pages})</title>"
+        "<style>body{font-family:sans-serif;margin:2em}"
+        ".cls{font-weight:bold;margin-right:.5em}nav{margin:1em 0}</style>"
+        "</head><body>\n"
+        f"<h1>Phase 1 スニペット</h1><p>{total}文書</p>\n"
+        f"<nav>{links}</nav>\n"
+        + "\n".join(sections)
+        + f"\n<nav>{links}</nav>\n</body></html>\n"
+    )
+
+
+def build_index(
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    report_dir: Optional[Path] = None,
+    page_size: int = 50,
+    force: bool = False,
+) -> List[Path]:
+    """フェーズ1の出力からページ分割したインデックスHTMLを生成する.
+
+    インデックスは抽出の一覧だけを載せ、``lx.visualize`` による文書ごとの
+    HTMLは :func:`render_document` で必要な文書だけ生成する。出力が前回から
+    変わっていなければ何もしない。ページは出力を読みながら1つずつ書き出す。
+
+    Args:
+        output_dir: フェーズ1の出力ディレクトリ
+        report_dir: 出力先（省略時は ``output_dir/report``）
+        page_size: 1ページに載せる文書数
+        force: 未変更でも作り直すか
+
+    Returns:
+        List[Path]: インデックスページのパス
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+    report_dir = report_dir or output_dir / REPORT_DIRNAME
+    source = open_snippet_source(output_dir)
+    total = len(source)
+    pages = max(1, (total + page_size - 1) // page_size)
+    page_paths = [report_dir / _page_name(p) for p in range(1, pages + 1)]
+    key = hashlib.sha256(
+        f"{source.fingerprint()}:{page_size}".encode("utf-8")
+    ).hexdigest()
+
+    with _build_lock:
+        state = ReportState(report_dir / STATE_FILENAME)
+        if (
+            not force
+            and state.is_current("index", key)
+            and all(p.exists() for p in page_paths)
+        ):
+            logger.info(f"レポートは最新です: {page_paths[0]}")
+            return page_paths
+
+        report_dir.mkdir(parents=True, exist_ok=True)
+        sections: List[str] = []
+        page = 1
+        for document, data in source.iter_records():
+            sections.append(_render_entry(document, data))
+            if len(sections) == page_size:
+                _write_text(
+                    page_paths[page - 1], _render_page(sections, page, pages, total)
+                )
+                sections, page = [], page + 1
+        if sections or page == 1:
+            _write_text(
+                page_paths[page - 1], _render_page(sections, page, pages, total)
+            )
+        # 以前より文書が減った場合の余分なページを消す
+        for stale in report_dir.glob("index_*.html"):
+            if stale not in page_paths:
+                stale.unlink()
+        state.mark("index", key)
+        state.save()
+
+    logger.info(f"レポートを生成: {page_paths[0]} ({total}文書, {pages}ページ)")
+    return page_paths
+
+
+def start_background_index(
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    page_size: int = 50,
+) -> threading.Thread:
+    """:func:`build_index` をバックグラウンドスレッドで開始する."""
+
+    def run() -> None:
+        try:
+            build_index(output_dir, page_size=page_size)
+        except Exception:
+            logger.error("レポート生成でエラー", exc_info=True)
+
+    thread = threading.Thread(target=run, name="phase1-report")
+    thread.start()
+    return thread
+
+
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Phase 1 出力のHTMLレポート")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help="フェーズ1の出力ディレクトリ",
+    )
+    parser.add_argument(
+        "--document",
+        default=None,
+        help=(
+            "この文書だけ lx.visualize の可視化HTMLを生成する"
+            "（入力ルートからの相対パス）"
+        ),
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=50, help="インデックス1ページの文書数"
+    )
+    parser.add_argument("--force", action="store_true", help="未変更でも作り直す")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """CLIエントリポイント."""
+    args = _parse_args(argv)
+    if args.document is not None:
+        render_document(args.output_dir, args.document, force=args.force)
+    else:
+        build_index(args.output_dir, page_size=args.page_size, force=args.force)
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
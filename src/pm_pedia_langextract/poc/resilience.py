@@ -0,0 +1,245 @@
+"""Retries with jittered backoff and hedged requests for model calls."""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, TypeVar
+
+from langextract import exceptions as lx_exceptions
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 再試行で回復が見込める例外（API・ネットワークの一時的な失敗や不完全な出力）
+TRANSIENT_ERRORS = (
+    lx_exceptions.InferenceRuntimeError,
+    lx_exceptions.InferenceOutputError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def is_transient(error: BaseException) -> bool:
+    """一時的な失敗とみなせる例外か."""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+@dataclass
+class RetryPolicy:
+    """再試行の設定（Full Jitter の指数バックオフ）."""
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def __post_init__(self) -> None:
+        """設定値を検証する."""
+        if self.max_attempts <= 0:
+            raise ValueError("max_attempts must be positive")
+
+    def backoff(self, attempt: int, rng: random.Random) -> float:
+        """``attempt`` 回目の失敗後に待つ秒数を返す."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return rng.uniform(0.0, ceiling)
+
+
+class LatencyWindow:
+    """直近の呼び出しレイテンシを保持し、パーセンタイルを返す."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        """レイテンシを1件記録する."""
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """``q`` パーセンタイル（0-100）を返す（サンプルがなければNone）."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, round(q / 100 * (len(samples) - 1)))
+        return samples[index]
+
+
+class ResilientCaller:
+    """モデル呼び出しを再試行し、必要ならヘッジ要求を出す.
+
+    一時的な失敗（:data:`TRANSIENT_ERRORS`）は :class:`RetryPolicy` に従って
+    再試行する。``hedge`` を有効にすると、呼び出しが同じ種類の呼び出しの
+    p95レイテンシを超えた時点で同じ要求をもう1本出し、先に成功した方を使う。
+    先行要求が後から完了した時点で、ヘッジで短縮できた時間を集計する。
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        window_size: int = 200,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.window_size = window_size
+        self._rng = rng or random.Random()
+        self._clock = clock
+        self._sleep = sleep
+        self._windows: Dict[Hashable, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.tail_saved_seconds = 0.0
+
+    def call(self, fn: Callable[[], T], key: Hashable = None) -> T:
+        """``fn`` を実行し、一時的な失敗なら再試行する.
+
+        Args:
+            fn: モデル呼び出し（引数なし）
+            key: レイテンシを集計する呼び出しの種類（ヘッジ判定に使う）
+
+        Returns:
+            ``fn`` の戻り値
+        """
+        with self._lock:
+            self.calls += 1
+
+        for attempt in range(1, self.policy.max_attempts + 1):
+            try:
+                return self._call_once(fn, key)
+            except Exception as e:
+                if not is_transient(e) or attempt == self.policy.max_attempts:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = self.policy.backoff(attempt, self._rng)
+                logger.warning(
+                    f"モデル呼び出しが失敗したため再試行します "
+                    f"({attempt}/{self.policy.max_attempts}, {delay:.1f}秒後): {e}"
+                )
+                with self._lock:
+                    self.retries += 1
+                self._sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    def _window(self, key: Hashable) -> LatencyWindow:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = LatencyWindow(self.window_size)
+            return window
+
+    def _call_once(self, fn: Callable[[], T], key: Hashable) -> T:
+        window = self._window(key)
+        threshold = (
+            window.percentile(self.hedge_percentile)
+            if self.hedge and len(window) >= self.hedge_min_samples
+            else None
+        )
+
+        start = self._clock()
+        if threshold is None:
+            result = fn()
+            window.record(self._clock() - start)
+            return result
+
+        executor = self._hedge_executor()
+        primary = executor.submit(fn)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            window.record(self._clock() - start)
+            return primary.result()
+
+        logger.debug(f"p95 ({threshold:.2f}秒) を超えたためヘッジ要求を送信")
+        with self._lock:
+            self.hedged += 1
+        hedge = executor.submit(fn)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                elapsed = self._clock() - start
+                window.record(elapsed)
+                if future is hedge:
+                    self._account_hedge_win(primary, start, elapsed)
+                return future.result()
+
+        # 両方失敗した場合は先行要求の例外を再試行判定に回す
+        return primary.result()
+
+    def _account_hedge_win(self, primary: Future, start: float, won_at: float) -> None:
+        """先行要求が後で完了した時点で、ヘッジによる短縮時間を加算する."""
+        with self._lock:
+            self.hedge_wins += 1
+
+        def on_done(future: Future) -> None:
+            if future.exception() is None:
+                saved = self._clock() - start - won_at
+                with self._lock:
+                    self.tail_saved_seconds += max(0.0, saved)
+
+        primary.add_done_callback(on_done)
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        """再試行・ヘッジの集計を返す."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "tail_saved_seconds": round(self.tail_saved_seconds, 3),
+            }
+
+
+_default_caller: Optional[ResilientCaller] = None
+_default_lock = threading.Lock()
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """プロセス共有の :class:`ResilientCaller` を返す（未設定なら既定値で作る）."""
+    global _default_caller
+    with _default_lock:
+        if _default_caller is None:
+            _default_caller = ResilientCaller()
+        return _default_caller
+
+
+def configure_resilience(**kwargs: Any) -> ResilientCaller:
+    """プロセス共有の :class:`ResilientCaller` を指定の設定で作り直す."""
+    global _default_caller
+    with _default_lock:
+        _default_caller = ResilientCaller(**kwargs)
+        return _default_caller
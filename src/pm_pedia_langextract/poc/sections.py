@@ -0,0 +1,118 @@
+"""Markdown section splitting with character offsets."""
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.*?)[ \t#]*$", re.MULTILINE)
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+
+
+@dataclass(frozen=True)
+class Section:
+    """テキスト中の1セクション（[start, end) の文字範囲）."""
+
+    start: int
+    end: int
+    heading: str
+    level: int
+
+    def text(self, source: str) -> str:
+        """元テキストからセクション本文を切り出す."""
+        return source[self.start:self.end]
+
+
+def split_sections(text: str, max_chars: int = 1500) -> List[Section]:
+    """Markdownの見出し単位でテキストを分割する.
+
+    見出し前の前置き部分は level 0 のセクションになる。``max_chars`` を超える
+    セクションは空行（段落境界）でさらに分割する。セクションを連結すると
+    元のテキストに戻る。
+
+    Args:
+        text: 分割対象テキスト
+        max_chars: 1セクションの目安となる最大文字数
+
+    Returns:
+        List[Section]: 先頭から順に並んだセクション
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    boundaries = [(0, "", 0)]
+    for match in HEADING_PATTERN.finditer(text):
+        if match.start() == 0:
+            boundaries[0] = (0, match.group(2), len(match.group(1)))
+        else:
+            boundaries.append((match.start(), match.group(2), len(match.group(1))))
+
+    sections: List[Section] = []
+    for i, (start, heading, level) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+        if end <= start:
+            continue
+        sections.extend(
+            _split_long_section(text, start, end, heading, level, max_chars)
+        )
+
+    return sections
+
+
+def _split_long_section(
+    text: str, start: int, end: int, heading: str, level: int, max_chars: int
+) -> List[Section]:
+    """長いセクションを段落境界で ``max_chars`` 程度のチャンクに分ける."""
+    if end - start <= max_chars:
+        return [Section(start, end, heading, level)]
+
+    cut_points = [m.end() for m in PARAGRAPH_BREAK.finditer(text, start, end)]
+    chunks: List[Section] = []
+    chunk_start = start
+    last_cut = start
+    for cut in [*cut_points, end]:
+        if cut - chunk_start > max_chars and last_cut > chunk_start:
+            chunks.append(Section(chunk_start, last_cut, heading, level))
+            chunk_start = last_cut
+        last_cut = cut
+    chunks.append(Section(chunk_start, end, heading, level))
+    return chunks
+
+
+def build_outline(text: str, section_chars: int = 300) -> str:
+    """見出し構造と各トップレベルセクションの冒頭だけを残した抜粋を作る.
+
+    すべての見出し行を残し、前置き・タイトル・トップレベルのセクションは
+    本文の先頭 ``section_chars`` 文字も含める。下位セクションは見出しのみ。
+    最上位の見出しが1つだけならタイトルとみなし、その次のレベルをトップレベルとする。
+
+    Args:
+        text: 元のテキスト
+        section_chars: トップレベルセクションごとに残す本文の文字数
+
+    Returns:
+        str: 抜粋テキスト
+    """
+    if section_chars <= 0:
+        raise ValueError("section_chars must be positive")
+
+    sections = split_sections(text, max_chars=len(text) + 1)
+    levels = sorted(s.level for s in sections if s.level > 0)
+    top_level = levels[0] if levels else 0
+    if len(levels) > 1 and levels[1] > levels[0]:
+        top_level = levels[1]
+
+    parts = []
+    for section in sections:
+        body = section.text(text)
+        heading = ""
+        if section.level > 0:
+            heading, _, body = body.partition("\n")
+        body = body.strip()
+        if section.level > top_level:
+            parts.append(heading)
+            continue
+        if len(body) > section_chars:
+            body = body[:section_chars].rstrip() + "…"
+        parts.append("\n".join(p for p in (heading, body) if p))
+
+    return "\n\n".join(p for p in parts if p)
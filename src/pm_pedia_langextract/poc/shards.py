@@ -0,0 +1,521 @@
+"""Sharded JSONL storage for Phase 1 snippet outputs."""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any, Collection, Dict, Iterator, List, Optional, Tuple
+
+import langextract as lx
+from langextract import data_lib
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SHARD_MANIFEST_NAME = "shards_manifest.json"
+SHARD_INDEX_NAME = "shards_index.jsonl"
+SHARD_PREFIX = "snippets"
+DEFAULT_MAX_SHARD_BYTES = 64 * 1024 * 1024
+# 上書きされた古いレコードがこの割合を超えたら閉じるときに詰め直す
+DEFAULT_COMPACT_RATIO = 0.5
+DEFAULT_COMPACT_MIN_BYTES = 16 * 1024 * 1024
+# 旧形式（1文書1ファイル）の出力
+LEGACY_SNIPPET_GLOB = "*_snippets.jsonl"
+
+
+@dataclass(frozen=True)
+class ShardLocation:
+    """シャード内の1文書分のレコードの位置."""
+
+    shard: str
+    offset: int
+    length: int
+
+
+def _encode_record(document: str, result: lx.data.AnnotatedDocument) -> bytes:
+    record = {"document": document, **data_lib.annotated_document_to_dict(result)}
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _digest(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()[:16]
+
+
+def _shard_name(number: int) -> str:
+    return f"{SHARD_PREFIX}-{number:05d}.jsonl"
+
+
+def _next_shard_number(shards: List[Dict[str, Any]]) -> int:
+    """詰め直しで番号が飛ぶため、最後のシャード名の次の番号を使う."""
+    if not shards:
+        return 0
+    return int(Path(shards[-1]["name"]).stem.rsplit("-", 1)[-1]) + 1
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {"version": 1, "shards": [], "index_bytes": 0}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _index_name(manifest: Dict[str, Any]) -> str:
+    return manifest.get("index", SHARD_INDEX_NAME)
+
+
+def _load_index(path: Path, committed_bytes: int) -> Dict[str, Dict[str, Any]]:
+    """確定済みの範囲の文書インデックスを1行ずつ読む（後の行が優先）."""
+    documents: Dict[str, Dict[str, Any]] = {}
+    if committed_bytes == 0 or not path.exists():
+        return documents
+    remaining = committed_bytes
+    with path.open("rb") as f:
+        for line in f:
+            if remaining <= 0:
+                break
+            remaining -= len(line)
+            entry = json.loads(line)
+            documents[entry.pop("document")] = entry
+    return documents
+
+
+def _iter_live_lines(
+    directory: Path, manifest: Dict[str, Any], live: Dict[Tuple[str, int], str]
+) -> Iterator[Tuple[str, bytes]]:
+    """``live`` にある (シャード, オフセット) の行を (文書名, 行) でシャード順に返す."""
+    for shard in manifest["shards"]:
+        offset = 0
+        with (directory / shard["name"]).open("rb") as f:
+            for line in f:
+                if offset >= shard["bytes"]:
+                    break
+                document = live.get((shard["name"], offset))
+                offset += len(line)
+                if document is not None:
+                    yield document, line
+
+
+def _read_record(
+    directory: Path, entry: Dict[str, Any]
+) -> lx.data.AnnotatedDocument:
+    with (directory / entry["shard"]).open("rb") as f:
+        f.seek(entry["offset"])
+        data = json.loads(f.read(entry["length"]))
+    data.pop("document", None)
+    return data_lib.dict_to_annotated_document(data)
+
+
+def _fsync_close(f: IO[bytes]) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+class ShardWriter:
+    """文書ごとの抽出結果をサイズで切り替わるJSONLシャードに追記する.
+
+    各文書は1行（1回の ``write``）でシャードに追記し、位置を文書インデックス
+    （``shards_index.jsonl``）に追記する。``flush_every`` 件ごとと :meth:`commit` の
+    呼び出し時に fsync してから、各ファイルの確定済みバイト数だけを持つ小さな
+    マニフェストをアトミックに書き換える。確定済みバイト数より後ろは未確定として
+    扱い、次に開いたときに切り詰める（途中で落ちても壊れた行が残らない）。
+    同じ文書を再び追記すると新しいレコードが有効になる。
+
+    上書きされた古いレコードが全体の ``compact_ratio`` を超え、かつ
+    ``compact_min_bytes`` 以上あれば、:meth:`close` で有効なレコードだけを新しい
+    シャードとインデックスに詰め直す（:meth:`compact` で明示的にも実行できる）。
+    新しいファイルを書いてからマニフェストを差し替え、古いファイルを消すので、
+    途中で落ちても元のシャードがそのまま読める。
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+        flush_every: int = 100,
+        compact_ratio: Optional[float] = DEFAULT_COMPACT_RATIO,
+        compact_min_bytes: int = DEFAULT_COMPACT_MIN_BYTES,
+    ):
+        if max_shard_bytes <= 0:
+            raise ValueError("max_shard_bytes must be positive")
+        if flush_every <= 0:
+            raise ValueError("flush_every must be positive")
+        if compact_ratio is not None and not 0 < compact_ratio < 1:
+            raise ValueError("compact_ratio must be between 0 and 1")
+        self.directory = Path(directory)
+        self.max_shard_bytes = max_shard_bytes
+        self.flush_every = flush_every
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.manifest_path = self.directory / SHARD_MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._manifest = _load_manifest(self.manifest_path)
+        self._documents = _load_index(self.index_path, self._manifest["index_bytes"])
+        self._shard_file: Optional[IO[bytes]] = None
+        self._index_file: Optional[IO[bytes]] = None
+        self._pending = 0
+        self._total_bytes = sum(shard["bytes"] for shard in self._manifest["shards"])
+        self._live_bytes = sum(entry["length"] for entry in self._documents.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    @property
+    def index_path(self) -> Path:
+        """現在の文書インデックスのパス（詰め直すたびに変わる）."""
+        return self.directory / _index_name(self._manifest)
+
+    def superseded_bytes(self) -> int:
+        """上書きされて読まれなくなったレコードのバイト数."""
+        with self._lock:
+            return self._total_bytes - self._live_bytes
+
+    @staticmethod
+    def _open_truncated(path: Path, committed: int) -> IO[bytes]:
+        # 追記用に開いたままライターが持つ（閉じるのは _close_files）
+        f = path.open("ab")
+        if f.tell() > committed:
+            logger.warning(
+                f"未確定の末尾を切り詰めます: {path} ({f.tell()} -> {committed}バイト)"
+            )
+            f.truncate(committed)
+            f.seek(committed)
+        return f
+
+    def _current_shard(self, roll: bool = False) -> Dict[str, Any]:
+        """追記先のシャードを開く（未確定の末尾は切り詰める）."""
+        shards: List[Dict[str, Any]] = self._manifest["shards"]
+        if shards and self._shard_file is not None and not roll:
+            return shards[-1]
+
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+        if roll or not shards or shards[-1]["bytes"] >= self.max_shard_bytes:
+            name = _shard_name(_next_shard_number(shards))
+            shards.append({"name": name, "bytes": 0})
+        shard = shards[-1]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._shard_file = self._open_truncated(
+            self.directory / shard["name"], shard["bytes"]
+        )
+        if self._index_file is None:
+            self._index_file = self._open_truncated(
+                self.index_path, self._manifest["index_bytes"]
+            )
+        return shard
+
+    def append(self, document: str, result: lx.data.AnnotatedDocument) -> ShardLocation:
+        """文書の抽出結果を追記し、その位置を返す.
+
+        Args:
+            document: 文書名（入力ルートからの相対パス）
+            result: スニペット抽出結果
+        """
+        line = _encode_record(document, result)
+        with self._lock:
+            shard = self._current_shard()
+            if shard["bytes"] > 0 and shard["bytes"] + len(line) > self.max_shard_bytes:
+                self._commit_locked()
+                shard = self._current_shard(roll=True)
+
+            assert self._shard_file is not None and self._index_file is not None
+            self._shard_file.write(line)
+            location = ShardLocation(shard["name"], shard["bytes"], len(line))
+            shard["bytes"] += len(line)
+            entry = {
+                **asdict(location),
+                "extractions": len(result.extractions or []),
+                "digest": _digest(line),
+            }
+            previous = self._documents.get(document)
+            if previous is not None:
+                self._live_bytes -= previous["length"]
+            self._documents[document] = entry
+            self._total_bytes += len(line)
+            self._live_bytes += len(line)
+            self._index_file.write(
+                (json.dumps({"document": document, **entry}, ensure_ascii=False) + "\n")
+                .encode("utf-8")
+            )
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._commit_locked()
+        return location
+
+    def commit(self) -> None:
+        """追記済みのレコードをディスクに確定させ、マニフェストを書き出す."""
+        with self._lock:
+            self._commit_locked()
+
+    def close(self) -> None:
+        """確定させてからシャードを閉じる（古いレコードが多ければ詰め直す）."""
+        with self._lock:
+            self._commit_locked()
+            self._close_files()
+            if self._should_compact():
+                self._compact_locked()
+
+    def compact(self) -> None:
+        """有効なレコードだけを新しいシャードに詰め直す."""
+        with self._lock:
+            self._commit_locked()
+            self._close_files()
+            self._compact_locked()
+
+    def _close_files(self) -> None:
+        for f in (self._shard_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._shard_file = self._index_file = None
+
+    def _should_compact(self) -> bool:
+        superseded = self._total_bytes - self._live_bytes
+        return (
+            self.compact_ratio is not None
+            and superseded >= self.compact_min_bytes
+            and superseded > self._total_bytes * self.compact_ratio
+        )
+
+    def _compact_locked(self) -> None:
+        old_files = [shard["name"] for shard in self._manifest["shards"]]
+        old_files.append(_index_name(self._manifest))
+        live = {
+            (entry["shard"], entry["offset"]): document
+            for document, entry in self._documents.items()
+        }
+        generation = self._manifest.get("generation", 0) + 1
+        shards: List[Dict[str, Any]] = []
+        documents: Dict[str, Dict[str, Any]] = {}
+        number = _next_shard_number(self._manifest["shards"])
+        index_name = f"{Path(SHARD_INDEX_NAME).stem}-{generation:05d}.jsonl"
+        shard_file: Optional[IO[bytes]] = None
+        try:
+            lines = _iter_live_lines(self.directory, self._manifest, live)
+            with (self.directory / index_name).open("wb") as index_file:
+                for document, line in lines:
+                    if shard_file is None or (
+                        shards[-1]["bytes"] > 0
+                        and shards[-1]["bytes"] + len(line) > self.max_shard_bytes
+                    ):
+                        if shard_file is not None:
+                            _fsync_close(shard_file)
+                        shards.append({"name": _shard_name(number), "bytes": 0})
+                        number += 1
+                        # シャードの切り替えをまたいで開くので finally で閉じる
+                        shard_path = self.directory / shards[-1]["name"]
+                        shard_file = shard_path.open("wb")
+                    shard = shards[-1]
+                    shard_file.write(line)
+                    previous = self._documents[document]
+                    entry = {
+                        **previous,
+                        "shard": shard["name"],
+                        "offset": shard["bytes"],
+                        "digest": previous.get("digest") or _digest(line),
+                    }
+                    shard["bytes"] += len(line)
+                    documents[document] = entry
+                    record = {"document": document, **entry}
+                    index_file.write(
+                        (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    )
+                index_bytes = index_file.tell()
+                index_file.flush()
+                os.fsync(index_file.fileno())
+        finally:
+            if shard_file is not None:
+                _fsync_close(shard_file)
+
+        before = self._total_bytes
+        self._manifest = {
+            **self._manifest,
+            "shards": shards,
+            "index": index_name,
+            "index_bytes": index_bytes,
+            "generation": generation,
+        }
+        self._write_manifest()
+        self._documents = documents
+        self._total_bytes = self._live_bytes = sum(shard["bytes"] for shard in shards)
+        for name in old_files:
+            (self.directory / name).unlink(missing_ok=True)
+        logger.info(
+            f"シャードを詰め直しました: {self.directory} "
+            f"({before} -> {self._total_bytes}バイト, {len(shards)}シャード)"
+        )
+
+    def _commit_locked(self) -> None:
+        if self._pending == 0:
+            return
+        for f in (self._shard_file, self._index_file):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        if self._index_file is not None:
+            self._manifest["index_bytes"] = self._index_file.tell()
+        self._write_manifest()
+        self._pending = 0
+
+    def _write_manifest(self) -> None:
+        temp_path = self.manifest_path.with_suffix(".tmp")
+        with temp_path.open("w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(self.manifest_path)
+
+    def read(self, document: str) -> Optional[lx.data.AnnotatedDocument]:
+        """追記済みの文書の抽出結果を読み込む（なければNone）."""
+        with self._lock:
+            entry = self._documents.get(document)
+            if entry is not None and self._shard_file is not None:
+                self._shard_file.flush()
+        return _read_record(self.directory, entry) if entry is not None else None
+
+
+class ShardReader:
+    """シャードマニフェストを通してフェーズ1の出力を読む.
+
+    マニフェストに記録された確定済みの範囲だけを読む。
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._manifest = _load_manifest(self.directory / SHARD_MANIFEST_NAME)
+        self._documents = _load_index(
+            self.directory / _index_name(self._manifest), self._manifest["index_bytes"]
+        )
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def documents(self) -> List[str]:
+        """記録されている文書名の一覧."""
+        return sorted(self._documents)
+
+    def fingerprint(self) -> str:
+        """内容が変わると変わる識別子（各ファイルの確定済みバイト数から作る）."""
+        return hashlib.sha256(
+            json.dumps(self._manifest, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def versions(self) -> Dict[str, str]:
+        """文書名ごとの、レコードが書き換わると変わる識別子.
+
+        レコードのハッシュを使うので、詰め直しで位置が変わっても変わらない
+        （ハッシュのない古いインデックスではシャード内の位置）。
+        """
+        return {
+            document: entry.get("digest")
+            or f"{entry['shard']}:{entry['offset']}:{entry['length']}"
+            for document, entry in self._documents.items()
+        }
+
+    def location(self, document: str) -> Optional[ShardLocation]:
+        """文書のレコードの位置（なければNone）."""
+        entry = self._documents.get(document)
+        if entry is None:
+            return None
+        return ShardLocation(entry["shard"], entry["offset"], entry["length"])
+
+    def read(self, document: str) -> Optional[lx.data.AnnotatedDocument]:
+        """1文書の抽出結果を読み込む（なければNone）."""
+        entry = self._documents.get(document)
+        return _read_record(self.directory, entry) if entry is not None else None
+
+    def iter_records(
+        self, documents: Optional[Collection[str]] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(文書名, レコード) をシャード順に返す（上書きされた古いレコードは除く）.
+
+        Args:
+            documents: この文書だけを返す（省略時はすべて）
+        """
+        live = {
+            (entry["shard"], entry["offset"]): document
+            for document, entry in self._documents.items()
+            if documents is None or document in documents
+        }
+        if not live:
+            return
+        for document, line in _iter_live_lines(self.directory, self._manifest, live):
+            yield document, json.loads(line)
+
+
+class LegacySnippetFiles:
+    """1文書1ファイル形式（``*_snippets.jsonl``）の旧出力を読む."""
+
+    def __init__(self, paths: List[Path]):
+        self.paths = sorted(paths)
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> "LegacySnippetFiles":
+        """ディレクトリ内の旧形式ファイルを集める."""
+        return cls(list(Path(directory).glob(LEGACY_SNIPPET_GLOB)))
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def documents(self) -> List[str]:
+        """文書名（ファイル名から ``_snippets`` を除いたもの）の一覧."""
+        return [path.stem.removesuffix("_snippets") for path in self.paths]
+
+    def fingerprint(self) -> str:
+        """ファイルのサイズと更新時刻から作る識別子."""
+        payload = [[p.name, p.stat().st_size, p.stat().st_mtime_ns] for p in self.paths]
+        return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def versions(self) -> Dict[str, str]:
+        """文書名ごとの、ファイルが書き換わると変わる識別子（サイズと更新時刻）."""
+        return {
+            name: f"{path.stat().st_size}:{path.stat().st_mtime_ns}"
+            for path, name in zip(self.paths, self.documents(), strict=True)
+        }
+
+    def read(self, document: str) -> Optional[lx.data.AnnotatedDocument]:
+        """1文書の抽出結果を読み込む（なければNone）."""
+        for path, name in zip(self.paths, self.documents(), strict=True):
+            if name == document:
+                with path.open("r", encoding="utf-8") as f:
+                    line = f.readline()
+                if not line:
+                    return None
+                return data_lib.dict_to_annotated_document(json.loads(line))
+        return None
+
+    def iter_records(
+        self, documents: Optional[Collection[str]] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(文書名, レコード) をファイル順に返す.
+
+        Args:
+            documents: この文書だけを返す（省略時はすべて）
+        """
+        for path, name in zip(self.paths, self.documents(), strict=True):
+            if documents is not None and name not in documents:
+                continue
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    for line_num, line in enumerate(f, 1):
+                        try:
+                            yield name, json.loads(line)
+                        except json.JSONDecodeError as e:
+                            logger.warning(f"JSON解析エラー {path}:{line_num}: {e}")
+            except OSError as e:
+                logger.error(f"ファイル読み込みエラー {path}: {e}")
+
+
+SnippetSource = ShardReader | LegacySnippetFiles
+
+
+def open_snippet_source(directory: Path) -> SnippetSource:
+    """フェーズ1の出力ディレクトリを開く（シャードがなければ旧形式のファイル群）."""
+    directory = Path(directory)
+    if (directory / SHARD_MANIFEST_NAME).exists():
+        return ShardReader(directory)
+    return LegacySnippetFiles.from_directory(directory)
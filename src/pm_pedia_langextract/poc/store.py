@@ -0,0 +1,538 @@
+"""SQLite snippet store with a trigram FTS5 index over Phase 1 extractions."""
+
+import argparse
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pm_pedia_langextract.poc.dedup import MinHasher, group_near_duplicates
+from pm_pedia_langextract.poc.shards import SnippetSource, open_snippet_source
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+DEFAULT_STORE_PATH = Path("data/store/snippets.sqlite3")
+SCHEMA_VERSION = 1
+
+# trigram トークナイザは3文字未満の語を索引から引けない
+_MIN_FTS_TERM_CHARS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    document TEXT NOT NULL,
+    category TEXT NOT NULL,
+    text TEXT NOT NULL,
+    char_start INTEGER,
+    char_end INTEGER,
+    people TEXT NOT NULL,
+    project_keywords TEXT NOT NULL,
+    attributes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snippets_document ON snippets(document);
+CREATE INDEX IF NOT EXISTS idx_snippets_category ON snippets(category);
+CREATE TABLE IF NOT EXISTS snippet_keywords (
+    snippet_id INTEGER NOT NULL,
+    keyword TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snippet_keywords
+    ON snippet_keywords(keyword, snippet_id);
+CREATE INDEX IF NOT EXISTS idx_snippet_keywords_snippet ON snippet_keywords(snippet_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(
+    text, people, project_keywords,
+    content='snippets', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS snippets_ai AFTER INSERT ON snippets BEGIN
+    INSERT INTO snippets_fts(rowid, text, people, project_keywords)
+    VALUES (new.id, new.text, new.people, new.project_keywords);
+END;
+CREATE TABLE IF NOT EXISTS snippet_minhash (
+    snippet_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snippet_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    snippet_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snippet_bands ON snippet_bands(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_snippet_bands_snippet ON snippet_bands(snippet_id);
+CREATE TRIGGER IF NOT EXISTS snippets_ad AFTER DELETE ON snippets BEGIN
+    INSERT INTO snippets_fts(snippets_fts, rowid, text, people, project_keywords)
+    VALUES ('delete', old.id, old.text, old.people, old.project_keywords);
+    DELETE FROM snippet_keywords WHERE snippet_id = old.id;
+    DELETE FROM snippet_minhash WHERE snippet_id = old.id;
+    DELETE FROM snippet_bands WHERE snippet_id = old.id;
+END;
+"""
+
+# SQLiteのIN句に一度に渡すIDの数
+_ID_BATCH = 500
+
+_COLUMNS = (
+    "id", "document", "category", "text", "char_start", "char_end",
+    "people", "project_keywords", "attributes",
+)
+
+
+def _select(table: str = "snippets") -> str:
+    return "SELECT " + ", ".join(f"{table}.{column}" for column in _COLUMNS)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _to_snippet(row: Sequence[Any]) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "document": row[1],
+        "category": row[2],
+        "text": row[3],
+        "char_interval": (
+            {"start_pos": row[4], "end_pos": row[5]} if row[4] is not None else None
+        ),
+        "people": json.loads(row[6]),
+        "project_keywords": json.loads(row[7]),
+        "attributes": json.loads(row[8]),
+    }
+
+
+def _string_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    return []
+
+
+@dataclass
+class _DuplicateIndex:
+    """ほぼ重複のグループと、メンバーから代表・文書名への対応."""
+
+    groups: Dict[int, List[int]]
+    root_of: Dict[int, int]
+    documents: Dict[int, str]
+
+
+class SnippetStore:
+    """フェーズ1の抽出結果を1スニペット1行で持つSQLiteストア.
+
+    本文・人物・プロジェクトキーワードは trigram トークナイザのFTS5で索引し
+    （スニペットの追加・削除時にトリガーで更新する）、プロジェクトキーワードは
+    完全一致用の索引も持つ。本文のMinHash署名とLSHの
+    バンドも格納し、:meth:`canonical_snippets` で言い換え・再引用された
+    スニペットを1件にまとめる。:meth:`sync` は文書ごとのバージョン（シャード内の
+    位置など）を比べ、変わった文書だけを入れ替える。変更があった同期ごとに
+    世代（:meth:`generation`）を1つ進め、入れ替えた文書にその世代を記録する。
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_STORE_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._hasher = MinHasher()
+        # (閾値, 世代) ごとのほぼ重複のグループ（同期で世代が進むと作り直す）
+        self._duplicates: Optional[Tuple[Tuple[float, int], _DuplicateIndex]] = None
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version not in (0, SCHEMA_VERSION):
+            # ストアはフェーズ1の出力から作り直せるので移行はしない
+            raise ValueError(
+                f"unsupported snippet store schema version {version}: {self.db_path}"
+                " (delete it and sync again)"
+            )
+        has_fts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'snippets_fts'"
+        ).fetchone()
+        if not has_fts:
+            # 全文索引のないストアは削除トリガーを作り直し、既存のスニペットを索引する
+            self._conn.execute("DROP TRIGGER IF EXISTS snippets_ad")
+        self._conn.executescript(_SCHEMA)
+        if not has_fts:
+            self._conn.execute(
+                "INSERT INTO snippets_fts(snippets_fts) VALUES ('rebuild')"
+            )
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _insert_signature(self, snippet_id: int, text: str) -> None:
+        signature = self._hasher.signature(text)
+        if signature is None:
+            return
+        self._conn.execute(
+            "INSERT INTO snippet_minhash (snippet_id, signature) VALUES (?, ?)",
+            (snippet_id, self._hasher.pack(signature)),
+        )
+        self._conn.executemany(
+            "INSERT INTO snippet_bands (band, bucket, snippet_id) VALUES (?, ?, ?)",
+            [
+                (band, bucket, snippet_id)
+                for band, bucket in enumerate(self._hasher.band_keys(signature))
+            ],
+        )
+
+    def sync(self, source: SnippetSource) -> Dict[str, int]:
+        """フェーズ1の出力に合わせて、追加・変更・削除された文書だけを反映する.
+
+        Returns:
+            Dict[str, int]: 反映した文書数（added, updated, removed, unchanged）
+        """
+        versions = source.versions()
+        with self._lock:
+            stored = dict(self._conn.execute("SELECT document, version FROM documents"))
+        changed = {
+            doc for doc, version in versions.items() if stored.get(doc) != version
+        }
+        removed = set(stored) - set(versions)
+
+        with self._lock, self._conn:
+            generation = self._generation()
+            if changed or removed:
+                generation += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO store_state (key, value) "
+                    "VALUES ('generation', ?)",
+                    (generation,),
+                )
+            for document in removed | changed:
+                self._delete_document(document)
+            for document, data in source.iter_records(changed):
+                self._insert_document(document, data)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents "
+                    "(document, version, generation) VALUES (?, ?, ?)",
+                    (document, versions[document], generation),
+                )
+
+        stats = {
+            "added": len(changed - set(stored)),
+            "updated": len(changed & set(stored)),
+            "removed": len(removed),
+            "unchanged": len(versions) - len(changed),
+        }
+        logger.info(f"スニペットストアを同期: {stats}")
+        return stats
+
+    def _generation(self) -> int:
+        row = self._conn.execute(
+            "SELECT value FROM store_state WHERE key = 'generation'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def generation(self) -> int:
+        """最後に変更があった同期の世代（一度も同期していなければ0）."""
+        with self._lock:
+            return self._generation()
+
+    def _delete_document(self, document: str) -> None:
+        self._conn.execute("DELETE FROM snippets WHERE document = ?", (document,))
+        self._conn.execute("DELETE FROM documents WHERE document = ?", (document,))
+
+    def _insert_document(self, document: str, data: Dict[str, Any]) -> None:
+        for extraction in data.get("extractions") or []:
+            attributes = extraction.get("attributes") or {}
+            interval = extraction.get("char_interval") or {}
+            people = _string_list(attributes.get("people"))
+            keywords = _string_list(attributes.get("project_keywords"))
+            cursor = self._conn.execute(
+                "INSERT INTO snippets (document, category, text, char_start, char_end, "
+                "people, project_keywords, attributes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    document,
+                    extraction.get("extraction_class") or "",
+                    extraction.get("extraction_text") or "",
+                    interval.get("start_pos"),
+                    interval.get("end_pos"),
+                    json.dumps(people, ensure_ascii=False),
+                    json.dumps(keywords, ensure_ascii=False),
+                    json.dumps(attributes, ensure_ascii=False),
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO snippet_keywords (snippet_id, keyword) VALUES (?, ?)",
+                [(cursor.lastrowid, keyword.lower()) for keyword in set(keywords)],
+            )
+            self._insert_signature(
+                cursor.lastrowid, extraction.get("extraction_text") or ""
+            )
+
+    def document_count(self) -> int:
+        """格納されている文書数."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def snippet_count(self) -> int:
+        """格納されているスニペット数."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM snippets").fetchone()[0]
+
+    def snippets(
+        self, limit: Optional[int] = None, category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """スニペットを格納順に返す.
+
+        Args:
+            limit: 最大件数（省略時はすべて）
+            category: このカテゴリのものだけ返す
+        """
+        sql = f"{_select()} FROM snippets"
+        params: List[Any] = []
+        if category is not None:
+            sql += " WHERE category = ?"
+            params.append(category)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_to_snippet(row) for row in rows]
+
+    def iter_snippets(
+        self, batch_size: int = 1000, since: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """全スニペットを格納順に ``batch_size`` 件ずつ読みながら返す.
+
+        Args:
+            batch_size: 1回に読む件数
+            since: この世代より後の同期で追加・変更された文書のスニペットだけ返す
+        """
+        sql = f"{_select()} FROM snippets WHERE id > ?"
+        if since is not None:
+            sql += (
+                " AND document IN (SELECT document FROM documents WHERE generation > ?)"
+            )
+        sql += " ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            params: List[Any] = [last_id]
+            if since is not None:
+                params.append(since)
+            params.append(batch_size)
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _to_snippet(row)
+            last_id = rows[-1][0]
+
+    def near_duplicate_groups(self, threshold: float = 0.7) -> Dict[int, List[int]]:
+        """LSHの同じバケットに入り、見積もりJaccardが ``threshold`` 以上のスニペット.
+
+        Returns:
+            Dict[int, List[int]]: 代表（最小のスニペットID）→ 昇順のメンバーID
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT group_concat(snippet_id) FROM snippet_bands "
+                "GROUP BY band, bucket HAVING COUNT(*) > 1"
+            ).fetchall()
+        buckets = [sorted(int(i) for i in row[0].split(",")) for row in rows]
+        ids = sorted({i for bucket in buckets for i in bucket})
+        signatures = {}
+        for start in range(0, len(ids), _ID_BATCH):
+            batch = ids[start:start + _ID_BATCH]
+            with self._lock:
+                signatures.update(
+                    (snippet_id, self._hasher.unpack(data))
+                    for snippet_id, data in self._conn.execute(
+                        "SELECT snippet_id, signature FROM snippet_minhash "
+                        f"WHERE snippet_id IN ({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+        return group_near_duplicates(buckets, signatures, threshold)
+
+    def snippets_by_id(self, ids: Sequence[int]) -> Iterator[Dict[str, Any]]:
+        """昇順のIDのスニペットを順に返す."""
+        for start in range(0, len(ids), _ID_BATCH):
+            batch = ids[start:start + _ID_BATCH]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"{_select()} FROM snippets "
+                    f"WHERE id IN ({', '.join('?' * len(batch))}) ORDER BY id",
+                    batch,
+                ).fetchall()
+            for row in rows:
+                yield _to_snippet(row)
+
+    def _duplicate_index(self, threshold: float) -> _DuplicateIndex:
+        """:meth:`near_duplicate_groups` の結果を、同じ閾値・世代の間は使い回す."""
+        with self._lock:
+            key = (threshold, self._generation())
+            if self._duplicates is not None and self._duplicates[0] == key:
+                return self._duplicates[1]
+
+        groups = self.near_duplicate_groups(threshold)
+        root_of = {
+            member: root for root, members in groups.items() for member in members
+        }
+        documents: Dict[int, str] = {}
+        members = sorted(root_of)
+        for start in range(0, len(members), _ID_BATCH):
+            batch = members[start:start + _ID_BATCH]
+            with self._lock:
+                documents.update(self._conn.execute(
+                    "SELECT id, document FROM snippets "
+                    f"WHERE id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ))
+        if groups:
+            logger.info(
+                f"ほぼ重複するスニペット: {len(root_of)}件を{len(groups)}件に集約"
+            )
+        duplicates = _DuplicateIndex(groups, root_of, documents)
+        with self._lock:
+            self._duplicates = (key, duplicates)
+        return duplicates
+
+    def canonical_snippets(
+        self, threshold: float = 0.7, since: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """ほぼ重複するスニペットを1件にまとめて格納順に返す.
+
+        グループの最初のスニペットを代表とし、``sources`` にグループ全体の
+        文書名（重複なし、格納順）を、``duplicates`` にまとめた件数を入れる。
+        重複のないスニペットも ``sources`` に自身の文書名を持つ。``since`` を
+        渡すと、その世代より後に追加・変更された文書のスニペットを含むものだけを
+        返す（代表がそれより前の文書のものでも、新しい出典を加えて返す）。
+        グループは同じ閾値・世代の間は最初の呼び出しの結果を使い回す。
+        """
+        duplicates = self._duplicate_index(threshold)
+        groups, root_of, documents = (
+            duplicates.groups,
+            duplicates.root_of,
+            duplicates.documents,
+        )
+
+        if since is None:
+            snippets = self.iter_snippets()
+        else:
+            with self._lock:
+                new_ids = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM snippets WHERE document IN "
+                    "(SELECT document FROM documents WHERE generation > ?)",
+                    (since,),
+                )]
+            snippets = self.snippets_by_id(sorted({root_of.get(i, i) for i in new_ids}))
+
+        for snippet in snippets:
+            root = root_of.get(snippet["id"])
+            if root is None:
+                snippet["sources"] = [snippet["document"]]
+                snippet["duplicates"] = 0
+            elif root == snippet["id"]:
+                snippet["sources"] = list(
+                    dict.fromkeys(documents[m] for m in groups[root])
+                )
+                snippet["duplicates"] = len(groups[root]) - 1
+            else:
+                continue
+            yield snippet
+
+    def search(
+        self,
+        terms: Iterable[str],
+        limit: Optional[int] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """本文にいずれかの語を含む、またはプロジェクトキーワードが一致するスニペット.
+
+        大文字・小文字は区別しない。3文字以上の語はFTS5の索引で、それより短い語は
+        本文の ``LIKE`` で探す。結果は格納順。
+
+        Args:
+            terms: 検索語
+            limit: 最大件数（省略時はすべて）
+            category: このカテゴリのものだけ返す
+        """
+        terms = sorted({term.lower() for term in terms if term})
+        if not terms:
+            return []
+
+        conditions: List[str] = []
+        params: List[Any] = []
+        fts_terms = [t for t in terms if len(t) >= _MIN_FTS_TERM_CHARS]
+        if fts_terms:
+            conditions.append(
+                "id IN (SELECT rowid FROM snippets_fts WHERE snippets_fts MATCH ?)"
+            )
+            params.append(
+                "text : (" + " OR ".join(_fts_phrase(t) for t in fts_terms) + ")"
+            )
+        for term in terms:
+            if len(term) < _MIN_FTS_TERM_CHARS:
+                conditions.append("text LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(term))
+        conditions.append(
+            "id IN (SELECT snippet_id FROM snippet_keywords WHERE keyword IN ("
+            + ", ".join("?" * len(terms)) + "))"
+        )
+        params.extend(terms)
+
+        sql = f"{_select()} FROM snippets WHERE (" + " OR ".join(conditions) + ")"
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_to_snippet(row) for row in rows]
+
+    def close(self) -> None:
+        """DB接続を閉じる."""
+        with self._lock:
+            self._conn.close()
+
+
+def _parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Phase 1 スニペットストアの同期と検索")
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path("data/output/phase1"),
+        help="フェーズ1の出力ディレクトリ"
+    )
+    parser.add_argument(
+        "--store", type=Path, default=DEFAULT_STORE_PATH, help="ストアのパス"
+    )
+    parser.add_argument("--no-sync", action="store_true", help="検索前に同期しない")
+    parser.add_argument("--limit", type=int, default=20, help="表示件数")
+    parser.add_argument("terms", nargs="*", help="検索語（省略時は同期のみ）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """CLIエントリポイント."""
+    args = _parse_args(argv)
+    store = SnippetStore(args.store)
+    try:
+        if not args.no_sync:
+            store.sync(open_snippet_source(args.output_dir))
+        if args.terms:
+            for snippet in store.search(args.terms, limit=args.limit):
+                print(f"{snippet['document']}\t{snippet['category']}\t{snippet['text']}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    main()
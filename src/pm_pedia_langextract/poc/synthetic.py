@@ -0,0 +1,428 @@
+"""Synthetic PM-document corpus generator for scale testing."""
+
+import argparse
+import json
+import random
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pm_pedia_langextract.utils.logging_config import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+# 1ディレクトリあたりの文書数（数十万件規模でもディレクトリが肥大化しないように）
+DOCUMENTS_PER_DIRECTORY = 1000
+
+PROJECT_DOMAINS = [
+    "スマートタグ", "マルチデータソース", "検索", "通知", "レコメンド", "請求",
+    "ダッシュボード", "オンボーディング", "権限管理", "データ連携", "VOC分析",
+    "レポート", "モバイルアプリ", "API", "監査ログ", "アンケート",
+]
+PROJECT_COMPONENTS = [
+    "クラスタリング機構", "評価基盤", "刷新", "改善", "連携", "自動化",
+    "品質改善", "パフォーマンス改善", "リプレイス", "多言語対応",
+]
+KEYWORDS = [
+    "PRD", "KPI", "リリース", "パフォーマンス", "データベース", "プロンプト",
+    "Embedding", "DBSCAN", "スキーマ", "ABテスト", "ユーザーヒアリング",
+    "技術的負債", "コスト", "SLA", "アラート", "ドキュメント",
+]
+SURNAMES = [
+    "青見", "奥村", "斎藤", "大江", "久松", "及川", "水田", "林", "小林", "田中",
+    "佐藤", "鈴木", "高橋", "伊藤", "渡辺", "山本", "中村", "加藤", "吉田", "山田",
+]
+
+SNIPPET_TEMPLATES: Dict[str, List[str]] = {
+    "進捗報告": [
+        "{project}の{keyword}対応を完了した",
+        "{person}と{project}の{keyword}をレビューした",
+        "{project}のPRDを{person}に共有した",
+    ],
+    "課題": [
+        "{project}の{keyword}が想定より遅い",
+        "{project}で{keyword}の仕様が固まっていない",
+        "{person}の稼働が{project}に偏っている",
+    ],
+    "決定事項": [
+        "{project}は{keyword}を優先する方針で合意した",
+        "{person}と協議し、{project}のリリースを1週間延期することに決定",
+    ],
+    "リスク": [
+        "{project}の{keyword}がリリースのブロッカーになる懸念",
+        "大規模データで{project}の処理時間が伸びるリスク",
+    ],
+    "気づき・インサイト": [
+        "{project}は{keyword}よりも先に課題の優先順位付けが必要だと気づいた",
+        "{person}の指摘で{project}の{keyword}の見直しが必要だと分かった",
+    ],
+    "ネクストアクション": [
+        "来週、{person}に{project}の{keyword}調査を依頼する",
+        "{project}の{keyword}についてPRDを作成する",
+    ],
+}
+NOISE_LINES = [
+    "買い物に行く", "ジムでトレーニング", "映画を見た", "洗濯", "読書",
+    "家の片付け", "旅行の予定を立てる", "ブログを書きたい", "早めに寝る",
+    "ランチが美味しかった", "天気が良かった", "散歩した",
+]
+
+
+@dataclass
+class SyntheticProject:
+    """正解ラベルとして出力するプロジェクト."""
+
+    project_id: str
+    name: str
+    aliases: List[str]
+    keywords: List[str]
+    people: List[str]
+
+
+@dataclass
+class CorpusConfig:
+    """合成コーパスの設定.
+
+    Attributes:
+        num_documents: 生成する文書数
+        num_projects: プロジェクト数
+        seed: 乱数シード（文書ごとに派生させるため、一部だけ再生成しても同じ内容になる）
+        doc_type_weights: 文書種別ごとの出現比率
+        noise_ratio: 業務文書に混ぜる業務外の行の割合
+        mean_sections: 1文書あたりの平均セクション数（長さの目安）
+        max_projects_per_document: 1文書で言及するプロジェクト数の上限
+    """
+
+    num_documents: int = 1000
+    num_projects: int = 20
+    seed: int = 0
+    doc_type_weights: Dict[str, float] = field(default_factory=lambda: {
+        "weekly_review": 0.35,
+        "prd": 0.15,
+        "meeting": 0.2,
+        "journal": 0.3,
+    })
+    noise_ratio: float = 0.2
+    mean_sections: float = 4.0
+    max_projects_per_document: int = 3
+
+    def __post_init__(self) -> None:
+        """設定値を検証する."""
+        if self.num_documents <= 0:
+            raise ValueError("num_documents must be positive")
+        if self.num_projects <= 0:
+            raise ValueError("num_projects must be positive")
+        if not 0.0 <= self.noise_ratio < 1.0:
+            raise ValueError("noise_ratio must be in [0, 1)")
+
+
+@dataclass
+class GeneratedDocument:
+    """生成した1文書と正解ラベル."""
+
+    path: str
+    doc_type: str
+    text: str
+    projects: List[str]
+    aliases_used: List[str]
+    people: List[str]
+    relevant: bool
+
+
+def build_projects(config: CorpusConfig) -> List[SyntheticProject]:
+    """プロジェクトと別名の一覧を決定的に作る."""
+    rng = random.Random(f"{config.seed}:projects")
+    pairs = [(d, c) for d in PROJECT_DOMAINS for c in PROJECT_COMPONENTS]
+    rng.shuffle(pairs)
+
+    projects = []
+    for index in range(config.num_projects):
+        domain, component = pairs[index % len(pairs)]
+        generation = index // len(pairs)
+        suffix = f" 第{generation + 1}期" if generation else ""
+        name = f"{domain} {component}{suffix}"
+        aliases = [
+            f"{domain}{component}{suffix}",
+            f"{domain}PJ{suffix}",
+            f"{component}（{domain}）{suffix}",
+            f"PRJ-{index + 1:04d}",
+        ]
+        projects.append(SyntheticProject(
+            project_id=f"proj_{index + 1:04d}",
+            name=name,
+            aliases=aliases,
+            keywords=rng.sample(KEYWORDS, 3),
+            people=[f"{s}さん" for s in rng.sample(SURNAMES, 3)],
+        ))
+    return projects
+
+
+class CorpusGenerator:
+    """週次レビュー・PRD・議事録・日報風の文書を生成する."""
+
+    def __init__(self, config: CorpusConfig):
+        self.config = config
+        self.projects = build_projects(config)
+        self._doc_types = list(config.doc_type_weights)
+        self._weights = [config.doc_type_weights[t] for t in self._doc_types]
+
+    def document(self, index: int) -> GeneratedDocument:
+        """``index`` 番目の文書を生成する（同じ設定なら常に同じ内容）."""
+        rng = random.Random(f"{self.config.seed}:doc:{index}")
+        doc_type = rng.choices(self._doc_types, self._weights)[0]
+        labels: Dict[str, Any] = {"projects": [], "aliases": [], "people": []}
+
+        if doc_type == "journal":
+            text = self._journal(rng, index, labels)
+        elif doc_type == "prd":
+            text = self._prd(rng, index, labels)
+        elif doc_type == "meeting":
+            text = self._meeting(rng, index, labels)
+        else:
+            text = self._weekly_review(rng, index, labels)
+
+        directory = f"{index // DOCUMENTS_PER_DIRECTORY:04d}"
+        return GeneratedDocument(
+            path=f"{directory}/{doc_type}_{index:07d}.md",
+            doc_type=doc_type,
+            text=text,
+            projects=sorted(set(labels["projects"])),
+            aliases_used=sorted(set(labels["aliases"])),
+            people=sorted(set(labels["people"])),
+            relevant=doc_type != "journal" or bool(labels["projects"]),
+        )
+
+    def __iter__(self) -> Iterator[GeneratedDocument]:
+        for index in range(self.config.num_documents):
+            yield self.document(index)
+
+    def _pick_projects(self, rng: random.Random) -> List[SyntheticProject]:
+        count = rng.randint(1, self.config.max_projects_per_document)
+        # 一部のプロジェクトに言及が集中するよう、順位に反比例した重みで選ぶ
+        weights = [1.0 / (rank + 1) for rank in range(len(self.projects))]
+        chosen: Dict[str, SyntheticProject] = {}
+        while len(chosen) < min(count, len(self.projects)):
+            project = rng.choices(self.projects, weights)[0]
+            chosen[project.project_id] = project
+        return list(chosen.values())
+
+    def _snippet(
+        self,
+        rng: random.Random,
+        category: str,
+        projects: List[SyntheticProject],
+        labels: Dict[str, Any],
+    ) -> str:
+        project = rng.choice(projects)
+        # 正式名より別名で言及されることが多い
+        mention = project.name if rng.random() < 0.3 else rng.choice(project.aliases)
+        person = rng.choice([*project.people, f"{rng.choice(SURNAMES)}さん"])
+        labels["projects"].append(project.project_id)
+        labels["aliases"].append(mention)
+        labels["people"].append(person)
+        return rng.choice(SNIPPET_TEMPLATES[category]).format(
+            project=mention, person=person, keyword=rng.choice(project.keywords)
+        )
+
+    def _bullets(
+        self,
+        rng: random.Random,
+        categories: List[str],
+        projects: List[SyntheticProject],
+        labels: Dict[str, Any],
+    ) -> List[str]:
+        lines = []
+        for _ in range(max(1, int(rng.lognormvariate(1.0, 0.6)))):
+            if rng.random() < self.config.noise_ratio:
+                lines.append(f"- {rng.choice(NOISE_LINES)}")
+            else:
+                lines.append(
+                    f"- {self._snippet(rng, rng.choice(categories), projects, labels)}"
+                )
+        return lines
+
+    def _section_count(self, rng: random.Random) -> int:
+        return max(1, int(rng.lognormvariate(0.0, 0.5) * self.config.mean_sections))
+
+    def _weekly_review(
+        self, rng: random.Random, index: int, labels: Dict[str, Any]
+    ) -> str:
+        projects = self._pick_projects(rng)
+        week = index % 52 + 1
+        parts = [f"# 週次レビュー 2025-W{week:02d}", ""]
+        headings = [
+            ("今週の成果", ["進捗報告"]),
+            ("課題", ["課題", "リスク"]),
+            ("気づき・学び", ["気づき・インサイト"]),
+            ("決定事項", ["決定事項"]),
+            ("来週のアクション", ["ネクストアクション"]),
+        ]
+        for _ in range(self._section_count(rng)):
+            heading, categories = rng.choice(headings)
+            parts += [
+                f"## {heading}",
+                *self._bullets(rng, categories, projects, labels),
+                "",
+            ]
+        return "\n".join(parts)
+
+    def _prd(self, rng: random.Random, index: int, labels: Dict[str, Any]) -> str:
+        project = self._pick_projects(rng)[0]
+        labels["projects"].append(project.project_id)
+        labels["aliases"].append(project.name)
+        parts = [f"# {project.name} 要件定義書 v{index % 5 + 1}", ""]
+        headings = [
+            "背景と目的",
+            "スコープ",
+            "機能要件",
+            "非機能要件",
+            "リスクと懸念",
+            "マイルストーン",
+        ]
+        for number, heading in enumerate(headings[:self._section_count(rng) + 2], 1):
+            parts += [f"## {number}. {heading}", ""]
+            for _ in range(rng.randint(1, 3)):
+                category = rng.choice(list(SNIPPET_TEMPLATES))
+                parts.append(self._snippet(rng, category, [project], labels) + "。")
+            parts.append("")
+        return "\n".join(parts)
+
+    def _meeting(self, rng: random.Random, index: int, labels: Dict[str, Any]) -> str:
+        projects = self._pick_projects(rng)
+        attendees = sorted({p for project in projects for p in project.people})
+        labels["people"].extend(attendees)
+        parts = [
+            f"# {projects[0].aliases[0]} 定例 議事録 #{index}",
+            "",
+            f"参加者: {'、'.join(attendees)}",
+            "",
+        ]
+        for heading, categories in [
+            ("議題", ["課題", "リスク"]),
+            ("決定事項", ["決定事項"]),
+            ("TODO", ["ネクストアクション"]),
+        ]:
+            parts += [
+                f"## {heading}",
+                *self._bullets(rng, categories, projects, labels),
+                "",
+            ]
+        return "\n".join(parts)
+
+    def _journal(self, rng: random.Random, index: int, labels: Dict[str, Any]) -> str:
+        day = index % 28 + 1
+        parts = [f"# 2025-08-{day:02d}", "", "## 今日やったこと"]
+        parts += [f"- {line}" for line in rng.sample(NOISE_LINES, rng.randint(2, 6))]
+        # 日報の一部には業務の話が少しだけ混ざる
+        if rng.random() < 0.2:
+            parts.append(
+                f"- {self._snippet(rng, '進捗報告', self._pick_projects(rng), labels)}"
+            )
+        parts += ["", "## 明日の予定"]
+        parts += [f"- {line}" for line in rng.sample(NOISE_LINES, rng.randint(1, 4))]
+        return "\n".join(parts) + "\n"
+
+
+def generate_corpus(
+    output_dir: Path, config: Optional[CorpusConfig] = None
+) -> Dict[str, Any]:
+    """合成コーパスを書き出す.
+
+    文書は ``output_dir/NNNN/`` 以下に1000件ずつ、正解ラベルは
+    ``ground_truth.jsonl``（1行1文書）と ``projects.json``（プロジェクトと別名）に
+    書き出す。文書は1件ずつ生成して書き出すため、100万件でもメモリに載せない。
+
+    Args:
+        output_dir: 出力ディレクトリ
+        config: コーパスの設定
+
+    Returns:
+        Dict: 生成した文書数・文字数・文書種別ごとの件数
+    """
+    config = config or CorpusConfig()
+    generator = CorpusGenerator(config)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with (output_dir / "projects.json").open("w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "config": asdict(config),
+                "projects": [asdict(p) for p in generator.projects],
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    doc_types: Counter = Counter()
+    total_chars = 0
+    with (output_dir / "ground_truth.jsonl").open("w", encoding="utf-8") as truth:
+        for document in generator:
+            doc_path = output_dir / document.path
+            doc_path.parent.mkdir(exist_ok=True)
+            doc_path.write_text(document.text, encoding="utf-8")
+
+            label = asdict(document)
+            del label["text"]
+            truth.write(json.dumps(label, ensure_ascii=False) + "\n")
+
+            doc_types[document.doc_type] += 1
+            total_chars += len(document.text)
+            if doc_types.total() % 10000 == 0:
+                logger.info(f"生成中: {doc_types.total()}/{config.num_documents}件")
+
+    stats = {
+        "documents": doc_types.total(),
+        "total_chars": total_chars,
+        "doc_types": dict(doc_types),
+    }
+    logger.info(f"合成コーパス生成完了: {output_dir} {stats}")
+    return stats
+
+
+def load_ground_truth(
+    output_dir: Path,
+) -> Tuple[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+    """``projects.json`` のプロジェクト一覧と、文書ごとの正解ラベルを返す."""
+    with (output_dir / "projects.json").open("r", encoding="utf-8") as f:
+        projects = json.load(f)["projects"]
+
+    def labels() -> Iterator[Dict[str, Any]]:
+        with (output_dir / "ground_truth.jsonl").open("r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    return projects, labels()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PM-pedia 合成コーパス生成")
+    parser.add_argument(
+        "--output", type=Path, default=Path("data/synthetic"), help="出力ディレクトリ"
+    )
+    parser.add_argument("--documents", type=int, default=1000, help="生成する文書数")
+    parser.add_argument("--projects", type=int, default=20, help="プロジェクト数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument(
+        "--noise-ratio", type=float, default=0.2, help="業務外の行の割合"
+    )
+    parser.add_argument(
+        "--mean-sections", type=float, default=4.0, help="平均セクション数"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    setup_logging(level="INFO")
+    args = _parse_args()
+    generate_corpus(
+        args.output,
+        CorpusConfig(
+            num_documents=args.documents,
+            num_projects=args.projects,
+            seed=args.seed,
+            noise_ratio=args.noise_ratio,
+            mean_sections=args.mean_sections,
+        ),
+    )
@@ -0,0 +1,171 @@
+"""Lightweight timing spans for pipeline stages."""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from pm_pedia_langextract.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 入れ子のスパンが属する文書（同じスレッド内で引き継ぐ）
+_current_document: ContextVar[Optional[str]] = ContextVar(
+    "current_document", default=None
+)
+
+
+@dataclass
+class SpanRecord:
+    """1区間の計測結果."""
+
+    stage: str
+    document: Optional[str]
+    wall_ms: float
+    cpu_ms: float
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """``q`` パーセンタイル（0-100、最近傍法）を返す."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def current_document() -> Optional[str]:
+    """実行中のスパンが属する文書名（文書スパンの外ではNone）."""
+    return _current_document.get()
+
+
+class Tracer:
+    """ステージごと・文書ごとの経過時間とCPU時間を記録する.
+
+    CPU時間はスパンを開いたスレッドのもの（``time.thread_time``）なので、
+    ワーカースレッドで処理される文書ごとの計測にも使える。
+    ``enabled=False`` にすると何も記録しない。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._records: List[SpanRecord] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, document: Optional[str] = None) -> Iterator[None]:
+        """``stage`` の区間を計測する.
+
+        Args:
+            stage: ステージ名（``phase1.triage`` など）
+            document: 対象の文書名（省略時は外側のスパンの文書を引き継ぐ）
+        """
+        if not self.enabled:
+            yield
+            return
+
+        token = _current_document.set(document) if document is not None else None
+        document = _current_document.get()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            record = SpanRecord(
+                stage=stage,
+                document=document,
+                wall_ms=(time.perf_counter() - wall_start) * 1000,
+                cpu_ms=(time.thread_time() - cpu_start) * 1000,
+            )
+            if token is not None:
+                _current_document.reset(token)
+            with self._lock:
+                self._records.append(record)
+            logger.debug(
+                f"{stage} [{document or '-'}]: {record.wall_ms:.1f}ms "
+                f"(CPU {record.cpu_ms:.1f}ms)",
+                extra={"duration_ms": record.wall_ms},
+            )
+
+    def records(self) -> List[SpanRecord]:
+        """記録済みのスパンの一覧."""
+        with self._lock:
+            return list(self._records)
+
+    def reset(self) -> None:
+        """記録を破棄する."""
+        with self._lock:
+            self._records.clear()
+
+    def report(self) -> Dict[str, Any]:
+        """ステージごとのp50/p95/maxと文書ごとの内訳を返す."""
+        by_stage: Dict[str, List[SpanRecord]] = {}
+        by_document: Dict[str, Dict[str, float]] = {}
+        for record in self.records():
+            by_stage.setdefault(record.stage, []).append(record)
+            if record.document is not None:
+                stages = by_document.setdefault(record.document, {})
+                stages[record.stage] = round(
+                    stages.get(record.stage, 0.0) + record.wall_ms, 3
+                )
+
+        stages_report = {}
+        for stage, records in sorted(by_stage.items()):
+            wall = [r.wall_ms for r in records]
+            cpu = [r.cpu_ms for r in records]
+            stages_report[stage] = {
+                "count": len(records),
+                "wall_ms": _summarize(wall),
+                "cpu_ms": _summarize(cpu),
+            }
+
+        return {
+            "created_at": datetime.now().isoformat(),
+            "stages": stages_report,
+            "documents": by_document,
+        }
+
+    def write_report(self, path: Path) -> Path:
+        """:meth:`report` をJSONで書き出す."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def _summarize(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "total": round(sum(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "max": round(max(values), 3),
+    }
+
+
+_default_tracer: Optional[Tracer] = None
+_default_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """プロセス共有の :class:`Tracer` を返す（未設定なら既定値で作る）."""
+    global _default_tracer
+    with _default_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
+
+
+def configure_tracer(**kwargs: Any) -> Tracer:
+    """プロセス共有の :class:`Tracer` を指定の設定で作り直す."""
+    global _default_tracer
+    with _default_lock:
+        _default_tracer = Tracer(**kwargs)
+        return _default_tracer
+
+
+def span(stage: str, document: Optional[str] = None) -> Any:
+    """プロセス共有の :class:`Tracer` でスパンを計測する."""
+    return get_tracer().span(stage, document)
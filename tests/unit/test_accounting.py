@@ -0,0 +1,96 @@
+"""Unit tests for usage and cost accounting."""
+
+import json
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.accounting import (
+    ModelPrice,
+    UsageAccountant,
+    estimate_tokens,
+    load_price_table,
+)
+
+
+def _result(text: str) -> lx.data.AnnotatedDocument:
+    return lx.data.AnnotatedDocument(
+        extractions=[lx.data.Extraction(extraction_class="課題", extraction_text=text)],
+        text=text,
+    )
+
+
+class TestEstimateTokens:
+    """Test estimate_tokens function."""
+
+    def test_counts_ascii_at_a_quarter_token(self) -> None:
+        """Test that ASCII text is cheaper than Japanese text per character."""
+        assert estimate_tokens(8, ascii_chars=8) == 2
+        assert estimate_tokens(8, ascii_chars=0) == 8
+
+
+class TestUsageAccountant:
+    """Test UsageAccountant class."""
+
+    def test_aggregates_by_document_stage_and_model(self) -> None:
+        """Test totals, breakdowns and cost with cached calls excluded."""
+        accountant = UsageAccountant(prices={"m": ModelPrice(1_000_000, 0)})
+        for stage, document, cached in [
+            ("triage", "a.md", False),
+            ("snippet", "a.md", False),
+            ("triage", "b.md", True),
+        ]:
+            accountant.record(
+                stage, "m", "本文" * 10, "指示", [], _result("課題"),
+                chunks=1, passes=2, document=document, cached=cached,
+            )
+
+        summary = accountant.summary()
+
+        assert summary["total"]["calls"] == 3
+        assert summary["total"]["cached_calls"] == 1
+        assert summary["by_stage"]["triage"]["calls"] == 2
+        assert summary["by_model"]["m"]["chunks"] == 6
+        assert summary["by_document"]["a.md"]["input_chars"] == 2 * (20 + 2) * 2
+        # 入力44文字（=44トークン）× 2回分を $1/トークンで計上し、キャッシュ分は0
+        assert summary["total"]["cost_usd"] == 88.0
+        assert summary["by_document"]["b.md"]["cost_usd"] == 0.0
+        assert accountant.summary(stages=["snippet"])["total"]["calls"] == 1
+
+    def test_rollup_keeps_summary_and_drops_records(self) -> None:
+        """Test that rolled-up records still count towards the summary."""
+        accountant = UsageAccountant(prices={"m": ModelPrice(1_000_000, 0)})
+        for document in ["a.md", "b.md"]:
+            accountant.record(
+                "triage", "m", "本文", "指示", [], _result("課題"), chunks=1, passes=1,
+                document=document,
+            )
+        before = accountant.summary()
+
+        accountant.rollup()
+        assert accountant.records() == []
+        assert accountant.summary() == before
+
+        accountant.record(
+            "snippet", "m", "本文", "指示", [], _result("課題"), chunks=1, passes=1,
+            document="a.md",
+        )
+        after = accountant.summary()
+        assert after["total"]["calls"] == 3
+        assert after["by_document"]["a.md"]["calls"] == 2
+        assert accountant.summary(stages=["triage"]) == {
+            **before,
+            "prices": after["prices"],
+        }
+
+    def test_price_table_overrides_defaults(self, tmp_path: Path) -> None:
+        """Test loading a JSON price table on top of the defaults."""
+        path = tmp_path / "prices.json"
+        path.write_text(json.dumps({
+            "custom-model": {"input_per_million": 2.0, "output_per_million": 8.0}
+        }))
+
+        prices = load_price_table(path)
+
+        assert prices["custom-model"] == ModelPrice(2.0, 8.0)
+        assert "gemini-2.5-flash-lite" in prices
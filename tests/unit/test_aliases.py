@@ -0,0 +1,130 @@
+"""Unit tests for the persistent project alias index."""
+
+import json
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.aliases import AliasIndex
+from pm_pedia_langextract.poc.extractors import IntegrationExtractor
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+
+
+class TestAliasIndex:
+    """Test AliasIndex class."""
+
+    def test_register_and_persist(self, tmp_path: Path) -> None:
+        """Test normalized lookups, new ids and aliases, and a round trip to file."""
+        path = tmp_path / "aliases.json"
+        index = AliasIndex(path)
+
+        assert index.resolve("ＳＭＡＲＴ ＴＡＧ") == "proj_001"
+        assert index.resolve("未知のプロジェクト") is None
+        assert (
+            index.register("スマートタグ・クラスタリング機能", ["スマートタグ"])
+            == "proj_001"
+        )
+        assert index.register("請求書OCR", ["OCR"]) == "proj_003"
+        assert index.unknown(["ocr", "新規"]) == ["新規"]
+        index.save()
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["projects"]["proj_003"]["aliases"].append("インボイス読み取り")
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        reloaded = AliasIndex(path)
+
+        assert reloaded.resolve("スマートタグ・クラスタリング機能") == "proj_001"
+        assert reloaded.resolve("インボイス読み取り") == "proj_003"
+        assert reloaded.name("proj_003") == "請求書OCR"
+        assert (
+            reloaded.describe("proj_003")
+            == "- proj_003: 請求書OCR（別名: OCR, インボイス読み取り）"
+        )
+
+    def test_annotate_resolves_project_keywords(self) -> None:
+        """Test that known keywords become project_ids and stale ids are dropped."""
+        result = lx.data.AnnotatedDocument(
+            extractions=[
+                lx.data.Extraction(
+                    extraction_class="課題",
+                    extraction_text="a",
+                    attributes={"project_keywords": ["Smart Tag", "新規"]},
+                ),
+                lx.data.Extraction(
+                    extraction_class="課題",
+                    extraction_text="b",
+                    attributes={
+                        "project_keywords": ["新規"],
+                        "project_ids": ["proj_002"],
+                    },
+                ),
+            ],
+            text="",
+        )
+
+        assert AliasIndex(path=None).annotate(result) == 1
+        assert result.extractions[0].attributes["project_ids"] == ["proj_001"]
+        assert "project_ids" not in result.extractions[1].attributes
+
+
+class TestIntegrationAliases:
+    """Test alias resolution in IntegrationExtractor."""
+
+    def test_snippets_are_resolved_with_the_current_index(self, tmp_path: Path) -> None:
+        """Test that keywords are resolved at Phase 2 and stale project_ids ignored."""
+        writer = ShardWriter(tmp_path / "phase1")
+        writer.append(
+            "a.md",
+            lx.data.AnnotatedDocument(
+                extractions=[
+                    lx.data.Extraction(
+                        extraction_class="リスク",
+                        extraction_text="期限が厳しい",
+                        attributes={"project_keywords": ["インボイス読み取り", "新規"]},
+                    ),
+                    lx.data.Extraction(
+                        extraction_class="気づき",
+                        extraction_text="関係のない話",
+                        attributes={
+                            "project_keywords": ["新規"],
+                            "project_ids": ["proj_003"],
+                        },
+                    ),
+                ],
+                text="",
+            ),
+        )
+        writer.close()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+        index = AliasIndex(path=None)
+        # フェーズ1の後に別名が追加された
+        index.register("請求書OCR", ["OCR", "インボイス読み取り"])
+        extractor = IntegrationExtractor(aliases=index)
+
+        related = extractor._collect_related_snippets([("ocr", [])], store)
+        first, second = list(store.iter_snippets())
+        text = extractor._format_snippet(first)
+        groups = list(extractor._partition_snippets(store))
+
+        assert [s["content"] for s in related[0]] == ["期限が厳しい"]
+        assert "Projects: 請求書OCR (proj_003)" in text
+        assert "Keywords: 新規" in text
+        assert "Projects" not in extractor._format_snippet(second)
+        assert groups == [
+            "既知のプロジェクト候補:\n"
+            "- proj_003: 請求書OCR（別名: OCR, インボイス読み取り）\n\n"
+            + "".join(
+                extractor._partition(
+                    (
+                        (s["document"], extractor._format_snippet(s), [])
+                        for s in (first, second)
+                    ),
+                    "抽出されたスニペット一覧:\n\n",
+                )
+            )
+        ]
+        # 索引はプロンプトに載せない
+        assert "請求書OCR" not in extractor.prompt
+        store.close()
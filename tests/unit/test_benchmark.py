@@ -0,0 +1,67 @@
+"""Unit tests for benchmark baseline comparison."""
+
+from pathlib import Path
+
+import pytest
+
+from pm_pedia_langextract.poc import benchmark
+from pm_pedia_langextract.poc.benchmark import (
+    baseline_path,
+    compare_reports,
+    write_snippet_shards,
+)
+
+
+def _report(**values: tuple[float, bool]) -> dict:
+    return {
+        "results": {
+            name: {"name": name, "value": value, "unit": "", "higher_is_better": higher}
+            for name, (value, higher) in values.items()
+        }
+    }
+
+
+class TestCompareReports:
+    """Test compare_reports function."""
+
+    def test_flags_regressions_in_the_worse_direction(self) -> None:
+        """Test that only changes beyond tolerance in the bad direction regress."""
+        baseline = _report(docs=(100.0, True), peak=(10.0, False), jsonl=(50.0, True))
+        current = _report(docs=(70.0, True), peak=(11.0, False), jsonl=(80.0, True))
+
+        comparisons = compare_reports(current, baseline, 0.2)
+        regressed = {c.name: c.regressed for c in comparisons}
+
+        assert regressed == {"docs": True, "peak": False, "jsonl": False}
+
+    def test_ignores_metrics_missing_from_baseline(self) -> None:
+        """Test that new benchmark cases are not compared."""
+        comparisons = compare_reports(_report(new=(1.0, True)), _report(), 0.2)
+
+        assert comparisons == []
+
+
+class TestBaselinePath:
+    """Test baseline_path function."""
+
+    def test_picks_highest_version_not_newest_file(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the default baseline is chosen by version in the file name."""
+        monkeypatch.setattr(benchmark, "BASELINE_DIR", tmp_path)
+        for name in ["v0.10.0", "v0.2.0", "v0.9.1"]:
+            (tmp_path / f"{name}.json").write_text("{}")
+
+        assert baseline_path() == tmp_path / "v0.10.0.json"
+        assert baseline_path("v0.2.0") == tmp_path / "v0.2.0.json"
+
+
+class TestWriteSnippetShards:
+    """Test write_snippet_shards function."""
+
+    def test_splits_snippets_across_documents(self, tmp_path: Path) -> None:
+        """Test that the requested number of snippets is written."""
+        source = write_snippet_shards(tmp_path, total=250, per_document=100)
+
+        assert len(source) == 3
+        assert sum(len(data["extractions"]) for _, data in source.iter_records()) == 250
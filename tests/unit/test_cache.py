@@ -0,0 +1,111 @@
+"""Unit tests for the extraction cache."""
+
+import json
+from pathlib import Path
+
+import langextract as lx
+import pytest
+from langextract import data_lib
+
+from pm_pedia_langextract.poc.cache import ExtractionCache, make_cache_key
+
+
+def _document(text: str) -> lx.data.AnnotatedDocument:
+    return lx.data.AnnotatedDocument(
+        extractions=[
+            lx.data.Extraction(
+                extraction_class="課題",
+                extraction_text=text,
+                char_interval=lx.data.CharInterval(start_pos=0, end_pos=len(text)),
+                attributes={"project_keywords": ["スマートタグ"], "people": []},
+            )
+        ],
+        text=text,
+    )
+
+
+class TestMakeCacheKey:
+    """Test make_cache_key function."""
+
+    def test_key_changes_with_any_input(self) -> None:
+        """Test that every input participates in the key."""
+        base = make_cache_key("本文", "prompt", [], "model", {"extraction_passes": 1})
+
+        assert base == make_cache_key(
+            "本文", "prompt", [], "model", {"extraction_passes": 1}
+        )
+        assert base != make_cache_key(
+            "本文2", "prompt", [], "model", {"extraction_passes": 1}
+        )
+        assert base != make_cache_key(
+            "本文", "prompt", [], "model-2", {"extraction_passes": 1}
+        )
+        assert base != make_cache_key(
+            "本文", "prompt", [], "model", {"extraction_passes": 2}
+        )
+
+
+class TestExtractionCache:
+    """Test ExtractionCache class."""
+
+    def test_round_trip_counts_hits_and_misses(self, tmp_path: Path) -> None:
+        """Test that stored documents are returned and counters update."""
+        cache = ExtractionCache(tmp_path / "cache.sqlite3")
+
+        assert cache.get("k") is None
+        cache.put("k", _document("DBが遅い"))
+        restored = cache.get("k")
+
+        assert restored is not None
+        assert restored.extractions[0].extraction_text == "DBが遅い"
+        assert restored.extractions[0].char_interval.end_pos == 5
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_entries_persist_across_instances(self, tmp_path: Path) -> None:
+        """Test that the cache survives a process restart."""
+        db_path = tmp_path / "cache.sqlite3"
+        ExtractionCache(db_path).put("k", _document("決定"))
+
+        assert ExtractionCache(db_path).get("k") is not None
+
+    def test_max_entries_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        """Test that the least recently used entry is evicted first."""
+        cache = ExtractionCache(tmp_path / "cache.sqlite3", max_entries=2)
+        cache.put("a", _document("a"))
+        cache.put("b", _document("b"))
+        cache.get("a")
+        cache.put("c", _document("c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["entries"] == 2
+
+    def test_invalid_max_entries_raises_error(self, tmp_path: Path) -> None:
+        """Test that non-positive max_entries raises ValueError."""
+        with pytest.raises(ValueError, match="max_entries must be positive"):
+            ExtractionCache(tmp_path / "cache.sqlite3", max_entries=0)
+
+    def test_max_bytes_evicts_in_batches_below_cap(self, tmp_path: Path) -> None:
+        """Test that exceeding max_bytes evicts to the low-water mark, sizes in sync."""
+        entry_bytes = len(
+            json.dumps(
+                data_lib.annotated_document_to_dict(_document("x")), ensure_ascii=False
+            ).encode("utf-8")
+        )
+        cache = ExtractionCache(tmp_path / "cache.sqlite3", max_bytes=entry_bytes * 10)
+        for i in range(10):
+            cache.put(str(i), _document("x"))
+        cache.put("0", _document("x"))
+        assert cache.stats()["evictions"] == 0
+
+        cache.put("10", _document("x"))
+
+        stats = cache.stats()
+        assert stats["entries"] == 9
+        assert stats["bytes"] == entry_bytes * 9
+        assert cache.get("0") is not None and cache.get("1") is None
+        assert (
+            ExtractionCache(tmp_path / "cache.sqlite3").stats()["bytes"]
+            == stats["bytes"]
+        )
@@ -0,0 +1,85 @@
+"""Unit tests for offline snippet clustering."""
+
+from typing import Any, Dict, List
+
+from pm_pedia_langextract.poc.clustering import SnippetClusterer, char_ngrams, cosine
+from pm_pedia_langextract.poc.extractors import IntegrationExtractor
+
+
+def _snippet(snippet_id: int, text: str, keywords: List[str]) -> Dict[str, Any]:
+    return {
+        "id": snippet_id,
+        "document": "a.md",
+        "category": "課題",
+        "text": text,
+        "project_keywords": keywords,
+        "attributes": {"project_keywords": keywords},
+    }
+
+
+SNIPPETS = [
+    _snippet(1, "スマートタグのクラスタリング精度が低い", ["スマートタグ"]),
+    _snippet(2, "タグ候補の生成が遅い", ["ＳＭＡＲＴタグ", "スマートタグ"]),
+    _snippet(3, "スマートタグのクラスタリング精度を改善する", []),
+    _snippet(4, "CSVの取り込みでエラーが出る", ["マルチデータソース"]),
+    _snippet(5, "CSVの取り込みでエラーが出る件を再現した", []),
+    _snippet(6, "来週は休暇", []),
+]
+
+
+class TestSnippetClusterer:
+    """Test SnippetClusterer class."""
+
+    def test_groups_by_keyword_and_text_similarity(self) -> None:
+        """Test that shared keywords and similar texts end up in the same cluster."""
+        clusters = SnippetClusterer().cluster(iter(SNIPPETS))
+
+        assert [c.snippet_ids for c in clusters] == [[1, 2, 3], [4, 5], [6]]
+        assert clusters[0].keywords[0] == "スマートタグ"
+        assert [c.cluster_id for c in clusters] == [0, 1, 2]
+
+    def test_common_keywords_do_not_merge_everything(self) -> None:
+        """Test that keywords above the document-frequency cap are not used to union."""
+        snippets = [
+            _snippet(i, text, ["開発", own])
+            for i, (text, own) in enumerate(
+                [(f"タグの精度が低い{i}", "スマートタグ") for i in range(12)]
+                + [(f"CSVの列がずれる{i}", "データソース") for i in range(12)]
+            )
+        ]
+
+        merged = SnippetClusterer(max_keyword_df=1.0).cluster(snippets)
+        capped = SnippetClusterer(max_keyword_df=0.5).cluster(snippets)
+
+        assert len(merged) == 1
+        assert [c.snippet_ids for c in capped] == [list(range(12)), list(range(12, 24))]
+
+    def test_vectors_helpers(self) -> None:
+        """Test n-gram extraction on normalized text and sparse cosine."""
+        assert char_ngrams("Ａ b", sizes=(2,)) == ["ab"]
+        assert cosine({"a": 0.6, "b": 0.8}, {"a": 1.0}) == 0.6
+        assert SnippetClusterer().cluster([]) == []
+
+    def test_integration_partitions_per_cluster(self) -> None:
+        """Test that cluster groups keep every snippet and pool small clusters."""
+
+        class FakeStore:
+            def iter_snippets(self, since=None):
+                return iter(SNIPPETS)
+
+            def snippets_by_id(self, ids):
+                return (dict(s) for s in SNIPPETS if s["id"] in ids)
+
+        extractor = IntegrationExtractor(
+            clusterer=SnippetClusterer(), min_cluster_snippets=3
+        )
+        groups = list(extractor._partition_snippets(FakeStore()))
+
+        assert len(groups) == 2
+        assert groups[0].startswith("既知のプロジェクト候補:\n- proj_001: スマートタグ")
+        assert "\n関連キーワード: スマートタグ" in groups[0]
+        assert (
+            "proj_001" not in groups[1]
+            and "- proj_002: マルチデータソース" in groups[1]
+        )
+        assert "CSVの取り込みでエラーが出る" in groups[1] and "来週は休暇" in groups[1]
@@ -0,0 +1,140 @@
+"""Unit tests for near-duplicate snippet detection."""
+
+from pathlib import Path
+
+import langextract as lx
+import pytest
+
+from pm_pedia_langextract.poc.dedup import (
+    MinHasher,
+    estimate_jaccard,
+    group_near_duplicates,
+    shingles,
+)
+from pm_pedia_langextract.poc.extractors import IntegrationExtractor
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+
+ORIGINAL = (
+    "スマートタグのクラスタリング精度が低く、ハルシネーションが多いので改善が必要"
+)
+PARAPHRASE = (
+    "スマートタグのクラスタリング精度が低く、ハルシネーションが多いため改善が必要。"
+)
+
+
+class TestMinHasher:
+    """Test MinHasher class and helpers."""
+
+    def test_signatures_estimate_similarity(self) -> None:
+        """Test that paraphrases share most of their signature and others do not."""
+        hasher = MinHasher()
+        original, paraphrase = hasher.signature(ORIGINAL), hasher.signature(PARAPHRASE)
+        other = hasher.signature("CSVの取り込みでエラーが出るので再現手順をまとめる")
+
+        assert shingles("Ａ、b c") == {"abc"}
+        assert hasher.signature("、。") is None
+        assert estimate_jaccard(original, paraphrase) >= 0.7
+        assert estimate_jaccard(original, other) < 0.2
+        assert set(hasher.band_keys(original)) & set(hasher.band_keys(paraphrase))
+        assert hasher.unpack(hasher.pack(original)) == original
+
+    def test_groups_candidates_above_threshold(self) -> None:
+        """Test that bucket members merge transitively under the smallest id."""
+        signatures = {
+            1: (1, 2, 3, 4),
+            2: (1, 2, 3, 5),
+            3: (1, 2, 9, 5),
+            4: (7, 7, 7, 7),
+        }
+
+        groups = group_near_duplicates([[2, 3], [1, 2, 4]], signatures, threshold=0.7)
+
+        assert groups == {1: [1, 2, 3]}
+
+
+class TestCanonicalSnippets:
+    """Test SnippetStore.canonical_snippets."""
+
+    def test_collapses_duplicates_across_documents(self, tmp_path: Path) -> None:
+        """Test that re-quoted snippets become one snippet listing every source."""
+        writer = ShardWriter(tmp_path / "phase1")
+        for document, texts in [
+            ("a.md", [ORIGINAL, "来週は休暇"]),
+            ("b.md", [PARAPHRASE]),
+            ("c.md", [ORIGINAL, "CSVの取り込みでエラーが出る"]),
+        ]:
+            writer.append(document, lx.data.AnnotatedDocument(
+                extractions=[
+                    lx.data.Extraction(extraction_class="課題", extraction_text=text)
+                    for text in texts
+                ],
+                text="",
+            ))
+        writer.close()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+
+        snippets = list(store.canonical_snippets())
+        related = IntegrationExtractor(dedup_threshold=0.7)._collect_related_snippets(
+            [("スマートタグ", [])], store
+        )
+
+        assert [s["text"] for s in snippets] == [
+            ORIGINAL, "来週は休暇", "CSVの取り込みでエラーが出る",
+        ]
+        assert snippets[0]["sources"] == ["a.md", "b.md", "c.md"]
+        assert snippets[0]["duplicates"] == 2
+        assert snippets[1]["sources"] == ["a.md"]
+        assert [s["sources"] for s in related[0]] == [["a.md", "b.md", "c.md"]]
+        assert "Sources: a.md, b.md, c.md" in IntegrationExtractor()._format_snippet(
+            snippets[0]
+        )
+        store.close()
+
+    def test_groups_are_reused_until_the_store_changes(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that near-duplicate groups are computed once per store generation."""
+        writer = ShardWriter(tmp_path / "phase1")
+        for document in ["a.md", "b.md"]:
+            writer.append(
+                document,
+                lx.data.AnnotatedDocument(
+                    extractions=[
+                        lx.data.Extraction(
+                            extraction_class="課題", extraction_text=ORIGINAL
+                        )
+                    ],
+                    text="",
+                ),
+            )
+        writer.commit()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+        calls = []
+        compute = store.near_duplicate_groups
+
+        def counting(threshold: float) -> dict:
+            calls.append(threshold)
+            return compute(threshold)
+
+        monkeypatch.setattr(store, "near_duplicate_groups", counting)
+
+        list(store.canonical_snippets())
+        list(store.canonical_snippets())
+        assert calls == [0.7]
+
+        writer.append("c.md", lx.data.AnnotatedDocument(
+            extractions=[
+                lx.data.Extraction(extraction_class="課題", extraction_text=PARAPHRASE)
+            ],
+            text="",
+        ))
+        writer.close()
+        store.sync(ShardReader(tmp_path / "phase1"))
+        snippets = list(store.canonical_snippets())
+
+        assert calls == [0.7, 0.7]
+        assert snippets[0]["sources"] == ["a.md", "b.md", "c.md"]
+        store.close()
@@ -0,0 +1,136 @@
+"""Unit tests for section splitting and diff-aware re-extraction."""
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.incremental import merge_extractions, plan_reextraction
+from pm_pedia_langextract.poc.sections import build_outline, split_sections
+
+OLD_TEXT = "# PRD\n\n## 課題\nDBが遅い\n\n## 決定事項\nMinHashを採用\n"
+NEW_TEXT = "# PRD\n\n## 背景\n新しい節\n\n## 課題\nDBが遅い\n\n## 決定事項\nLSHも採用\n"
+
+
+def _extraction(text: str, source: str, extraction_class: str) -> lx.data.Extraction:
+    start = source.index(text)
+    return lx.data.Extraction(
+        extraction_class=extraction_class,
+        extraction_text=text,
+        char_interval=lx.data.CharInterval(start_pos=start, end_pos=start + len(text)),
+    )
+
+
+class TestSplitSections:
+    """Test split_sections function."""
+
+    def test_sections_cover_whole_text(self) -> None:
+        """Test that concatenated sections reproduce the input."""
+        sections = split_sections(OLD_TEXT)
+
+        assert "".join(s.text(OLD_TEXT) for s in sections) == OLD_TEXT
+        assert [s.heading for s in sections] == ["PRD", "課題", "決定事項"]
+
+    def test_long_section_is_split_at_paragraphs(self) -> None:
+        """Test that oversized sections are cut at blank lines."""
+        text = "## 長い節\n" + "\n\n".join(["あ" * 40] * 5)
+
+        sections = split_sections(text, max_chars=100)
+
+        assert len(sections) > 1
+        assert all(s.end - s.start <= 100 for s in sections)
+        assert "".join(s.text(text) for s in sections) == text
+
+
+class TestBuildOutline:
+    """Test build_outline function."""
+
+    def test_keeps_headings_and_top_level_heads(self) -> None:
+        """Test that only the title and top-level section heads keep body text."""
+        text = "# PRD\n概要\n\n## 課題\n" + "あ" * 50 + "\n\n### 詳細\n" + "い" * 50
+
+        outline = build_outline(text, section_chars=10)
+
+        assert outline == "# PRD\n概要\n\n## 課題\n" + "あ" * 10 + "…\n\n### 詳細"
+
+
+class TestPlanReextraction:
+    """Test plan_reextraction function."""
+
+    def test_only_changed_sections_are_reextracted(self) -> None:
+        """Test that untouched extractions are shifted and edits re-extracted."""
+        previous = lx.data.AnnotatedDocument(
+            extractions=[
+                _extraction("DBが遅い", OLD_TEXT, "課題"),
+                _extraction("MinHashを採用", OLD_TEXT, "決定事項"),
+            ],
+            text=OLD_TEXT,
+        )
+
+        plan = plan_reextraction(previous, NEW_TEXT)
+
+        assert [e.extraction_text for e in plan.reused] == ["DBが遅い"]
+        reused = plan.reused[0].char_interval
+        assert NEW_TEXT[reused.start_pos:reused.end_pos] == "DBが遅い"
+        changed = [NEW_TEXT[start:end] for start, end in plan.changed_regions]
+        assert changed == ["## 背景\n新しい節\n\n", "## 決定事項\nLSHも採用\n"]
+
+    def test_extractions_across_section_boundaries(self) -> None:
+        """Test that boundary-crossing extractions are kept or re-extracted."""
+        old_text = "# A\n前半\n# B\n後半\n# C\n古い節\n"
+        new_text = "# 序\n追加\n# A\n前半\n# B\n後半\n# C\n新しい節\n"
+        previous = lx.data.AnnotatedDocument(
+            extractions=[
+                _extraction("前半\n# B\n後半", old_text, "課題"),
+                _extraction("後半\n# C\n古い", old_text, "リスク"),
+            ],
+            text=old_text,
+        )
+
+        plan = plan_reextraction(previous, new_text)
+
+        assert plan.reused == []
+        changed = [new_text[start:end] for start, end in plan.changed_regions]
+        # Cの変更にかかる抽出がBを、Bにかかる抽出がAを再抽出範囲に引き込む
+        assert changed == [new_text]
+
+        unchanged = plan_reextraction(
+            lx.data.AnnotatedDocument(
+                extractions=previous.extractions[:1], text=old_text
+            ),
+            new_text,
+        )
+        interval = unchanged.reused[0].char_interval
+        assert new_text[interval.start_pos:interval.end_pos] == "前半\n# B\n後半"
+        assert [new_text[s:e] for s, e in unchanged.changed_regions] == [
+            "# 序\n追加\n", "# C\n新しい節\n"
+        ]
+
+    def test_merge_shifts_region_results(self) -> None:
+        """Test that region extractions are mapped back to document offsets."""
+        region_start = NEW_TEXT.index("## 決定事項")
+        region_text = NEW_TEXT[region_start:]
+        region_result = lx.data.AnnotatedDocument(
+            extractions=[_extraction("LSHも採用", region_text, "決定事項")],
+            text=region_text,
+        )
+
+        merged = merge_extractions([], [(region_start, region_result)])
+
+        interval = merged[0].char_interval
+        assert NEW_TEXT[interval.start_pos:interval.end_pos] == "LSHも採用"
+        assert merged[0].extraction_index == 1
+
+    def test_positionless_extractions_in_changed_regions_are_dropped(self) -> None:
+        """Test that positionless extractions are reused only outside changes."""
+        previous = lx.data.AnnotatedDocument(
+            extractions=[
+                lx.data.Extraction(extraction_class="課題", extraction_text="DBが遅い"),
+                lx.data.Extraction(extraction_class="決定事項", extraction_text="採用"),
+            ],
+            text=OLD_TEXT,
+        )
+
+        plan = plan_reextraction(previous, NEW_TEXT)
+        merged = merge_extractions(plan.reused, [])
+
+        assert [e.extraction_text for e in plan.reused] == ["DBが遅い"]
+        assert merged[0] is not previous.extractions[0]
+        assert previous.extractions[0].extraction_index is None
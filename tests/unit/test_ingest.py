@@ -0,0 +1,52 @@
+"""Unit tests for streaming directory ingestion."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pm_pedia_langextract.poc.ingest import DirectoryWatcher, iter_documents
+
+
+def _write(path: Path, text: str = "# doc") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+class TestIterDocuments:
+    """Test iter_documents function."""
+
+    def test_walks_tree_in_name_order(self, tmp_path: Path) -> None:
+        """Test that matching files are yielded depth-first in name order."""
+        _write(tmp_path / "b.md")
+        _write(tmp_path / "a" / "z.md")
+        _write(tmp_path / "a" / "notes.txt")
+        _write(tmp_path / ".hidden" / "secret.md")
+
+        paths = list(iter_documents(tmp_path))
+
+        assert paths == [tmp_path / "a" / "z.md", tmp_path / "b.md"]
+
+    def test_missing_root_raises_error(self, tmp_path: Path) -> None:
+        """Test that a missing root directory raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            next(iter_documents(tmp_path / "missing"))
+
+
+class TestDirectoryWatcher:
+    """Test DirectoryWatcher class."""
+
+    def test_poll_reports_new_and_modified_files(self, tmp_path: Path) -> None:
+        """Test that only new or modified files are reported after the first poll."""
+        first = _write(tmp_path / "first.md")
+        watcher = DirectoryWatcher(tmp_path, interval=0.1)
+
+        assert watcher.poll() == [first]
+        assert watcher.poll() == []
+
+        second = _write(tmp_path / "second.md")
+        _write(first, "# edited and longer")
+        os.utime(first, ns=(0, 10**9))
+
+        assert sorted(watcher.poll()) == [first, second]
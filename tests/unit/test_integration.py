@@ -0,0 +1,217 @@
+"""Unit tests for hierarchical Phase 2 integration."""
+
+import json
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.accounting import configure_accountant
+from pm_pedia_langextract.poc.extractors import IntegrationExtractor
+from pm_pedia_langextract.poc.providers import Cassette, LatencyModel, ReplayProvider
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+
+PROJECT_OUTPUT = json.dumps(
+    {
+        "extractions": [
+            {
+                "project": "スマートタグ",
+                "project_attributes": {"status": "順調", "aliases": ["タグ"]},
+            },
+        ]
+    },
+    ensure_ascii=False,
+)
+
+
+def _write(
+    tmp_path: Path, documents: range, per_document: int, topic: str = "スマートタグ"
+) -> None:
+    writer = ShardWriter(tmp_path / "phase1")
+    for d in documents:
+        writer.append(
+            f"doc{d}.md",
+            lx.data.AnnotatedDocument(
+                extractions=[
+                    lx.data.Extraction(
+                        extraction_class="課題", extraction_text=f"{topic}の課題{d}-{i}"
+                    )
+                    for i in range(per_document)
+                ],
+                text="",
+            ),
+        )
+    writer.close()
+
+
+def _store(tmp_path: Path, documents: int, per_document: int) -> SnippetStore:
+    _write(tmp_path, range(documents), per_document)
+    store = SnippetStore(tmp_path / "store.sqlite3")
+    store.sync(ShardReader(tmp_path / "phase1"))
+    return store
+
+
+class TestHierarchicalIntegration:
+    """Test map-reduce integration in IntegrationExtractor."""
+
+    def test_partition_covers_every_snippet(self, tmp_path: Path) -> None:
+        """Test that groups respect the budget, repeat headings and drop nothing."""
+        store = _store(tmp_path, documents=30, per_document=4)
+        extractor = IntegrationExtractor(group_chars=200)
+
+        groups = list(extractor._partition_snippets(store))
+        text = "".join(groups)
+
+        assert len(groups) > 1
+        assert all(len(group) <= 200 for group in groups)
+        assert all("[Document: " in group for group in groups)
+        assert all(
+            f"スマートタグの課題{d}-{i}" in text for d in range(30) for i in range(4)
+        )
+        store.close()
+
+    def test_map_reduce_merges_partial_projects(self, tmp_path: Path) -> None:
+        """Test that several map groups are reduced into one project list."""
+        configure_accountant()
+        store = _store(tmp_path, documents=10, per_document=5)
+        extractor = IntegrationExtractor(group_chars=300)
+        extractor.provider = ReplayProvider(
+            Cassette(tmp_path / "cassette.jsonl"), LatencyModel(scale=0.0),
+            fallback_output=PROJECT_OUTPUT,
+        )
+
+        result = extractor.extract(store)
+        metadata = result["extraction_metadata"]
+
+        assert metadata["map_groups"] > 1
+        assert metadata["reduce_rounds"] >= 1
+        assert [p["project_name"] for p in result["unified_projects"]] == [
+            "スマートタグ"
+        ]
+        assert set(metadata["usage"]["by_stage"]) == {
+            "integration.map",
+            "integration.reduce",
+        }
+        store.close()
+
+    def test_duplicate_projects_left_after_reduce_are_merged(self) -> None:
+        """Test that projects sharing a normalized name or alias become one."""
+        projects = [
+            lx.data.Extraction(
+                extraction_class="project",
+                extraction_text="スマートタグ",
+                attributes={"aliases": ["タグ"], "people": ["田中"]},
+            ),
+            lx.data.Extraction(
+                extraction_class="project",
+                extraction_text="CSV取り込み",
+                attributes={"status": "順調"},
+            ),
+            lx.data.Extraction(
+                extraction_class="project",
+                extraction_text="ＳｍａｒｔＴａｇ",
+                attributes={
+                    "aliases": ["タグ"],
+                    "status": "停滞",
+                    "people": ["鈴木", "田中"],
+                },
+            ),
+        ]
+
+        merged = IntegrationExtractor._merge_duplicate_projects(projects)
+
+        assert [p.extraction_text for p in merged] == ["スマートタグ", "CSV取り込み"]
+        assert merged[0].attributes == {
+            "aliases": ["タグ", "ＳｍａｒｔＴａｇ"],
+            "key_themes": [],
+            "people": ["田中", "鈴木"],
+            "status": "停滞",
+        }
+
+
+class TestIncrementalIntegration:
+    """Test IntegrationExtractor.extract_incremental."""
+
+    def test_scalar_list_attributes_are_not_split(self) -> None:
+        """Test that a single string returned for a list attribute stays one value."""
+        project = {
+            "project_id": "proj_001",
+            "project_name": "スマートタグ",
+            "aliases": ["タグ"],
+            "status": "順調",
+            "summary": "",
+            "last_updated": "2024-01-01T00:00:00",
+            "key_themes": [],
+            "mentioned_people": [],
+            "information_snippets": [],
+        }
+        extraction = lx.data.Extraction(
+            extraction_class="project", extraction_text="スマートタグ",
+            attributes={"aliases": "SmartTag", "key_themes": "性能", "people": "田中"},
+        )
+
+        updated = IntegrationExtractor._apply_update(project, extraction, [])
+
+        assert updated["aliases"] == ["タグ", "SmartTag"]
+        assert updated["key_themes"] == ["性能"]
+        assert updated["mentioned_people"] == ["田中"]
+
+    def test_store_generation_tracks_new_documents(self, tmp_path: Path) -> None:
+        """Test that only syncs with changes advance the generation."""
+        store = _store(tmp_path, documents=2, per_document=2)
+        assert store.generation() == 1
+        assert store.sync(ShardReader(tmp_path / "phase1"))["unchanged"] == 2
+        assert store.generation() == 1
+
+        _write(tmp_path, range(2, 3), per_document=2)
+        store.sync(ShardReader(tmp_path / "phase1"))
+
+        assert store.generation() == 2
+        assert {s["document"] for s in store.iter_snippets(since=1)} == {"doc2.md"}
+        assert len(list(store.iter_snippets(since=2))) == 0
+        store.close()
+
+    def test_updates_only_projects_with_new_snippets(self, tmp_path: Path) -> None:
+        """Test that new snippets re-summarize only the affected projects."""
+        configure_accountant()
+        store = _store(tmp_path, documents=2, per_document=2)
+        extractor = IntegrationExtractor()
+        extractor.provider = ReplayProvider(
+            Cassette(tmp_path / "cassette.jsonl"), LatencyModel(scale=0.0),
+            fallback_output=PROJECT_OUTPUT,
+        )
+        previous = extractor.extract(store)
+        untouched = {
+            "project_id": "proj_007",
+            "project_name": "マルチデータソース",
+            "aliases": [],
+            "status": "停滞",
+            "summary": "CSV取り込み",
+            "last_updated": "2024-01-01T00:00:00",
+            "key_themes": [],
+            "mentioned_people": [],
+            "information_snippets": [],
+        }
+        previous["unified_projects"].append(untouched)
+        assert previous["extraction_metadata"]["store_generation"] == 1
+
+        assert extractor.extract_incremental(store, previous)["unified_projects"] == (
+            previous["unified_projects"]
+        )
+
+        _write(tmp_path, range(2, 3), per_document=1)
+        store.sync(ShardReader(tmp_path / "phase1"))
+        result = extractor.extract_incremental(store, previous)
+        projects = {p["project_name"]: p for p in result["unified_projects"]}
+        metadata = result["extraction_metadata"]
+
+        assert list(projects) == ["スマートタグ", "マルチデータソース"]
+        assert projects["マルチデータソース"] == untouched
+        assert projects["スマートタグ"]["information_snippets"][-1]["content"] == (
+            "スマートタグの課題2-0"
+        )
+        assert len(projects["スマートタグ"]["information_snippets"]) == 5
+        assert metadata["store_generation"] == 2
+        assert (metadata["updated_projects"], metadata["new_projects"]) == (1, 0)
+        assert "integration.update" in metadata["usage"]["by_stage"]
+        store.close()
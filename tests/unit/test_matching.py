@@ -0,0 +1,82 @@
+"""Unit tests for multi-pattern matching and snippet attribution."""
+
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.extractors import IntegrationExtractor
+from pm_pedia_langextract.poc.matching import PatternMatcher, normalize
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+
+
+class TestPatternMatcher:
+    """Test PatternMatcher class."""
+
+    def test_finds_overlapping_patterns(self) -> None:
+        """Test that overlapping and nested patterns are all reported in one pass."""
+        matcher: PatternMatcher[str] = PatternMatcher()
+        for pattern in ["he", "she", "his", "hers"]:
+            matcher.add(pattern, pattern)
+
+        assert matcher.find("ushers") == {"he", "she", "hers"}
+        assert matcher.find("this") == {"his"}
+        assert matcher.find("xyz") == set()
+
+    def test_matches_normalized_text(self) -> None:
+        """Test NFKC and case folding on both patterns and text."""
+        matcher: PatternMatcher[int] = PatternMatcher()
+        matcher.add_all(["CSV", "ｽﾏｰﾄﾀｸﾞ"], 1)
+        matcher.add("スマート", 2)
+
+        assert normalize("ＳｍａｒｔＴａｇ") == "smarttag"
+        assert matcher.find("ｃｓｖの取り込み") == {1}
+        assert matcher.find("スマートタグの改善") == {1, 2}
+        assert matcher.exact("Csv") == {1}
+        assert matcher.exact("csvファイル") == frozenset()
+
+
+class TestCollectRelatedSnippets:
+    """Test IntegrationExtractor._collect_related_snippets."""
+
+    def test_attributes_snippets_to_all_matching_projects(self, tmp_path: Path) -> None:
+        """Test that one pass assigns snippets by text and by project keyword."""
+        writer = ShardWriter(tmp_path / "phase1")
+        writer.append(
+            "a.md",
+            lx.data.AnnotatedDocument(
+                extractions=[
+                    lx.data.Extraction(
+                        extraction_class="課題",
+                        extraction_text="タグのクラスタリングが遅い",
+                    ),
+                    lx.data.Extraction(
+                        extraction_class="決定事項",
+                        extraction_text="ＣＳＶ取り込みを優先",
+                    ),
+                    lx.data.Extraction(
+                        extraction_class="リスク",
+                        extraction_text="期限が厳しい",
+                        attributes={"project_keywords": ["Smart Tag"]},
+                    ),
+                    lx.data.Extraction(
+                        extraction_class="気づき", extraction_text="関係のない話"
+                    ),
+                ],
+                text="",
+            ),
+        )
+        writer.close()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+
+        related = IntegrationExtractor()._collect_related_snippets(
+            [("スマートタグ", ["smart tag"]), ("マルチデータソース", [])], store
+        )
+
+        assert [s["content"] for s in related[0]] == [
+            "タグのクラスタリングが遅い",
+            "期限が厳しい",
+        ]
+        assert [s["content"] for s in related[1]] == ["ＣＳＶ取り込みを優先"]
+        store.close()
@@ -0,0 +1,131 @@
+"""Unit tests for the pipelined Phase 1 runner."""
+
+import threading
+import time
+from pathlib import Path
+from typing import ClassVar
+
+import langextract as lx
+import pytest
+
+from pm_pedia_langextract.poc.main import _build_pipeline
+from pm_pedia_langextract.poc.manifest import DocumentManifest
+from pm_pedia_langextract.poc.pipeline import Phase1Config, Phase1Pipeline
+
+
+def _triage_doc() -> lx.data.AnnotatedDocument:
+    return lx.data.AnnotatedDocument(
+        extractions=[
+            lx.data.Extraction(
+                extraction_class="document_type", extraction_text="日報"
+            ),
+            lx.data.Extraction(extraction_class="summary", extraction_text="要約"),
+        ],
+        text="",
+    )
+
+
+class FakeTriage:
+    """Triage stand-in that records how many calls overlap."""
+
+    model_id = "fake"
+    prompt = "triage"
+    examples: ClassVar[list] = []
+
+    def __init__(self, scores: dict[str, float], delay: float = 0.0) -> None:
+        self.calls = 0
+        self.scores = scores
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def extract(self, document_path: Path):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        score = self.scores[document_path.name]
+        return _triage_doc(), score
+
+
+class TestPhase1Pipeline:
+    """Test Phase1Pipeline class."""
+
+    def test_results_keep_input_order(self) -> None:
+        """Test that results come back in input order regardless of timing."""
+        names = [f"doc_{i}.md" for i in range(6)]
+        triage = FakeTriage({name: 0.1 for name in names}, delay=0.01)
+        pipeline = Phase1Pipeline(
+            triage, None, Phase1Config(max_in_flight=3, triage_concurrency=3)
+        )
+
+        results = pipeline.run(Path(name) for name in names)
+
+        assert [r["document"] for r in results] == names
+        assert all(r["processed"] is False for r in results)
+
+    def test_triage_concurrency_is_bounded(self) -> None:
+        """Test that triage calls never exceed the configured concurrency."""
+        names = [f"doc_{i}.md" for i in range(8)]
+        triage = FakeTriage({name: 0.1 for name in names}, delay=0.02)
+        pipeline = Phase1Pipeline(
+            triage, None, Phase1Config(max_in_flight=4, triage_concurrency=2)
+        )
+
+        pipeline.run(Path(name) for name in names)
+
+        assert triage.max_active == 2
+
+    def test_manifest_skips_unchanged_documents(self, tmp_path: Path) -> None:
+        """Test that unchanged documents are carried forward from the manifest."""
+        docs = [tmp_path / "a.md", tmp_path / "b.md"]
+        for doc in docs:
+            doc.write_text(f"# {doc.stem}", encoding="utf-8")
+        manifest_path = tmp_path / "manifest.json"
+        triage = FakeTriage({"a.md": 0.1, "b.md": 0.2})
+
+        Phase1Pipeline(triage, triage, manifest=DocumentManifest(manifest_path)).run(
+            docs
+        )
+        docs[1].write_text("# b (edited)", encoding="utf-8")
+        results = Phase1Pipeline(
+            triage, triage, manifest=DocumentManifest(manifest_path)
+        ).run(docs)
+
+        assert triage.calls == 3
+        assert results[0]["reused"] is True
+        assert results[0]["relevance_score"] == 0.1
+        assert "reused" not in results[1]
+
+    def test_fused_mode_is_selected_by_path(self, tmp_path: Path) -> None:
+        """Test that matching documents skip the separate triage call."""
+        for name in ("reviews/w33.md", "notes/memo.md"):
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).write_text("# doc", encoding="utf-8")
+        triage = FakeTriage({"memo.md": 0.1})
+        fused = FakeTriage({"w33.md": 0.2})
+        fused.extract = lambda path: (_triage_doc(), 0.2, _triage_doc())  # type: ignore[method-assign]
+        config = Phase1Config(input_root=tmp_path, fused_patterns=("reviews/*",))
+
+        results = Phase1Pipeline(
+            triage, None, config, fused_extractor=fused
+        ).run([tmp_path / "reviews/w33.md", tmp_path / "notes/memo.md"])
+
+        assert triage.calls == 1
+        assert [r["triage_source"] for r in results] == ["fused", "llm"]
+
+    def test_invalid_max_in_flight_raises_error(self) -> None:
+        """Test that non-positive max_in_flight raises ValueError."""
+        with pytest.raises(ValueError, match="max_in_flight must be positive"):
+            Phase1Config(max_in_flight=0)
+
+    def test_fused_document_types_require_incremental(self) -> None:
+        """Test that document-type fused mode is rejected without a manifest."""
+        config = Phase1Config(fused_document_types=("日報",))
+
+        with pytest.raises(ValueError, match="--incremental"):
+            _build_pipeline(config, None, incremental=False)
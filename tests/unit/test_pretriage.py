@@ -0,0 +1,75 @@
+"""Unit tests for the local lexical pre-triage."""
+
+import json
+from pathlib import Path
+
+from pm_pedia_langextract.poc.pretriage import LexicalPreTriage
+
+RELEVANT = [
+    f"スマートタグの企画定例{i}。KPIとユーザー課題、次のアクションを議論した。"
+    for i in range(6)
+]
+IRRELEVANT = [
+    f"ランチ会のお知らせ{i}。来週の懇親会の場所と集合時間を連絡します。"
+    for i in range(6)
+]
+
+
+def _trained_model() -> LexicalPreTriage:
+    model = LexicalPreTriage()
+    model.fit((text, 0.9, "議事録") for text in RELEVANT)
+    model.fit((text, 0.1, "連絡") for text in IRRELEVANT)
+    return model
+
+
+class TestLexicalPreTriage:
+    """Test LexicalPreTriage class."""
+
+    def test_uncertain_until_ready(self) -> None:
+        """Test that an untrained model always escalates to the LLM."""
+        model = LexicalPreTriage()
+
+        assert model.triage("doc.md", RELEVANT[0]) is None
+        assert model.stats()["escalated"] == 1
+
+    def test_confident_decisions(self) -> None:
+        """Test that obvious documents are decided locally."""
+        model = _trained_model()
+
+        high = model.triage("a.md", "スマートタグのKPIとユーザー課題を議論した企画定例")
+        low = model.triage("b.md", "懇親会の場所と集合時間のお知らせ")
+
+        assert high is not None and high[1] >= 0.95
+        assert low is not None and low[1] <= 0.05
+        assert high[0].extractions[0].extraction_text == "議事録"
+        assert all(e.attributes["source"] == "pretriage" for e in high[0].extractions)
+        assert model.stats()["llm_calls_avoided"] == 2
+
+    def test_save_and_load_roundtrip(self, tmp_path: Path) -> None:
+        """Test that the learned state survives save/load."""
+        model = _trained_model()
+        path = tmp_path / "pretriage.json"
+        model.save(path)
+
+        loaded = LexicalPreTriage.load(path)
+        text = "懇親会の場所と集合時間のお知らせ"
+
+        assert loaded.is_ready()
+        assert loaded.predict(text).probability == model.predict(text).probability
+
+    def test_save_caps_vocabulary(self, tmp_path: Path) -> None:
+        """Test that saving keeps only the most frequent max_features n-grams."""
+        model = LexicalPreTriage(max_features=3)
+        model.observe("abab", 0.9)
+        model.observe("abc", 0.1)
+        model.observe("xyz", 0.1)
+        path = tmp_path / "pretriage.json"
+        model.save(path)
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        features = set(data["feature_counts"]["relevant"]) | set(
+            data["feature_counts"]["irrelevant"]
+        )
+
+        assert len(features) == 3
+        assert "ab" in features
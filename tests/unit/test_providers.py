@@ -0,0 +1,129 @@
+"""Unit tests for the record/replay model provider."""
+
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+from langextract.core import base_model
+from langextract.core import types as lx_types
+
+from pm_pedia_langextract.poc.cache import ExtractionCache
+from pm_pedia_langextract.poc.extractors import TriageExtractor
+from pm_pedia_langextract.poc.providers import (
+    Cassette,
+    LatencyModel,
+    RecordingModel,
+    RecordingProvider,
+    ReplayProvider,
+)
+
+OUTPUT = (
+    '```json\n{"extractions": '
+    '[{"document_type": "日報"}, {"relevance_score": "0.8"}]}\n```'
+)
+
+
+class FakeLiveModel(base_model.BaseLanguageModel):
+    """Stand-in for the live Gemini model."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.prompts: list[str] = []
+        self.batches: list[int] = []
+
+    def infer(
+        self, batch_prompts: Sequence[str], **kwargs: Any
+    ) -> Iterator[Sequence[lx_types.ScoredOutput]]:
+        self.batches.append(len(batch_prompts))
+        for prompt in batch_prompts:
+            self.prompts.append(prompt)
+            yield [lx_types.ScoredOutput(score=1.0, output=OUTPUT)]
+
+
+class FakeRecordingProvider(RecordingProvider):
+    """Recording provider that wraps the fake live model."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        super().__init__(cassette)
+        self.live = FakeLiveModel()
+
+    def create_model(
+        self, model_id: str, examples: Any, max_workers: int
+    ) -> RecordingModel:
+        return RecordingModel(self.live, self.cassette, model_id)
+
+
+class TestRecordReplay:
+    """Test recording to a cassette and replaying it offline."""
+
+    def test_replay_reproduces_recorded_responses(self, tmp_path: Path) -> None:
+        """Test that replay serves recorded outputs and falls back when unseen."""
+        cassette_path = tmp_path / "cassette.jsonl"
+        recorder = FakeRecordingProvider(Cassette(cassette_path))
+        extractor = TriageExtractor()
+        extractor.provider = recorder
+
+        _, recorded_score = extractor.extract_text("a.md", "本日の進捗と課題")
+
+        replay = ReplayProvider(Cassette(cassette_path), LatencyModel(scale=0.0))
+        extractor.provider = replay
+        _, replayed_score = extractor.extract_text("a.md", "本日の進捗と課題")
+        _, unseen_score = extractor.extract_text("b.md", "未記録の文書")
+
+        assert recorded_score == replayed_score == 0.8
+        assert unseen_score == 0.0
+        assert len(recorder.live.prompts) == 1
+        assert replay.stats() == {"hits": 1, "misses": 1}
+
+    def test_recording_bypasses_the_cache(self, tmp_path: Path) -> None:
+        """Test that repeated prompts still reach the live model while recording."""
+        cassette = Cassette(tmp_path / "cassette.jsonl")
+        recorder = FakeRecordingProvider(cassette)
+        cache = ExtractionCache(tmp_path / "cache.sqlite3")
+        extractor = TriageExtractor(cache=cache)
+        extractor.provider = recorder
+
+        extractor.extract_text("a.md", "本日の進捗と課題")
+        extractor.extract_text("a.md", "本日の進捗と課題")
+
+        assert len(recorder.live.prompts) == 2
+        assert len(cassette) == 2
+        cache.close()
+
+    def test_recording_passes_batches_through(self, tmp_path: Path) -> None:
+        """Test that a batch reaches the live model at once and each output is kept."""
+        cassette = Cassette(tmp_path / "cassette.jsonl")
+        live = FakeLiveModel()
+        model = RecordingModel(live, cassette, "m", max_workers=2)
+
+        outputs = list(model.infer(["p1", "p2", "p3"]))
+
+        assert live.batches == [3]
+        assert [o[0].output for o in outputs] == [OUTPUT] * 3
+        assert len(cassette) == 3
+
+    def test_configured_latency_is_deterministic(self) -> None:
+        """Test that the lognormal latency model is seeded and scaled."""
+        first = LatencyModel(median=0.2, seed=1, scale=2.0)
+        second = LatencyModel(median=0.2, seed=1, scale=2.0)
+
+        samples = [first.sample(None, 0.0) for _ in range(5)]
+
+        assert samples == [second.sample(None, 0.0) for _ in range(5)]
+        assert LatencyModel(scale=0.5).sample(1.0, 0.0) == 0.5
+
+    def test_cassette_cycles_over_appended_entries(self, tmp_path: Path) -> None:
+        """Test that entries appended after replay started join the rotation."""
+        cassette = Cassette(tmp_path / "cassette.jsonl")
+        cassette.append(
+            {"key": "k", "model_id": "m", "output": "first", "latency": 0.1}
+        )
+
+        assert cassette.next_entry("k")["output"] == "first"
+
+        cassette.append(
+            {"key": "k", "model_id": "m", "output": "second", "latency": 0.1}
+        )
+
+        outputs = [cassette.next_entry("k")["output"] for _ in range(3)]
+        assert outputs == ["second", "first", "second"]
+        assert cassette.next_entry("missing") is None
@@ -0,0 +1,92 @@
+"""Unit tests for the shared model-call limiter."""
+
+import pytest
+
+from pm_pedia_langextract.poc.ratelimit import (
+    AdaptiveConcurrency,
+    ModelCallLimiter,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestTokenBucket:
+    """Test TokenBucket class."""
+
+    def test_waits_once_burst_is_spent(self) -> None:
+        """Test that requests beyond the burst wait for the refill rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() == pytest.approx(0.5)
+        # 容量を超える要求も全量を差し引く
+        assert bucket.acquire(100) == pytest.approx(50.0)
+        assert bucket.acquire() == pytest.approx(0.5)
+
+
+class TestAdaptiveConcurrency:
+    """Test AdaptiveConcurrency class."""
+
+    def test_grows_on_success_and_backs_off(self) -> None:
+        """Test additive increase and multiplicative decrease."""
+        controller = AdaptiveConcurrency(initial=2, maximum=8)
+        for _ in range(10):
+            controller.release(controller.acquire(), latency=1.0)
+        grown = controller.limit
+
+        controller.release(controller.acquire(), latency=5.0)
+        slowed = controller.limit
+        controller.release(controller.acquire(), error=True)
+
+        assert grown > 2
+        assert slowed == grown // 2
+        assert controller.limit == max(1, slowed // 2)
+
+    def test_latency_baseline_is_kept_per_kind(self) -> None:
+        """Test that slow call kinds are not judged against faster ones."""
+        controller = AdaptiveConcurrency(initial=2, maximum=8)
+        for _ in range(5):
+            controller.release(controller.acquire(), latency=0.1, kind="triage")
+            controller.release(controller.acquire(), latency=3.0, kind="snippet")
+
+        assert controller.slowdowns == 0
+        assert controller.limit > 2
+
+        controller.release(controller.acquire(), latency=7.0, kind="snippet")
+        assert controller.slowdowns == 1
+
+
+class TestModelCallLimiter:
+    """Test ModelCallLimiter class."""
+
+    def test_grants_workers_within_limit_and_records_errors(self) -> None:
+        """Test that granted workers are capped and errors shrink the limit."""
+        clock = FakeClock()
+        limiter = ModelCallLimiter(
+            chars_per_second=1000, initial_concurrency=4, clock=clock, sleep=clock.sleep
+        )
+
+        with limiter.request(500, requests=10, max_workers=8) as workers:
+            assert workers == 4
+        with pytest.raises(RuntimeError), limiter.request(1000, requests=1):
+            raise RuntimeError("quota exceeded")
+
+        stats = limiter.stats()
+        assert stats["calls"] == 2
+        assert stats["errors"] == 1
+        assert stats["waited_seconds"] == pytest.approx(0.5)
+        assert stats["concurrency_limit"] < 4
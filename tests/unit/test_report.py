@@ -0,0 +1,76 @@
+"""Unit tests for deferred HTML reports."""
+
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.report import build_index, render_document
+from pm_pedia_langextract.poc.shards import ShardWriter
+
+
+def _result(*texts: str) -> lx.data.AnnotatedDocument:
+    text = "".join(texts)
+    extractions = []
+    for extraction_text in texts:
+        start = text.index(extraction_text)
+        extractions.append(
+            lx.data.Extraction(
+                extraction_class="課題",
+                extraction_text=extraction_text,
+                char_interval=lx.data.CharInterval(
+                    start_pos=start, end_pos=start + len(extraction_text)
+                ),
+            )
+        )
+    return lx.data.AnnotatedDocument(extractions=extractions, text=text)
+
+
+class TestBuildIndex:
+    """Test build_index function."""
+
+    def test_paginates_and_skips_unchanged_output(self, tmp_path: Path) -> None:
+        """Test page splitting and that unchanged output does not regenerate pages."""
+        writer = ShardWriter(tmp_path)
+        for i in range(3):
+            writer.append(f"doc{i}.md", _result(f"課題{i}"))
+        writer.commit()
+
+        pages = build_index(tmp_path, page_size=2)
+        first_mtime = pages[0].stat().st_mtime_ns
+
+        assert [p.name for p in pages] == ["index.html", "index_2.html"]
+        assert "課題0" in pages[0].read_text(encoding="utf-8")
+        assert "課題2" in pages[1].read_text(encoding="utf-8")
+        assert build_index(tmp_path, page_size=2)[0].stat().st_mtime_ns == first_mtime
+
+        writer.append("doc0.md", _result("新しい課題"))
+        writer.commit()
+        # 更新された文書は追記順で最後のページに移る
+        pages = build_index(tmp_path, page_size=2)
+        assert "新しい課題" in pages[1].read_text(encoding="utf-8")
+        assert "課題0" not in "".join(p.read_text(encoding="utf-8") for p in pages)
+
+
+class TestRenderDocument:
+    """Test render_document function."""
+
+    def test_reuses_html_until_output_changes(self, tmp_path: Path) -> None:
+        """Test that visualization is regenerated only for changed documents."""
+        writer = ShardWriter(tmp_path)
+        writer.append("notes/doc.md", _result("課題"))
+        writer.commit()
+
+        html_path = render_document(tmp_path, "notes/doc.md")
+        assert html_path.name == "notes__doc.html"
+        html_path.write_text("stale", encoding="utf-8")
+
+        assert (
+            render_document(tmp_path, "notes/doc.md").read_text(encoding="utf-8")
+            == "stale"
+        )
+        writer.append("notes/doc.md", _result("別の課題"))
+        writer.commit()
+        assert (
+            render_document(tmp_path, "notes/doc.md").read_text(encoding="utf-8")
+            != "stale"
+        )
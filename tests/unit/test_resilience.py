@@ -0,0 +1,86 @@
+"""Unit tests for retries and hedged requests."""
+
+import random
+import threading
+
+import pytest
+from langextract import exceptions as lx_exceptions
+
+from pm_pedia_langextract.poc.resilience import ResilientCaller, RetryPolicy
+
+
+class FlakyCall:
+    """Model call stand-in that fails a fixed number of times."""
+
+    def __init__(self, failures: int, error: Exception) -> None:
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    def __call__(self) -> str:
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def _caller(**kwargs) -> tuple[ResilientCaller, list[float]]:
+    delays: list[float] = []
+    caller = ResilientCaller(rng=random.Random(0), sleep=delays.append, **kwargs)
+    return caller, delays
+
+
+class TestResilientCaller:
+    """Test ResilientCaller class."""
+
+    def test_retries_transient_failures_with_backoff(self) -> None:
+        """Test that transient errors are retried with bounded jittered delays."""
+        caller, delays = _caller(policy=RetryPolicy(max_attempts=3, base_delay=1.0))
+        call = FlakyCall(2, lx_exceptions.InferenceRuntimeError("503"))
+
+        assert caller.call(call) == "ok"
+        assert call.attempts == 3
+        assert 0 <= delays[0] <= 1.0 and 0 <= delays[1] <= 2.0
+        assert caller.stats()["retries"] == 2
+
+    def test_gives_up_after_max_attempts(self) -> None:
+        """Test that the last transient error is re-raised."""
+        caller, _ = _caller(policy=RetryPolicy(max_attempts=2))
+        call = FlakyCall(5, TimeoutError("slow"))
+
+        with pytest.raises(TimeoutError):
+            caller.call(call)
+        assert call.attempts == 2
+
+    def test_permanent_errors_are_not_retried(self) -> None:
+        """Test that configuration errors fail immediately."""
+        caller, delays = _caller()
+        call = FlakyCall(1, lx_exceptions.InferenceConfigError("no api key"))
+
+        with pytest.raises(lx_exceptions.InferenceConfigError):
+            caller.call(call)
+        assert call.attempts == 1 and delays == []
+
+    def test_hedge_wins_over_slow_primary(self) -> None:
+        """Test that a call slower than p95 is hedged and the saving is reported."""
+        caller, _ = _caller(hedge=True, hedge_min_samples=3)
+        for _ in range(3):
+            caller.call(lambda: "warmup", key="triage")
+
+        release_primary = threading.Event()
+        calls = []
+
+        def call() -> str:
+            calls.append(None)
+            if len(calls) == 1:
+                release_primary.wait(5)
+                return "primary"
+            return "hedge"
+
+        assert caller.call(call, key="triage") == "hedge"
+        release_primary.set()
+        caller._hedge_executor().shutdown(wait=True)
+
+        stats = caller.stats()
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+        assert stats["tail_saved_seconds"] >= 0.0
@@ -0,0 +1,107 @@
+"""Unit tests for sharded Phase 1 output."""
+
+from pathlib import Path
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.shards import (
+    SHARD_INDEX_NAME,
+    LegacySnippetFiles,
+    ShardReader,
+    ShardWriter,
+    open_snippet_source,
+)
+
+
+def _result(text: str) -> lx.data.AnnotatedDocument:
+    return lx.data.AnnotatedDocument(
+        extractions=[lx.data.Extraction(extraction_class="課題", extraction_text=text)],
+        text=text,
+    )
+
+
+class TestShardWriter:
+    """Test ShardWriter and ShardReader."""
+
+    def test_rolls_shards_and_keeps_latest_record(self, tmp_path: Path) -> None:
+        """Test size-based rolling and that re-appended documents supersede old ones."""
+        writer = ShardWriter(tmp_path, max_shard_bytes=400)
+        for i in range(4):
+            writer.append(f"doc{i}.md", _result(f"課題{i}"))
+        writer.append("doc1.md", _result("更新後の課題"))
+        writer.close()
+
+        reader = ShardReader(tmp_path)
+
+        assert len(list(tmp_path.glob("snippets-*.jsonl"))) > 1
+        assert reader.documents() == ["doc0.md", "doc1.md", "doc2.md", "doc3.md"]
+        assert reader.read("doc1.md").text == "更新後の課題"
+        assert sorted(doc for doc, _ in reader.iter_records()) == reader.documents()
+
+    def test_uncommitted_tail_is_discarded_on_reopen(self, tmp_path: Path) -> None:
+        """Test that records after the last commit are invisible and truncated."""
+        writer = ShardWriter(tmp_path, flush_every=100)
+        writer.append("a.md", _result("確定"))
+        writer.commit()
+        writer.append("b.md", _result("未確定"))
+        # コミットせずに落ちた状態を再現する
+        with (tmp_path / "snippets-00000.jsonl").open("ab") as f:
+            f.write(b'{"document": "broken')
+
+        assert ShardReader(tmp_path).documents() == ["a.md"]
+
+        reopened = ShardWriter(tmp_path)
+        reopened.append("c.md", _result("再開後"))
+        reopened.close()
+
+        reader = ShardReader(tmp_path)
+        assert reader.documents() == ["a.md", "c.md"]
+        assert reader.read("c.md").text == "再開後"
+        assert len((tmp_path / SHARD_INDEX_NAME).read_text().splitlines()) == 2
+
+    def test_close_compacts_superseded_records(self, tmp_path: Path) -> None:
+        """Test that live records are rewritten once superseded bytes pass the ratio."""
+        writer = ShardWriter(tmp_path, max_shard_bytes=400, compact_min_bytes=0)
+        writer.append("a.md", _result("初版"))
+        writer.append("b.md", _result("変わらない"))
+        for i in range(4):
+            writer.append("a.md", _result(f"更新{i}"))
+        writer.commit()
+        old_shards = set(tmp_path.glob("snippets-*.jsonl"))
+        before = ShardReader(tmp_path).versions()
+
+        assert writer.superseded_bytes() > 0
+        writer.close()
+
+        reader = ShardReader(tmp_path)
+        assert set(tmp_path.glob("snippets-*.jsonl")).isdisjoint(old_shards)
+        assert not (tmp_path / SHARD_INDEX_NAME).exists()
+        assert reader.read("a.md").text == "更新3"
+        assert reader.read("b.md").text == "変わらない"
+        # 位置が変わってもレコードの識別子は変わらない
+        assert reader.versions() == before
+
+        reopened = ShardWriter(tmp_path)
+        assert reopened.superseded_bytes() == 0
+        reopened.append("c.md", _result("詰め直し後"))
+        reopened.close()
+        assert ShardReader(tmp_path).documents() == ["a.md", "b.md", "c.md"]
+
+
+class TestOpenSnippetSource:
+    """Test open_snippet_source function."""
+
+    def test_falls_back_to_legacy_files(self, tmp_path: Path) -> None:
+        """Test that per-document files are read when no shard manifest exists."""
+        lx.io.save_annotated_documents(
+            [lx.data.AnnotatedDocument(document_id="x", extractions=[], text="本文")],
+            output_dir=tmp_path,
+            output_name="notes__a_snippets.jsonl",
+            show_progress=False,
+        )
+
+        source = open_snippet_source(tmp_path)
+
+        assert isinstance(source, LegacySnippetFiles)
+        assert source.documents() == ["notes__a"]
+        assert source.read("notes__a").text == "本文"
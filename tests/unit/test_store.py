@@ -0,0 +1,105 @@
+"""Unit tests for the SQLite snippet store."""
+
+import sqlite3
+from pathlib import Path
+from typing import List
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.shards import ShardReader, ShardWriter
+from pm_pedia_langextract.poc.store import SnippetStore
+
+
+def _result(*snippets: tuple) -> lx.data.AnnotatedDocument:
+    return lx.data.AnnotatedDocument(
+        extractions=[
+            lx.data.Extraction(
+                extraction_class=category,
+                extraction_text=text,
+                char_interval=lx.data.CharInterval(start_pos=0, end_pos=len(text)),
+                attributes={"project_keywords": keywords, "people": ["田中"]},
+            )
+            for category, text, keywords in snippets
+        ],
+        text="",
+    )
+
+
+def _texts(snippets: List[dict]) -> List[str]:
+    return [snippet["text"] for snippet in snippets]
+
+
+class TestSnippetStore:
+    """Test SnippetStore class."""
+
+    def test_search_matches_text_and_keywords(self, tmp_path: Path) -> None:
+        """Test substring search (including short terms) and exact keyword matches."""
+        writer = ShardWriter(tmp_path / "phase1")
+        writer.append("a.md", _result(
+            ("課題", "スマートタグのクラスタリングが遅い", ["SmartTag"]),
+            ("決定事項", "CSV取り込みを優先する", ["マルチデータソース"]),
+        ))
+        writer.append("b.md", _result(("リスク", "期限に間に合わない", ["SmartTag"])))
+        writer.close()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+
+        assert store.document_count() == 2
+        assert store.snippet_count() == 3
+        assert _texts(store.search(["クラスタリング"])) == [
+            "スマートタグのクラスタリングが遅い"
+        ]
+        assert _texts(store.search(["csv"])) == ["CSV取り込みを優先する"]
+        assert _texts(store.search(["タグ"])) == ["スマートタグのクラスタリングが遅い"]
+        assert _texts(store.search(["smarttag"])) == [
+            "スマートタグのクラスタリングが遅い", "期限に間に合わない"
+        ]
+        assert _texts(store.search(["smarttag"], category="リスク")) == [
+            "期限に間に合わない"
+        ]
+        assert store.search(["存在しない語"]) == []
+        assert _texts(store.search(["課題", "遅い"], limit=1)) == [
+            "スマートタグのクラスタリングが遅い"
+        ]
+
+        snippet = store.snippets(limit=1)[0]
+        assert snippet["document"] == "a.md"
+        assert snippet["char_interval"] == {"start_pos": 0, "end_pos": 17}
+        assert snippet["people"] == ["田中"]
+        store.close()
+
+    def test_sync_applies_only_changed_documents(self, tmp_path: Path) -> None:
+        """Test that sync replaces updated documents and drops removed ones."""
+        writer = ShardWriter(tmp_path / "phase1")
+        writer.append("a.md", _result(("課題", "古い課題", [])))
+        writer.append("b.md", _result(("課題", "別の課題", [])))
+        writer.commit()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        assert store.sync(ShardReader(tmp_path / "phase1"))["added"] == 2
+
+        writer.append("a.md", _result(("課題", "新しい課題", [])))
+        writer.close()
+        stats = store.sync(ShardReader(tmp_path / "phase1"))
+
+        assert stats == {"added": 0, "updated": 1, "removed": 0, "unchanged": 1}
+        assert _texts(store.search(["課題"])) == ["別の課題", "新しい課題"]
+        assert store.search(["古い課題"]) == []
+        store.close()
+
+    def test_full_text_index_is_rebuilt_when_missing(self, tmp_path: Path) -> None:
+        """Test that a store without snippets_fts is indexed again when opened."""
+        writer = ShardWriter(tmp_path / "phase1")
+        writer.append("a.md", _result(("課題", "クラスタリングが遅い", [])))
+        writer.close()
+        store = SnippetStore(tmp_path / "store.sqlite3")
+        store.sync(ShardReader(tmp_path / "phase1"))
+        store.close()
+        conn = sqlite3.connect(str(tmp_path / "store.sqlite3"))
+        conn.execute("DROP TABLE snippets_fts")
+        conn.commit()
+        conn.close()
+
+        store = SnippetStore(tmp_path / "store.sqlite3")
+
+        assert _texts(store.search(["クラスタ"])) == ["クラスタリングが遅い"]
+        store.close()
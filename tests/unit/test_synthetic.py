@@ -0,0 +1,51 @@
+"""Unit tests for the synthetic corpus generator."""
+
+import json
+from pathlib import Path
+
+from pm_pedia_langextract.poc.ingest import iter_documents
+from pm_pedia_langextract.poc.synthetic import (
+    CorpusConfig,
+    CorpusGenerator,
+    generate_corpus,
+    load_ground_truth,
+)
+
+
+class TestSyntheticCorpus:
+    """Test synthetic corpus generation."""
+
+    def test_generation_is_deterministic_per_document(self) -> None:
+        """Test that a document depends only on the seed and its index."""
+        small = CorpusGenerator(CorpusConfig(num_documents=10, seed=3))
+        large = CorpusGenerator(CorpusConfig(num_documents=1000, seed=3))
+
+        assert small.document(7) == large.document(7)
+        assert small.document(7) != CorpusGenerator(CorpusConfig(seed=4)).document(7)
+
+    def test_writes_documents_and_ground_truth(self, tmp_path: Path) -> None:
+        """Test that documents and labels are written and consistent."""
+        stats = generate_corpus(
+            tmp_path, CorpusConfig(num_documents=50, num_projects=5)
+        )
+
+        projects, labels = load_ground_truth(tmp_path)
+        labels = list(labels)
+        known_ids = {p["project_id"] for p in projects}
+        known_names = {name for p in projects for name in [p["name"], *p["aliases"]]}
+
+        assert stats["documents"] == 50 == len(labels)
+        assert len(list(iter_documents(tmp_path))) == 50
+        for label in labels:
+            text = (tmp_path / label["path"]).read_text(encoding="utf-8")
+            assert set(label["projects"]) <= known_ids
+            assert all(
+                alias in known_names and alias in text
+                for alias in label["aliases_used"]
+            )
+        assert (
+            json.loads((tmp_path / "projects.json").read_text())["config"][
+                "num_documents"
+            ]
+            == 50
+        )
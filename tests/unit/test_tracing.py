@@ -0,0 +1,61 @@
+"""Unit tests for timing spans."""
+
+from pm_pedia_langextract.poc.tracing import Tracer, percentile
+
+
+class TestTracer:
+    """Test Tracer class."""
+
+    def test_nested_spans_inherit_document(self) -> None:
+        """Test that inner spans are attributed to the enclosing document."""
+        tracer = Tracer()
+
+        with (
+            tracer.span("phase1.document", document="a.md"),
+            tracer.span("phase1.triage"),
+        ):
+            pass
+        with tracer.span("phase1.run"):
+            pass
+
+        documents = {r.stage: r.document for r in tracer.records()}
+        assert documents == {
+            "phase1.triage": "a.md",
+            "phase1.document": "a.md",
+            "phase1.run": None,
+        }
+        assert set(tracer.report()["documents"]["a.md"]) == {
+            "phase1.document",
+            "phase1.triage",
+        }
+
+    def test_report_summarizes_each_stage(self) -> None:
+        """Test that the report has count and wall/CPU percentiles per stage."""
+        tracer = Tracer()
+        for _ in range(3):
+            with tracer.span("phase1.save.write"):
+                sum(range(1000))
+
+        stats = tracer.report()["stages"]["phase1.save.write"]
+
+        assert stats["count"] == 3
+        assert set(stats["wall_ms"]) == {"total", "p50", "p95", "max"}
+        assert stats["wall_ms"]["p50"] <= stats["wall_ms"]["max"]
+
+    def test_disabled_tracer_records_nothing(self) -> None:
+        """Test that a disabled tracer is a no-op."""
+        tracer = Tracer(enabled=False)
+
+        with tracer.span("phase1.triage", document="a.md"):
+            pass
+
+        assert tracer.records() == []
+
+
+class TestPercentile:
+    """Test percentile function."""
+
+    def test_uses_nearest_rank(self) -> None:
+        """Test percentile on a small sample."""
+        assert percentile([5.0, 1.0, 3.0], 50) == 3.0
+        assert percentile([5.0, 1.0, 3.0], 95) == 5.0
@@ -0,0 +1,138 @@
+"""Unit tests for batched triage."""
+
+from typing import Any
+
+import langextract as lx
+
+from pm_pedia_langextract.poc.extractors import TriageExtractor
+
+
+def _triage_extractions(
+    score: str, doc_id: str | None = None
+) -> list[lx.data.Extraction]:
+    attributes = {"doc_id": doc_id} if doc_id else {}
+    return [
+        lx.data.Extraction(
+            extraction_class="document_type",
+            extraction_text="日報",
+            attributes=attributes,
+        ),
+        lx.data.Extraction(
+            extraction_class="relevance_score",
+            extraction_text=score,
+            attributes=attributes,
+        ),
+    ]
+
+
+class FakeModel:
+    """Stand-in for _run_extract that answers packed and single requests."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def __call__(self, text: str, **kwargs: Any) -> lx.data.AnnotatedDocument:
+        self.calls.append(text)
+        if "=== DOCUMENT" in text:
+            # 2件目のドキュメントの結果は返さない（フォールバック対象）
+            return lx.data.AnnotatedDocument(
+                extractions=_triage_extractions("0.9", doc_id="1"), text=text
+            )
+        return lx.data.AnnotatedDocument(
+            extractions=_triage_extractions("0.2"), text=text
+        )
+
+
+class TestTriageBatch:
+    """Test TriageExtractor.extract_batch."""
+
+    def test_batches_short_documents_and_falls_back(self) -> None:
+        """Test packing, routing and single-document fallbacks."""
+        extractor = TriageExtractor()
+        model = FakeModel()
+        extractor._run_extract = model  # type: ignore[method-assign]
+        documents = [("a.md", "短い文書A"), ("b.md", "短い文書B"), ("c.md", "長" * 100)]
+
+        results = extractor.extract_batch(documents, max_batch_chars=50)
+
+        assert [score for _, score in results] == [0.9, 0.2, 0.2]
+        assert "=== DOCUMENT 1 ===" in model.calls[1]
+        assert model.calls[0] == "長" * 100
+        assert model.calls[2] == "短い文書B"
+        assert results[0][0].text == "短い文書A"
+
+    def test_position_wins_over_doc_id(self) -> None:
+        """Test that aligned positions route results and are clipped to the body."""
+        extractor = TriageExtractor()
+        documents = [("a.md", "短い文書A"), ("b.md", "短い文書B")]
+
+        def model(text: str, **kwargs: Any) -> lx.data.AnnotatedDocument:
+            start = text.index("短い文書B")
+            extractions = _triage_extractions("0.7", doc_id="1")
+            extractions[0].char_interval = lx.data.CharInterval(
+                start_pos=start, end_pos=start + 4
+            )
+            extractions[1].char_interval = lx.data.CharInterval(
+                start_pos=start - 3, end_pos=start + 100
+            )
+            return lx.data.AnnotatedDocument(extractions=extractions, text=text)
+
+        extractor._run_extract = model  # type: ignore[method-assign]
+        routed = extractor._extract_packed(documents)
+
+        assert routed[0] is None
+        document, score = routed[1]
+        assert score == 0.7
+        intervals = [
+            (e.char_interval.start_pos, e.char_interval.end_pos)
+            for e in document.extractions
+        ]
+        assert intervals == [(0, 4), (0, len("短い文書B"))]
+
+
+class TestTriagePreview:
+    """Test TriageExtractor.extract_preview."""
+
+    @staticmethod
+    def _extractor(preview_score: str) -> tuple[TriageExtractor, list[str]]:
+        extractor = TriageExtractor()
+        calls: list[str] = []
+
+        def fake(text: str, **kwargs: Any) -> lx.data.AnnotatedDocument:
+            calls.append(text)
+            score = preview_score if "prompt" in kwargs else "0.9"
+            return lx.data.AnnotatedDocument(
+                extractions=_triage_extractions(score), text=text
+            )
+
+        extractor._run_extract = fake  # type: ignore[method-assign]
+        return extractor, calls
+
+    TEXT = "# 週報\n\n## 進捗\n" + "進" * 500 + "\n\n## 課題\n" + "課" * 500
+
+    def test_confident_preview_skips_full_text(self) -> None:
+        """Test that a score far from the cutoff is returned directly."""
+        extractor, calls = self._extractor("0.1")
+
+        _, score = extractor.extract_preview("a.md", self.TEXT, section_chars=50)
+
+        assert score == 0.1
+        assert len(calls) == 1 and len(calls[0]) < len(self.TEXT)
+
+    def test_borderline_preview_escalates(self) -> None:
+        """Test that a score near the cutoff triggers full-text triage."""
+        extractor, calls = self._extractor("0.65")
+
+        _, score = extractor.extract_preview("a.md", self.TEXT, section_chars=50)
+
+        assert score == 0.9
+        assert calls[1] == self.TEXT
+
+    def test_preview_without_score_escalates(self) -> None:
+        """Test that a preview whose score cannot be parsed falls back to full text."""
+        extractor, calls = self._extractor("不明")
+
+        _, score = extractor.extract_preview("a.md", self.TEXT, section_chars=50)
+
+        assert score == 0.9
+        assert calls[1] == self.TEXT